@@ -0,0 +1,110 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Q
+
+from dashboard.models import Strike
+
+# Every strike column the API exposes, ``sources`` is the nested M2M
+STRIKE_FIELDS = (
+    'id', 'date', 'location_label', 'location_lat', 'location_lon',
+    'location_uncertainty_m', 'target', 'striker', 'target_origin',
+    'target_destination', 'crew_number', 'number_killed', 'image_url',
+    'image_label', 'video_url', 'dvids_video_id', 'summary', 'updated_at',
+    'sources',
+)
+
+SOURCE_FIELDS = ('id', 'name', 'url', 'type', 'last_reviewed', 'updated_at')
+
+# Rows fetched per query when streaming
+CHUNK_SIZE = 2000
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """Compact JSON, fast enough to call once per streamed row."""
+    return json.dumps(value, default=_default, separators=(',', ':'))
+
+
+def _attach_sources(rows):
+    """Add a ``sources`` list to each strike row, one query per chunk."""
+    by_strike = {row['id']: row for row in rows}
+    for row in rows:
+        row['sources'] = []
+    links = (
+        Strike.sources.through.objects
+        .filter(strike_id__in=by_strike)
+        .order_by('strike_id', 'source_id')
+        .values_list('strike_id', 'source_id', 'source__name', 'source__url', 'source__type')
+    )
+    for strike_id, source_id, name, url, type_ in links:
+        by_strike[strike_id]['sources'].append(
+            {'id': source_id, 'name': name, 'url': url, 'type': type_}
+        )
+
+
+def strike_rows(queryset, fields):
+    """
+    One page of strikes as plain dicts holding ``fields``.
+
+    Rows come from ``values()`` so no model instances are built, and
+    sources are fetched in one query for the page. Only the paginated list
+    uses this, the dumps go chunk by chunk through ``strike_chunk``.
+    """
+    columns = [field for field in fields if field != 'sources']
+    rows = list(queryset.values(*columns))
+    if 'sources' in fields:
+        _attach_sources(rows)
+    return rows
+
+
+def strike_chunk(queryset, fields, after=None, chunk_size=CHUNK_SIZE):
+    """
+    The first ``chunk_size`` strikes of ``queryset``, newest first, past
+    the ``(date, pk)`` key ``after``, as dicts holding ``fields``. Returns
+    the rows and the key to pass as ``after`` for the next chunk, None once
+    there are no more.
+
+    Each chunk is its own query, a seek into the (date, pk) index, so the
+    chunks of one dump can run on different connections.
+    """
+    if after is not None:
+        day, pk = after
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, pk__lt=pk))
+    columns = [field for field in fields if field != 'sources']
+    # The key needs date even when the client didn't ask for it
+    extra = [] if 'date' in columns else ['date']
+    rows = list(queryset.order_by('-date', '-pk').values(*columns, *extra)[:chunk_size])
+    if 'sources' in fields:
+        _attach_sources(rows)
+    key = (rows[-1]['date'], rows[-1]['id']) if len(rows) == chunk_size else None
+    for row in rows:
+        for column in extra:
+            del row[column]
+    return rows, key
+
+
+def geojson_feature(row):
+    """GeoJSON Feature for a strike row that has coordinates."""
+    properties = {
+        key: value for key, value in row.items()
+        if key not in ('location_lat', 'location_lon')
+    }
+    return {
+        'type': 'Feature',
+        'id': row['id'],
+        'geometry': {
+            'type': 'Point',
+            # GeoJSON positions are longitude first
+            'coordinates': [float(row['location_lon']), float(row['location_lat'])],
+        },
+        'properties': properties,
+    }
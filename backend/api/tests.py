@@ -0,0 +1,278 @@
+import json
+import warnings
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+
+from dashboard import asyncdb
+from dashboard.models import Strike
+from sources.models import Source
+
+from .serializers import strike_chunk
+
+
+def streamed(response):
+    return b''.join(response.streaming_content).decode()
+
+
+class StrikeListAPITests(TestCase):
+    """Test the paginated strike JSON endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.strikes = [
+            Strike.objects.create(
+                date=date(2024, 1, 1 + i),
+                location_label=f"API Strike {i}",
+                location_lat=Decimal("12.50000000000000"),
+                location_lon=Decimal("-70.25000000000000"),
+                target="Target",
+                striker="Striker",
+                number_killed=i,
+            )
+            for i in range(5)
+        ]
+        self.source = Source.objects.create(name="API Source", url="https://example.com/api")
+        self.strikes[-1].sources.add(self.source)
+
+    def test_pages_walk_every_strike(self):
+        """Following ``next`` returns each strike once, newest first."""
+        url, seen = '/api/strikes/?limit=2', []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+        self.assertEqual(seen, [strike.pk for strike in reversed(self.strikes)])
+
+    def test_rows_include_sources(self):
+        """Strike rows carry their sources nested."""
+        row = self.client.get('/api/strikes/?limit=1').json()['results'][0]
+        self.assertEqual(row['id'], self.strikes[-1].pk)
+        self.assertEqual(row['sources'], [{
+            'id': self.source.pk, 'name': "API Source",
+            'url': "https://example.com/api", 'type': "PRIMARY",
+        }])
+        self.assertEqual(row['location_lat'], 12.5)
+
+    def test_field_selection(self):
+        """``fields`` limits the columns returned, id is always included."""
+        data = self.client.get('/api/strikes/', {'fields': 'location_label,number_killed', 'limit': 2}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'location_label', 'number_killed'})
+        self.assertIsNotNone(data['next'])
+
+    def test_since_filter(self):
+        """``since`` keeps strikes on or after the given date."""
+        data = self.client.get('/api/strikes/', {'since': '2024-01-04'}).json()
+        self.assertEqual(len(data['results']), 2)
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_updated_since_without_offset_is_utc(self):
+        """A naive ``updated_since`` is read as UTC, not in the server's timezone."""
+        Strike.objects.update(updated_at=datetime(2024, 6, 1, 14, 0, tzinfo=timezone.utc))
+        Strike.objects.filter(pk=self.strikes[0].pk).update(updated_at=datetime(2024, 6, 1, 10, 0, tzinfo=timezone.utc))
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            data = self.client.get('/api/strikes/', {'updated_since': '2024-06-01T12:00:00'}).json()
+        self.assertEqual(len(data['results']), 4)
+        data = self.client.get('/api/strikes/', {'updated_since': '2024-06-01T12:00:00-05:00'}).json()
+        self.assertEqual(data['results'], [])
+
+    def test_bad_parameters_are_400(self):
+        """Unknown fields, bad dates, limits and cursors are rejected."""
+        for params in (
+            {'fields': 'nope'}, {'since': 'yesterday'}, {'limit': '0'},
+            {'limit': 'x'}, {'after': 'bad'},
+        ):
+            response = self.client.get('/api/strikes/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', response.json())
+
+    def test_read_only(self):
+        """Writes are not allowed."""
+        self.assertEqual(self.client.post('/api/strikes/').status_code, 405)
+
+
+class StrikeDumpAPITests(TestCase):
+    """Test the streamed NDJSON and GeoJSON dumps."""
+
+    def setUp(self):
+        self.client = Client()
+        self.located = Strike.objects.create(
+            date=date(2024, 1, 15),
+            location_label="Located",
+            location_lat=Decimal("12.50000000000000"),
+            location_lon=Decimal("-70.25000000000000"),
+            target="Target",
+            striker="Striker",
+        )
+        self.unlocated = Strike.objects.create(
+            date=date(2024, 1, 16), location_label="Unlocated", target="Target", striker="Striker",
+        )
+        self.source = Source.objects.create(name="Dump Source", url="https://example.com/dump")
+        self.located.sources.add(self.source)
+
+    def test_ndjson_streams_one_line_per_strike(self):
+        """NDJSON dump has one parseable line per strike."""
+        response = self.client.get('/api/strikes.ndjson')
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.unlocated.pk, self.located.pk])
+        self.assertEqual(rows[1]['sources'][0]['id'], self.source.pk)
+
+    def test_ndjson_honours_fields_and_since(self):
+        """Dumps accept the same filters as the paginated endpoint."""
+        response = self.client.get('/api/strikes.ndjson', {'fields': 'date', 'since': '2024-01-16'})
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+        self.assertEqual(rows, [{'id': self.unlocated.pk, 'date': '2024-01-16'}])
+
+    def test_geojson_feature_collection(self):
+        """GeoJSON holds a Point feature per located strike, lon first."""
+        response = self.client.get('/api/strikes.geojson', {'fields': 'location_label'})
+        self.assertEqual(response['Content-Type'], 'application/geo+json')
+        data = json.loads(streamed(response))
+        self.assertEqual(data['type'], 'FeatureCollection')
+        self.assertEqual(len(data['features']), 1)
+        feature = data['features'][0]
+        self.assertEqual(feature['geometry'], {'type': 'Point', 'coordinates': [-70.25, 12.5]})
+        self.assertEqual(feature['properties'], {'id': self.located.pk, 'location_label': "Located"})
+
+    def test_empty_geojson_is_valid(self):
+        """No matching strikes still yields a valid FeatureCollection."""
+        response = self.client.get('/api/strikes.geojson', {'since': '2030-01-01'})
+        self.assertEqual(json.loads(streamed(response)), {'type': 'FeatureCollection', 'features': []})
+
+
+class StrikeDumpAsgiTests(TransactionTestCase):
+    """Test the dumps stream a chunk at a time under ASGI."""
+
+    def setUp(self):
+        self.addCleanup(asyncdb.shutdown)
+        self.strikes = [
+            Strike.objects.create(
+                date=date(2024, 1, 1 + i), location_label=f"Chunk {i}",
+                location_lat=Decimal("12.5"), location_lon=Decimal("-70.25"),
+                target="Target", striker="Striker",
+            )
+            for i in range(5)
+        ]
+
+    def read(self, path, events):
+        def fetch(strikes, fields, after):
+            events.append('fetch')
+            return strike_chunk(strikes, fields, after, chunk_size=2)
+
+        async def read():
+            with mock.patch('api.views.strike_chunk', side_effect=fetch):
+                response = await self.async_client.get(path)
+                self.assertTrue(response.is_async)
+                parts = []
+                async for part in response.streaming_content:
+                    if part:
+                        events.append('send')
+                        parts.append(part)
+                return b''.join(parts).decode()
+        return async_to_sync(read)()
+
+    def test_ndjson_sends_each_chunk_before_fetching_the_next(self):
+        """Rows go out a chunk at a time, not after the whole dump is read."""
+        events = []
+        rows = [json.loads(line) for line in self.read('/api/strikes.ndjson?fields=date', events).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [strike.pk for strike in reversed(self.strikes)])
+        self.assertEqual(events, ['fetch', 'send'] * 3)
+
+    def test_geojson_chunks_join_into_one_collection(self):
+        """Features from every chunk end up in one valid FeatureCollection."""
+        events = []
+        data = json.loads(self.read('/api/strikes.geojson?fields=location_label', events))
+        self.assertEqual(len(data['features']), 5)
+        self.assertEqual(events[:3], ['send', 'fetch', 'send'])
+        self.assertEqual(events.count('fetch'), 3)
+
+
+class SourceListAPITests(TestCase):
+    """Test the paginated source JSON endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.sources = [
+            Source.objects.create(name=f"Source {i}", url=f"https://example.com/{i}")
+            for i in range(3)
+        ]
+
+    def test_pages_walk_every_source(self):
+        """Following ``next`` returns each source once, in pk order."""
+        url, seen = '/api/sources/?limit=2', []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+        self.assertEqual(seen, [source.pk for source in self.sources])
+
+    def test_field_selection(self):
+        """``fields`` limits the source columns returned."""
+        row = self.client.get('/api/sources/', {'fields': 'url'}).json()['results'][0]
+        self.assertEqual(row, {'id': self.sources[0].pk, 'url': "https://example.com/0"})
+
+    def test_since_filters(self):
+        """``since`` is on last_reviewed and ``updated_since`` on updated_at."""
+        Source.objects.filter(pk=self.sources[0].pk).update(
+            last_reviewed=date(2020, 1, 1), updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+        for params in ({'since': '2021-01-01'}, {'updated_since': '2021-01-01T00:00:00+00:00'}):
+            data = self.client.get('/api/sources/', params).json()
+            self.assertEqual([row['id'] for row in data['results']], [s.pk for s in self.sources[1:]], params)
+        self.assertEqual(self.client.get('/api/sources/', {'since': 'x'}).status_code, 400)
+
+
+class StrikeGraphAPITests(TestCase):
+    """Test the strikes-related-through-sources graph endpoint."""
+
+    def setUp(self):
+        # a - b - c - d, a chain of shared sources, plus e on its own
+        self.strikes = {
+            name: Strike.objects.create(date=date(2024, 1, 1), location_label=name, target="T", striker="S")
+            for name in 'abcde'
+        }
+        for i, (left, right) in enumerate(['ab', 'bc', 'cd']):
+            source = Source.objects.create(name=f"Shared {i}", url=f"https://example.com/shared/{i}")
+            source.strike_set.add(self.strikes[left], self.strikes[right])
+        # a and b share two
+        extra = Source.objects.create(name="Extra", url="https://example.com/extra")
+        extra.strike_set.add(self.strikes['a'], self.strikes['b'])
+
+    def graph(self, name, **params):
+        return self.client.get(f"/api/strikes/{self.strikes[name].pk}/related.json", params)
+
+    def edges(self, data):
+        names = {strike.pk: name for name, strike in self.strikes.items()}
+        return sorted(
+            (''.join(sorted(names[e['source']] + names[e['target']])), e['shared_sources'])
+            for e in data['edges']
+        )
+
+    def test_neighbours(self):
+        """Depth 1 is the strike and those sharing a source with it, each edge once."""
+        data = self.graph('b').json()
+        self.assertEqual([node['location_label'] for node in data['nodes']], ['b', 'a', 'c'])
+        self.assertEqual(self.edges(data), [('ab', 2), ('bc', 1)])
+        self.assertFalse(data['truncated'])
+
+    def test_two_hops(self):
+        """Depth 2 reaches the neighbours' neighbours."""
+        data = self.graph('a', depth=2).json()
+        self.assertEqual([(n['location_label'], n['hops']) for n in data['nodes']], [('a', 0), ('b', 1), ('c', 2)])
+        self.assertEqual(self.edges(data), [('ab', 2), ('bc', 1)])
+        data = self.graph('b', depth=2).json()
+        self.assertEqual(self.edges(data), [('ab', 2), ('bc', 1), ('cd', 1)])
+
+    def test_lone_strike_and_errors(self):
+        """A strike without shared sources is a graph of one, bad input is a 400 or 404."""
+        self.assertEqual(len(self.graph('e').json()['nodes']), 1)
+        self.assertEqual(self.graph('a', depth=3).status_code, 400)
+        self.assertEqual(self.graph('a', depth='x').status_code, 400)
+        self.assertEqual(self.client.get('/api/strikes/999999/related.json').status_code, 404)
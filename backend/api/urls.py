@@ -0,0 +1,13 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('strikes/', views.strike_list, name='strike_list'),
+    path('strikes.ndjson', views.strike_ndjson, name='strike_ndjson'),
+    path('strikes.geojson', views.strike_geojson, name='strike_geojson'),
+    path('strikes/<int:pk>/related.json', views.strike_graph, name='strike_graph'),
+    path('sources/', views.source_list, name='source_list'),
+]
@@ -0,0 +1,230 @@
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from dashboard import asyncdb, related
+from dashboard.models import Strike
+from dashboard.sidebar import decode_cursor
+from sources.models import Source
+
+from .serializers import (
+    SOURCE_FIELDS, STRIKE_FIELDS, dumps, geojson_feature, strike_chunk, strike_rows,
+)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json(data, status=200):
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
+
+
+def _fields(request, allowed):
+    """Fields picked with ``?fields=a,b``, all of ``allowed`` by default."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(allowed)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+    # The id is what clients page and join on, always send it
+    return ['id'] + [field for field in fields if field != 'id']
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise BadRequest("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise BadRequest(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+
+def _since(request, queryset, date_field):
+    """
+    ``queryset`` narrowed by ``since`` on ``date_field`` and ``updated_since``
+    on updated_at. An ``updated_since`` without an offset is taken as UTC.
+    """
+    try:
+        if 'since' in request.GET:
+            queryset = queryset.filter(**{f'{date_field}__gte': date.fromisoformat(request.GET['since'])})
+        if 'updated_since' in request.GET:
+            moment = datetime.fromisoformat(request.GET['updated_since'])
+            # Without an offset it means UTC, as updated_at is written out
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+            queryset = queryset.filter(updated_at__gte=moment)
+    except ValueError:
+        raise BadRequest("since must be YYYY-MM-DD and updated_since an ISO 8601 datetime")
+    return queryset
+
+
+def _strikes(request):
+    """Strike queryset narrowed by ``since`` and ``updated_since``, newest first."""
+    return _since(request, Strike.objects.order_by('-date', '-pk'), 'date')
+
+
+def _next_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['after'] = cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _bad_request(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return _json({'error': str(error)}, status=400)
+    return wrapper
+
+
+@require_GET
+@_bad_request
+def strike_list(request):
+    """One page of strikes, keyset paginated on (date, pk) like the sidebar."""
+    fields = _fields(request, STRIKE_FIELDS)
+    limit = _limit(request)
+    strikes = _strikes(request)
+    if 'after' in request.GET:
+        try:
+            day, pk = decode_cursor(request.GET['after'])
+        except ValueError:
+            raise BadRequest("Invalid cursor")
+        strikes = strikes.filter(Q(date__lt=day) | Q(date=day, pk__lt=pk))
+
+    # The cursor needs date and pk even when the client didn't ask for date
+    columns = fields if 'date' in fields else fields + ['date']
+    rows = strike_rows(strikes[:limit + 1], columns)
+    cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        cursor = f"{last['date'].isoformat()}.{last['id']}"
+        rows = rows[:limit]
+    if 'date' not in fields:
+        for row in rows:
+            del row['date']
+    return _json({'results': rows, 'next': _next_url(request, cursor)})
+
+
+def _stream(request, strikes, fields, encode, head='', tail=''):
+    """
+    ``head``, then ``encode(rows, first)`` for each chunk of ``strikes``,
+    then ``tail``, fetching a chunk only once the one before it has gone.
+
+    Under ASGI this is an async iterator that fetches each chunk on the
+    database threads. Django reads a sync iterator to the end with
+    ``sync_to_async(list)`` before sending any of it, so the whole dump
+    would sit in memory. Under WSGI it's a plain generator.
+    """
+    def text(rows, first):
+        return encode(rows, first) if rows else ''
+
+    if asyncdb.concurrent(request):
+        async def stream():
+            yield head
+            after, first = None, True
+            while True:
+                rows, after = await asyncdb.run(request, strike_chunk, strikes, fields, after)
+                yield text(rows, first)
+                if after is None:
+                    break
+                first = False
+            yield tail
+    else:
+        def stream():
+            yield head
+            after, first = None, True
+            while True:
+                rows, after = strike_chunk(strikes, fields, after)
+                yield text(rows, first)
+                if after is None:
+                    break
+                first = False
+            yield tail
+    return stream()
+
+
+@require_GET
+@_bad_request
+def strike_ndjson(request):
+    """Every matching strike, one JSON object per line, streamed."""
+    fields = _fields(request, STRIKE_FIELDS)
+    return StreamingHttpResponse(
+        _stream(request, _strikes(request), fields,
+                lambda rows, first: ''.join(dumps(row) + '\n' for row in rows)),
+        content_type='application/x-ndjson',
+    )
+
+
+@require_GET
+@_bad_request
+def strike_geojson(request):
+    """Every matching strike with coordinates as a streamed FeatureCollection."""
+    fields = _fields(request, STRIKE_FIELDS)
+    for column in ('location_lat', 'location_lon'):
+        if column not in fields:
+            fields.append(column)
+    strikes = _strikes(request).filter(location_lat__isnull=False, location_lon__isnull=False)
+
+    def features(rows, first):
+        return ('' if first else ',') + ','.join(dumps(geojson_feature(row)) for row in rows)
+
+    return StreamingHttpResponse(
+        _stream(request, strikes, fields, features,
+                head='{"type":"FeatureCollection","features":[', tail=']}'),
+        content_type='application/geo+json',
+    )
+
+
+@require_GET
+@_bad_request
+def strike_graph(request, pk):
+    """
+    Strikes linked to ``pk`` by shared sources, up to ``depth`` hops away, as
+    nodes and weighted edges.
+    """
+    try:
+        depth = int(request.GET.get('depth', 1))
+    except ValueError:
+        raise BadRequest("depth must be an integer")
+    if not 1 <= depth <= related.MAX_GRAPH_DEPTH:
+        raise BadRequest(f"depth must be between 1 and {related.MAX_GRAPH_DEPTH}")
+    graph = related.graph(pk, depth)
+    # Every strike is in its own graph, bar ones that don't exist
+    if not graph['nodes']:
+        return _json({'error': 'No such strike'}, status=404)
+    return _json({'strike': pk, 'depth': depth, **graph})
+
+
+@require_GET
+@_bad_request
+def source_list(request):
+    """
+    One page of sources, keyset paginated on pk. ``since`` is on
+    last_reviewed.
+    """
+    fields = _fields(request, SOURCE_FIELDS)
+    limit = _limit(request)
+    sources = _since(request, Source.objects.order_by('pk'), 'last_reviewed')
+    if 'after' in request.GET:
+        try:
+            sources = sources.filter(pk__gt=int(request.GET['after']))
+        except ValueError:
+            raise BadRequest("Invalid cursor")
+
+    rows = list(sources.values(*fields)[:limit + 1])
+    cursor = str(rows[limit - 1]['id']) if len(rows) > limit else None
+    return _json({'results': rows[:limit], 'next': _next_url(request, cursor)})
@@ -33,18 +33,31 @@ INSTALLED_APPS = [
     'dashboard.apps.DashboardConfig',
     'sources.apps.SourcesConfig',
     'submit.apps.SubmitConfig',
+    'api.apps.ApiConfig',
+    'stats.apps.StatsConfig',
+    'monitoring.apps.MonitoringConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'tailwind',
     'theme',
 ]
 
+# Query counts and timings first, so they cover the rest. Then the stock
+# middleware, as is, so the deploy checks see them. Under ASGI that has a
+# cost on every request: each hook of the MiddlewareMixin ones (all of the
+# Django ones) runs through sync_to_async(thread_sensitive=True), and
+# WhiteNoise is sync only, so Django hops the request to a thread and back
+# around it. That is the per-request overhead the ASGI switch set out to
+# avoid, and it stays until these run inline.
 MIDDLEWARE = [
+    'monitoring.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,6 +66,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing header with each response's query count, database and app
+# time. Handy in the browser's dev tools, but tells anyone how the site
+# spends its time, so off in production unless asked for.
+REQUEST_METRICS_HEADER = os.environ.get("REQUEST_METRICS_HEADER", "1" if DEBUG else "0") == "1"
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -71,6 +89,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
@@ -84,9 +103,90 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASSWORD", "app"),
         "HOST": os.environ.get("DB_HOST", "db"),
         "PORT": os.environ.get("DB_PORT", "5432"),
+        # Seconds a thread keeps its connection between requests, only
+        # without the pool below. Leave at 0 under ASGI: every request runs
+        # its sync code on a fresh thread, whose kept connection would never
+        # be reused.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "0")),
+        # With the pool below, Django hands it ConnectionPool.check_connection
+        # as its check, so a connection Postgres dropped while idle is
+        # replaced before a request gets it (monitoring's
+        # PoolHealthCheckTests). Don't also set "check" in the pool options,
+        # Django passes it already.
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Connection pool, one per worker process (psycopg_pool). A request
+# borrows a connection and hands it back when it's done, so connecting is
+# paid once per pool slot instead of once per request. DB_POOL_MAX_SIZE=0
+# turns it off, as does DB_CONN_MAX_AGE, the two don't mix. Workers ×
+# DB_POOL_MAX_SIZE has to fit in Postgres' max_connections. Size it from
+# the stats at /internal/db-pool/, see README.
+DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", "10"))
+
+if DB_POOL_MAX_SIZE > 0 and DATABASES["default"]["CONN_MAX_AGE"] == 0:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": min(int(os.environ.get("DB_POOL_MIN_SIZE", "2")), DB_POOL_MAX_SIZE),
+            "max_size": DB_POOL_MAX_SIZE,
+            # Seconds a request waits for a free connection before erroring
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+            # Idle connections above min_size are closed after this long
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", "300")),
+            "max_lifetime": float(os.environ.get("DB_POOL_MAX_LIFETIME", "3600")),
+        },
+    }
+
+# Threads per process that async views run their queries on under ASGI,
+# each keeps one database connection open. 0 runs the queries on the
+# request's thread one after another, like Django's async ORM does. With
+# the pool they borrow a connection per call instead. See
+# dashboard/asyncdb.py.
+ASYNC_DB_THREADS = int(os.environ.get("ASYNC_DB_THREADS", "8"))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMem is per process: page eviction and the cache versions only reach
+# the worker that made the change. Set REDIS_URL when running more than one
+# worker, entrypoint.sh refuses to start several without it.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", "5000"))},
+        }
+    }
+
+# Rendered strike/source pages are evicted on write, this is only a backstop
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", 60 * 60 * 24))
+
+
+# Submission queue
+# Accepted submissions are appended here and written to the database by
+# `manage.py flush_submissions`. Every web worker and the flusher need to
+# see the same directory.
+
+SUBMISSION_SPOOL_DIR = os.environ.get("SUBMISSION_SPOOL_DIR", BASE_DIR / "spool" / "submissions")
+
+
+# Static copy of the strike and sources pages, see dashboard/site.py and
+# `manage.py build_site`. When set, admin edits rebuild the affected pages
+# SITE_BUILD_DELAY seconds after they're saved, edits in between share one
+# rebuild.
+
+SITE_BUILD_DIR = os.environ.get("SITE_BUILD_DIR") or None
+SITE_BUILD_DELAY = float(os.environ.get("SITE_BUILD_DELAY", "2"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +224,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Filled by collectstatic at image build time, see Dockerfile. Outside /app
+# in the image so the development bind mount doesn't hide it.
+STATIC_ROOT = os.environ.get("STATIC_ROOT", BASE_DIR / "staticfiles")
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # Hashed and pre-compressed, WhiteNoise serves the hashed names with
+    # far-future immutable cache headers
+    "staticfiles": {"BACKEND": "config.storage.StaticFilesStorage"},
+}
+
+# Hashed copies are all templates ask for, leave the originals out
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+# In development, serve straight from the app static dirs, Tailwind rebuilds
+# included
+WHITENOISE_USE_FINDERS = DEBUG
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,17 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Content-hashed, gzip and brotli compressed copies written by
+    collectstatic, served by WhiteNoise with far-future cache headers.
+
+    Where collectstatic hasn't run (development, tests) there's no
+    manifest, and ``{% static %}`` falls back to the plain names the
+    app static dirs serve.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
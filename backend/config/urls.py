@@ -22,5 +22,8 @@ urlpatterns = [
     path('dashboard/', include('dashboard.urls')),
     path('sources/', include('sources.urls')),
     path('submit/', include('submit.urls')),
+    path('api/', include('api.urls')),
+    path('stats/', include('stats.urls')),
+    path('internal/', include('monitoring.urls')),
     path('', include('dashboard.urls'))
 ]
\ No newline at end of file
@@ -1,5 +1,83 @@
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
+from stats.models import StrikeRollup
+
+from .changelist import LargeTableAdmin
 from .models import Strike
+from .search import search_query, search_terms
+
+
+class RollupValueFilter(admin.SimpleListFilter):
+    """
+    Filter on a column the stats rollups group by.
+
+    The choices come from the month rollups, a few hundred rows, instead of
+    the SELECT DISTINCT over every strike a plain list_filter would run.
+    """
+    dimension = None
+
+    def lookups(self, request, model_admin):
+        values = (
+            StrikeRollup.objects
+            .filter(period=StrikeRollup.Period.MONTH, dimension=self.dimension)
+            .order_by('value').values_list('value', flat=True).distinct()
+        )
+        return [(value or '-', value or '(none)') for value in values]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None:
+            return queryset
+        if value == '-':
+            return queryset.filter(Q(**{f'{self.parameter_name}__isnull': True}) | Q(**{self.parameter_name: ''}))
+        return queryset.filter(**{self.parameter_name: value})
+
+
+class StrikerFilter(RollupValueFilter):
+    title = 'striker'
+    parameter_name = 'striker'
+    dimension = StrikeRollup.Dimension.STRIKER
+
+
+class TargetOriginFilter(RollupValueFilter):
+    title = 'target origin'
+    parameter_name = 'target_origin'
+    dimension = StrikeRollup.Dimension.TARGET_ORIGIN
+
+
+def link_count(column):
+    """Number of strike/source links per row, as a subquery so it only runs for the page shown."""
+    links = (
+        Strike.sources.through.objects
+        .filter(**{column: OuterRef('pk')})
+        .order_by().values(column).annotate(count=Count('*')).values('count')
+    )
+    return Coalesce(Subquery(links), 0)
+
+
+@admin.register(Strike)
+class StrikeAdmin(LargeTableAdmin):
+    list_display = ['date', 'location_label', 'striker', 'target', 'number_killed', 'source_count']
+    list_filter = [StrikerFilter, TargetOriginFilter]
+    date_hierarchy = 'date'
+    # Answered from the search_vector index, see get_search_results
+    search_fields = ['location_label']
+    search_help_text = "Words from the label, target, striker, origin, destination or summary, or an external id."
+    autocomplete_fields = ['sources']
+    readonly_fields = ['updated_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(source_count=link_count('strike_id'))
+
+    def get_search_results(self, request, queryset, search_term):
+        terms = search_terms(search_term)
+        if not terms:
+            return queryset, False
+        matches = Q(search_vector=search_query(terms, prefix=True)) | Q(external_id=search_term.strip())
+        return queryset.filter(matches), False
 
-admin.site.register(Strike)
+    @admin.display(description='sources', ordering='source_count')
+    def source_count(self, obj):
+        return obj.source_count
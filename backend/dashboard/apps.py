@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'dashboard'
\ No newline at end of file
+    name = 'dashboard'
+
+    def ready(self):
+        # Cache invalidation for Strike/Source writes
+        from . import signals  # noqa: F401
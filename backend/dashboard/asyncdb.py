@@ -0,0 +1,106 @@
+"""
+Database work for async views.
+
+Django's async ORM (``aget()``, ``afirst()``, ``async for``) wraps each query
+in ``sync_to_async(thread_sensitive=True)``, so all of a request's queries
+run on that request's one sync thread, one after another, even when they
+are awaited together with ``asyncio.gather()``. ``gather`` here hands each
+call to a small pool of database threads instead. Every thread keeps its
+own connection open between calls, or borrows one from the connection
+pool (see DB_POOL_MAX_SIZE), so independent queries overlap and none of
+them waits for a connect.
+
+That only works under ASGI. Under WSGI, and with the test ``Client``, an
+async view runs inside ``async_to_sync``. The request's connection lives on
+the calling thread, along with any transaction it has open. In that case
+the calls run on the calling thread in one hop, as the async ORM would run
+them.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+
+_executor = None
+_executor_threads = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_threads
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor_threads = settings.ASYNC_DB_THREADS
+                _executor = ThreadPoolExecutor(_executor_threads, thread_name_prefix='async-db')
+    return _executor
+
+
+def shutdown():
+    """
+    Close the database threads' connections and stop the threads.
+
+    For tests and benchmarks that drop the database afterwards. The pool
+    starts again on next use.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+        threads = _executor_threads
+    if executor is None:
+        return
+    # One task per thread: each waits until every thread holds one, so no
+    # thread runs two of them and every connection gets closed
+    barrier = threading.Barrier(threads)
+
+    def close():
+        barrier.wait()
+        connections.close_all()
+    for _ in range(threads):
+        executor.submit(close)
+    executor.shutdown(wait=True)
+
+
+def _pooled(call):
+    try:
+        return call()
+    finally:
+        # Without the connection pool, these threads keep their connection
+        # from call to call, whatever CONN_MAX_AGE says, unless the call left
+        # it broken or mid-transaction. With it, closing hands it back.
+        for conn in connections.all(initialized_only=True):
+            if conn.connection is not None and (
+                conn.pool is not None or conn.errors_occurred or not conn.get_autocommit()
+            ):
+                conn.close()
+
+
+def concurrent(request):
+    """Whether ``gather`` runs calls for ``request`` side by side."""
+    return isinstance(request, ASGIRequest) and settings.ASYNC_DB_THREADS > 0
+
+
+async def gather(request, *calls):
+    """
+    Run the zero-argument callables ``calls`` and return their results in
+    order. The calls run concurrently on the database threads when
+    ``request`` came in over ASGI.
+    """
+    if concurrent(request):
+        executor = _get_executor()
+        return list(await asyncio.gather(*(
+            sync_to_async(_pooled, thread_sensitive=False, executor=executor)(call)
+            for call in calls
+        )))
+    return await sync_to_async(lambda: [call() for call in calls])()
+
+
+async def run(request, func, *args, **kwargs):
+    """``func(*args, **kwargs)`` off the event loop, see ``gather``."""
+    result, = await gather(request, partial(func, *args, **kwargs))
+    return result
@@ -0,0 +1,230 @@
+"""Helpers shared by the bench_* management commands."""
+import statistics
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from random import Random
+
+from django.db import connection
+from django.db.models import Max, Min
+
+from sources.canonical import url_hash
+from sources.models import Source
+
+from .geohash import encode_location
+from .models import Strike, StrikeListEntry
+
+
+@contextmanager
+def throwaway_database():
+    """Point the default connection at a fresh test database for the block."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, repeat=5):
+    """
+    Time ``func`` and record its peak Python memory.
+
+    Memory is traced on a separate run so tracemalloc overhead doesn't leak
+    into the timings. Returns milliseconds and KiB.
+    """
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+# Words to build summaries and labels from, so search has real terms to hit
+WORDS = (
+    "vessel", "narcotics", "cocaine", "smuggling", "semi-submersible", "go-fast",
+    "boat", "crew", "killed", "survivors", "coast", "guard", "navy", "destroyer",
+    "drone", "strike", "international", "waters", "cartel", "shipment", "route",
+    "venezuela", "colombia", "ecuador", "mexico", "pacific", "caribbean", "eastern",
+    "southern", "command", "operation", "spear", "video", "footage", "released",
+    "secretary", "defense", "announced", "designated", "terrorist", "organization",
+)
+PLACES = ("Caribbean Sea", "Eastern Pacific", "Gulf of Venezuela", "Off Colombia", "Near Trinidad")
+ORIGINS = ("Venezuela", "Colombia", "Ecuador", "Mexico", None)
+OUTLETS = ("Reuters", "Associated Press", "Miami Herald", "El Tiempo", "SOUTHCOM", "Defense News", "BBC")
+
+
+def seed_strikes(count, seed=0, batch_size=2000):
+    """Bulk insert ``count`` strikes with full-size summaries, plus list entries."""
+    rng = Random(seed)
+    start = date(2025, 9, 1)
+    # Building 1500 characters per row dominates seeding, reuse a few
+    summaries = [" ".join(rng.choice(WORDS) for _ in range(180))[:1500] for _ in range(64)]
+    for offset in range(0, count, batch_size):
+        strikes = Strike.objects.bulk_create([
+            Strike(
+                date=start + timedelta(days=rng.randrange(365)),
+                location_label=f"{rng.choice(PLACES)} {rng.randrange(10_000)}",
+                location_lat=(lat := Decimal(f"{rng.uniform(5, 20):.14f}")),
+                location_lon=(lon := Decimal(f"{rng.uniform(-85, -60):.14f}")),
+                geohash=encode_location(lat, lon),
+                target="Vessel",
+                striker="US Southern Command",
+                target_origin=rng.choice(ORIGINS),
+                crew_number=rng.randint(2, 6),
+                number_killed=rng.randint(0, 6),
+                summary=rng.choice(summaries),
+                image_url="https://example.com/image.jpg",
+                video_url="https://example.com/video.mp4",
+            )
+            for _ in range(min(batch_size, count - offset))
+        ])
+        StrikeListEntry.sync(strikes)
+
+
+def seed_sources(count, links_per_strike=2, seed=0, batch_size=5000, start=0, strikes=None):
+    """
+    Bulk insert ``count`` sources and link every strike to a few of them.
+
+    ``start`` numbers the urls on from an earlier call, ``strikes`` limits
+    the linking to some strikes, so a database can be topped up.
+    """
+    rng = Random(seed)
+    for offset in range(start, start + count, batch_size):
+        sources = []
+        for i in range(offset, min(offset + batch_size, start + count)):
+            outlet = rng.choice(OUTLETS)
+            url = f"https://{outlet.lower().replace(' ', '')}.example.com/story/{i}"
+            sources.append(Source(name=f"{outlet} {i}", url=url, url_hash=url_hash(url)))
+        Source.objects.bulk_create(sources)
+
+    bounds = Source.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    first, last = bounds['first'], bounds['last']
+    if first is None:
+        return
+    Link = Strike.sources.through
+    strike_pks = list((strikes if strikes is not None else Strike.objects).values_list('pk', flat=True))
+    for offset in range(0, len(strike_pks), batch_size):
+        Link.objects.bulk_create([
+            Link(strike_id=strike_pk, source_id=rng.randint(first, last))
+            for strike_pk in strike_pks[offset:offset + batch_size]
+            for _ in range(links_per_strike)
+        ], ignore_conflicts=True)
+
+
+def seed_submissions(count, seed=0, batch_size=5000, start=0):
+    """
+    Bulk insert ``count`` submissions, with duplicates resolved.
+
+    About a third resubmit a stored source and a tenth repeat an earlier
+    submission, a fifth report a new strike, a third are approved.
+    """
+    # Imported here, submit depends on dashboard and not the other way round
+    from submit.duplicates import link_duplicates
+    from submit.models import Submission
+
+    rng = Random(seed)
+    strike_bounds = Strike.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    source_urls = list(Source.objects.order_by('pk').values_list('url', flat=True)[:50_000])
+    epoch = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    recent_urls = []
+    for offset in range(start, start + count, batch_size):
+        submissions = []
+        for i in range(offset, min(offset + batch_size, start + count)):
+            roll = rng.random()
+            if roll < 0.1 and recent_urls:
+                url = rng.choice(recent_urls)
+            elif roll < 0.4 and source_urls:
+                url = rng.choice(source_urls)
+            else:
+                url = f"https://tips.example.com/report/{i}"
+                recent_urls.append(url)
+            submitted_at = epoch + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+            new_strike = rng.random() < 0.2 or strike_bounds['first'] is None
+            approved = rng.random() < 0.3
+            submissions.append(Submission(
+                description=" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60))),
+                submitted_at=submitted_at,
+                token=uuid.UUID(int=rng.getrandbits(128)),
+                source_url=url,
+                url_hash=url_hash(url),
+                new_strike=new_strike,
+                new_strike_date=submitted_at.date() if new_strike else None,
+                existing_strike_id=(
+                    None if new_strike else rng.randint(strike_bounds['first'], strike_bounds['last'])
+                ),
+                approved=approved,
+                reviewed_at=submitted_at + timedelta(days=1) if approved else None,
+            ))
+        # Strikes deleted since seeding leave gaps, drop those links
+        strike_pks = set(Strike.objects.filter(
+            pk__in={s.existing_strike_id for s in submissions if s.existing_strike_id}
+        ).values_list('pk', flat=True))
+        for submission in submissions:
+            if submission.existing_strike_id not in strike_pks:
+                submission.existing_strike_id = None
+        Submission.objects.bulk_create(submissions)
+        link_duplicates({submission.url_hash for submission in submissions})
+        recent_urls = recent_urls[-1000:]
+
+
+def seed_scale(strikes, sources=None, submissions=None, links_per_strike=2, seed=0):
+    """
+    Top the database up to ``strikes`` strikes, ``sources`` sources and
+    ``submissions`` submissions, two sources and a fifth of a submission
+    per strike by default.
+
+    Only adds rows, so calling it again with larger counts grows the same
+    data set. The same counts and seed always give the same rows. Returns
+    the counts.
+    """
+    from submit.models import Submission
+
+    from stats.rollups import rebuild
+
+    from . import related
+
+    sources = strikes * 2 if sources is None else sources
+    submissions = strikes // 5 if submissions is None else submissions
+
+    existing = Strike.objects.count()
+    last_pk = Strike.objects.aggregate(last=Max('pk'))['last'] or 0
+    if strikes > existing:
+        seed_strikes(strikes - existing, seed=seed + existing)
+    existing_sources = Source.objects.count()
+    if sources > existing_sources or strikes > existing:
+        # New strikes get their links, old ones keep theirs
+        seed_sources(
+            max(sources - existing_sources, 0), links_per_strike, seed=seed + existing_sources,
+            start=existing_sources, strikes=Strike.objects.filter(pk__gt=last_pk),
+        )
+    existing_submissions = Submission.objects.count()
+    if submissions > existing_submissions:
+        seed_submissions(
+            submissions - existing_submissions, seed=seed + existing_submissions,
+            start=existing_submissions,
+        )
+
+    rebuild()
+    related.rebuild()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {
+        'strikes': Strike.objects.count(),
+        'sources': Source.objects.count(),
+        'submissions': Submission.objects.count(),
+    }
@@ -0,0 +1,224 @@
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from . import asyncdb
+from .models import Strike
+
+# Rendered pages, keyed by strike pk. Each page kind only depends on its own
+# strike (and, for sources, that strike's sources) plus the sidebar list.
+PAGE_KINDS = ('dashboard', 'sources')
+
+STRIKE_LIST = 'strike_list'
+STRIKE_GEO = 'strike_geo'
+STRIKE_LABELS = 'strike_labels'
+
+
+def _now_ms():
+    return time.time_ns() // 1_000_000
+
+
+def get_version(name):
+    """
+    Current generation of a shared dataset, e.g. the sidebar strike list.
+
+    Versions are millisecond timestamps that only move forward, so they can
+    double as a modification time. If the counter falls out of the cache it
+    is re-seeded from the clock, which is newer than any version handed out
+    before and therefore can't resurrect stale entries.
+    """
+    key = f'version:{name}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _now_ms(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Move ``name`` on to a new generation, orphaning everything keyed on the old one."""
+    version = max(get_version(name) + 1, _now_ms())
+    cache.set(f'version:{name}', version, None)
+    return version
+
+
+def page_key(kind, pk):
+    return f'page:{kind}:{pk}:{get_version(STRIKE_LIST)}'
+
+
+def validator_key(pk):
+    return f'validator:{pk}:{get_version(STRIKE_LIST)}'
+
+
+def evict_strike_pages(pks, kinds=PAGE_KINDS):
+    """Drop the cached pages, and their validators, of the given strikes."""
+    keys = [page_key(kind, pk) for pk in pks for kind in kinds]
+    keys += [validator_key(pk) for pk in pks]
+    cache.delete_many(keys)
+
+
+def _stored_last_modified(pk):
+    # Newest updated_at of the strike and its sources, cached until evicted
+    row = (
+        Strike.objects.filter(pk=pk)
+        .annotate(sources_updated_at=Max('sources__updated_at'))
+        .values_list('updated_at', 'sources_updated_at')
+        .first()
+    )
+    if row is None:
+        return None
+    stamp = max(filter(None, row))
+    cache.set(validator_key(pk), stamp, settings.PAGE_CACHE_TIMEOUT)
+    return stamp
+
+
+def _with_list_version(stamp):
+    list_changed_at = datetime.fromtimestamp(get_version(STRIKE_LIST) / 1000, tz=timezone.utc)
+    return max(stamp, list_changed_at)
+
+
+def strike_last_modified(pk):
+    """
+    When anything shown on a strike's pages last changed.
+
+    That is the newest of the strike itself, its sources and the sidebar
+    list version. The DB part is cached alongside the pages and evicted with
+    them, so revalidating an unchanged page costs no queries at all.
+    Returns None for unknown strikes.
+    """
+    stamp = cache.get(validator_key(pk))
+    if stamp is None:
+        stamp = _stored_last_modified(pk)
+        if stamp is None:
+            return None
+    return _with_list_version(stamp)
+
+
+async def astrike_last_modified(request, pk):
+    """strike_last_modified for async views, only a cache miss leaves the event loop."""
+    stamp = cache.get(validator_key(pk))
+    if stamp is None:
+        stamp = await asyncdb.run(request, _stored_last_modified, pk)
+        if stamp is None:
+            return None
+    return _with_list_version(stamp)
+
+
+def _count(outcome):
+    key = f'pagecache:{outcome}'
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Culled between add and incr, losing one count is fine
+        pass
+
+
+def page_cache_stats():
+    """Hit/miss counters for the page cache since they were last reset."""
+    return {
+        outcome: cache.get(f'pagecache:{outcome}', 0)
+        for outcome in ('hits', 'misses')
+    }
+
+
+def reset_page_cache_stats():
+    cache.delete_many(['pagecache:hits', 'pagecache:misses'])
+
+
+def conditional_strike_page(kind, pk_kwarg='pk'):
+    """
+    ETag/Last-Modified handling for a per-strike page view.
+
+    Unchanged pages answer 304 before the view, or the page cache, runs.
+    ``no-cache`` makes browsers and proxies revalidate instead of guessing
+    how long the page stays fresh. Works on sync and async views.
+    """
+    def last_modified(request, *args, **kwargs):
+        # Async views look it up before condition() asks, see below
+        if hasattr(request, '_strike_last_modified'):
+            return request._strike_last_modified
+        return strike_last_modified(kwargs[pk_kwarg])
+
+    def etag(request, *args, **kwargs):
+        stamp = last_modified(request, *args, **kwargs)
+        if stamp is None:
+            return None
+        return f'"{kind}-{kwargs[pk_kwarg]}-{int(stamp.timestamp() * 1_000_000)}"'
+
+    def decorator(view):
+        conditional = cache_control(no_cache=True)(
+            condition(etag_func=etag, last_modified_func=last_modified)(view)
+        )
+        if not iscoroutinefunction(view):
+            return conditional
+
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            # condition() calls etag/last_modified without awaiting, and a
+            # validator cache miss needs the database
+            request._strike_last_modified = await astrike_last_modified(request, kwargs[pk_kwarg])
+            return await conditional(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _cached_response(key):
+    content = cache.get(key)
+    if content is None:
+        _count('misses')
+        return None
+    _count('hits')
+    response = HttpResponse(content)
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def _store_response(key, response):
+    if response.status_code == 200 and not response.streaming:
+        cache.set(key, response.content, settings.PAGE_CACHE_TIMEOUT)
+    response['X-Page-Cache'] = 'miss'
+    return response
+
+
+def cached_strike_page(kind, pk_kwarg='pk'):
+    """
+    Cache the full response of a per-strike page view.
+
+    Only successful GET/HEAD responses are stored. Entries are evicted by
+    the Strike/Source signal handlers in ``dashboard.signals``, so the
+    timeout is just a backstop. Works on sync and async views, a hit
+    never leaves the event loop.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                key = page_key(kind, kwargs[pk_kwarg])
+                response = _cached_response(key)
+                if response is None:
+                    response = _store_response(key, await view(request, *args, **kwargs))
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = page_key(kind, kwargs[pk_kwarg])
+            response = _cached_response(key)
+            if response is None:
+                response = _store_response(key, view(request, *args, **kwargs))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,127 @@
+"""
+Admin changelists that stay fast on large tables.
+
+Two things in a stock changelist read every row. The Paginator runs
+``COUNT(*)`` on every page, and date_hierarchy asks for the distinct
+years, months or days with a ``SELECT DISTINCT date_trunc(...)`` over the
+whole (filtered) table, or ``date_trunc`` in the active timezone for
+datetime fields. LargeTableAdmin swaps the first for the planner's
+row estimate once a result is big enough that the exact number isn't
+worth a full scan, and the second for a skip scan that does one index
+probe per distinct date bucket.
+"""
+import json
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+# Below this many estimated rows the exact count is cheap, so use it
+EXACT_BELOW = 10_000
+
+
+def estimated_count(queryset):
+    """The planner's row estimate for ``queryset``, without running it."""
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator whose count is the planner's estimate for large results.
+
+    The estimate can be off either way, so the last page may come up short
+    or empty. Admins using it should also turn off show_full_result_count,
+    which is a second full count.
+    """
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'explain'):
+            return super().count
+        estimate = estimated_count(self.object_list)
+        if estimate < EXACT_BELOW:
+            return super().count
+        return estimate
+
+
+def _bucket(day, kind):
+    """First day of the year, month or day ``day`` is in, and of the next one."""
+    if kind == 'year':
+        return date(day.year, 1, 1), date(day.year + 1, 1, 1)
+    if kind == 'month':
+        start = date(day.year, day.month, 1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    return day, day + timedelta(days=1)
+
+
+class SkipScanDatesMixin:
+    """
+    QuerySet mixin answering ``dates()`` and ``datetimes()`` with one
+    ``MIN()`` per bucket.
+
+    Each MIN is an index probe when the field is indexed, so the cost is
+    the number of distinct years/months/days rather than the number of
+    rows. Returns a list, which is all date_hierarchy needs.
+    """
+
+    def _skip_scan(self, field_name, order, bucket):
+        base = self.order_by()
+        buckets = []
+        first = base.aggregate(first=Min(field_name))['first']
+        while first is not None:
+            start, end = bucket(first)
+            buckets.append(start)
+            first = base.filter(**{f'{field_name}__gte': end}).aggregate(first=Min(field_name))['first']
+        return buckets[::-1] if order == 'DESC' else buckets
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+        return self._skip_scan(field_name, order, lambda day: _bucket(day, kind))
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        # Buckets are local days, like the date_trunc the stock query does
+        if settings.USE_TZ and tzinfo is None:
+            tzinfo = timezone.get_current_timezone()
+
+        def midnight(day):
+            moment = datetime.combine(day, time())
+            return timezone.make_aware(moment, tzinfo) if settings.USE_TZ else moment
+
+        def bucket(moment):
+            day = timezone.localtime(moment, tzinfo).date() if settings.USE_TZ else moment.date()
+            start, end = _bucket(day, kind)
+            return midnight(start), midnight(end)
+
+        return self._skip_scan(field_name, order, bucket)
+
+
+_skip_scan_classes = {}
+
+
+class LargeTableChangeList(ChangeList):
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        cls = queryset.__class__
+        if cls not in _skip_scan_classes:
+            _skip_scan_classes[cls] = type(f'SkipScan{cls.__name__}', (SkipScanDatesMixin, cls), {})
+        queryset.__class__ = _skip_scan_classes[cls]
+        return queryset
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """ModelAdmin base for tables too big to count or scan per page view."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
@@ -0,0 +1,205 @@
+"""
+Pre-clustered strike points for the overview map.
+
+Every zoom level has a grid of cells sized to roughly CLUSTER_RADIUS_PX on
+screen. Each cell keeps a running count and coordinate sum of the strikes in
+it, so adding, moving or removing one strike touches one cell per zoom level
+and answering a bbox query only walks the cells inside the box.
+"""
+import math
+import threading
+
+from .caching import STRIKE_GEO, bump_version, get_version
+from .models import Strike
+
+TILE_SIZE = 256
+CLUSTER_RADIUS_PX = 60
+MAX_ZOOM = 18
+
+
+def cell_size(zoom):
+    """Width of a grid cell in degrees at ``zoom``."""
+    return 360 / 2 ** zoom * CLUSTER_RADIUS_PX / TILE_SIZE
+
+
+def _cell(lat, lon, size):
+    return math.floor((lon + 180) / size), math.floor((lat + 90) / size)
+
+
+class ClusterIndex:
+    """Grid of strike counts per zoom level, updated in place."""
+
+    def __init__(self, max_zoom=MAX_ZOOM):
+        self.max_zoom = max_zoom
+        self.sizes = [cell_size(zoom) for zoom in range(max_zoom + 1)]
+        self.clear()
+
+    def clear(self):
+        self.points = {}
+        # zoom -> {cell: [count, lat_sum, lon_sum]}
+        self.levels = [{} for _ in self.sizes]
+        # Cells at max zoom also remember their pks, to link single points
+        self.leaf_pks = {}
+        self.version = None
+
+    def __len__(self):
+        return len(self.points)
+
+    def _apply(self, pk, lat, lon, sign):
+        for zoom, size in enumerate(self.sizes):
+            cell = _cell(lat, lon, size)
+            level = self.levels[zoom]
+            entry = level.setdefault(cell, [0, 0.0, 0.0])
+            entry[0] += sign
+            entry[1] += sign * lat
+            entry[2] += sign * lon
+            if entry[0] == 0:
+                del level[cell]
+        leaf = _cell(lat, lon, self.sizes[-1])
+        if sign > 0:
+            self.leaf_pks.setdefault(leaf, set()).add(pk)
+        else:
+            self.leaf_pks[leaf].discard(pk)
+            if not self.leaf_pks[leaf]:
+                del self.leaf_pks[leaf]
+
+    def discard(self, pk):
+        point = self.points.pop(pk, None)
+        if point is not None:
+            self._apply(pk, *point, -1)
+
+    def update(self, pk, lat, lon):
+        """Place strike ``pk`` at lat/lon, or drop it when either is None."""
+        self.discard(pk)
+        if lat is None or lon is None:
+            return
+        point = (float(lat), float(lon))
+        self.points[pk] = point
+        self._apply(pk, *point, 1)
+
+    def _cells_in(self, zoom, west, south, east, north):
+        level = self.levels[zoom]
+        size = self.sizes[zoom]
+        x0, y0 = _cell(south, west, size)
+        x1, y1 = _cell(north, east, size)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(level):
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    if (x, y) in level:
+                        yield (x, y), level[(x, y)]
+        else:
+            for cell, entry in level.items():
+                if x0 <= cell[0] <= x1 and y0 <= cell[1] <= y1:
+                    yield cell, entry
+
+    def query(self, west, south, east, north, zoom):
+        """
+        Clusters intersecting the bbox at ``zoom``.
+
+        A bbox with west > east crosses the antimeridian and is split in two.
+        Single strikes come back with their pk so the map can link to them.
+        """
+        zoom = max(0, min(int(zoom), self.max_zoom))
+        south, north = max(south, -90.0), min(north, 90.0)
+        if west > east:
+            boxes = [(west, south, 180.0, north), (-180.0, south, east, north)]
+        else:
+            boxes = [(max(west, -180.0), south, min(east, 180.0), north)]
+
+        clusters = []
+        for box in boxes:
+            for cell, (count, lat_sum, lon_sum) in self._cells_in(zoom, *box):
+                cluster = {
+                    'lat': round(lat_sum / count, 6),
+                    'lon': round(lon_sum / count, 6),
+                    'count': count,
+                }
+                if count == 1:
+                    # The sums are the point itself, find its max zoom cell
+                    leaf = self.leaf_pks.get(_cell(lat_sum, lon_sum, self.sizes[-1]), ())
+                    cluster['pk'] = next(iter(leaf), None)
+                clusters.append(cluster)
+        return clusters
+
+
+_index = ClusterIndex()
+# Guards the cells, writers patch them in place
+_lock = threading.Lock()
+# One reload at a time
+_reload_lock = threading.Lock()
+
+
+def _rebuild(index):
+    index.clear()
+    rows = (
+        Strike.objects
+        .filter(location_lat__isnull=False, location_lon__isnull=False)
+        .values_list('pk', 'location_lat', 'location_lon')
+        .iterator(chunk_size=5000)
+    )
+    for pk, lat, lon in rows:
+        index.update(pk, lat, lon)
+
+
+def get_index():
+    """
+    The process-wide cluster index, rebuilt when another process moved on.
+
+    Writes in this process update the index in place (see
+    ``dashboard.signals``). The shared geo version only tells other workers
+    that they missed a change and should reload from the database.
+
+    A reload reads (pk, lat, lon) of every located strike and places each
+    one on every zoom level, about 6 s per 100k strikes. It happens once per
+    worker for each change another process made (with REDIS_URL and several
+    workers) and after bulk writes, which bump the version without saying
+    which strikes moved, so there's nothing to apply incrementally. The new
+    index is built off to the side and swapped in, other threads keep
+    answering from the old one meanwhile. Only a worker's first query
+    waits.
+    """
+    global _index
+    version = get_version(STRIKE_GEO)
+    if _index.version == version:
+        return _index
+    if not _reload_lock.acquire(blocking=_index.version is None):
+        return _index
+    try:
+        if _index.version != version:
+            index = ClusterIndex()
+            _rebuild(index)
+            # Changes made meanwhile bumped the version past this one, the
+            # next query reloads again
+            index.version = version
+            with _lock:
+                _index = index
+    finally:
+        _reload_lock.release()
+    return _index
+
+
+def query(west, south, east, north, zoom):
+    """Clusters intersecting the bbox at ``zoom``, see ClusterIndex.query."""
+    index = get_index()
+    # Writers change the cells in place, don't walk them halfway
+    with _lock:
+        return index.query(west, south, east, north, zoom)
+
+
+def strike_moved(pk, lat, lon, patch=True):
+    """
+    Record that strike ``pk`` now sits at lat/lon (None for removed).
+
+    Bumps the shared geo version. The local index is patched in place when
+    it was current, otherwise it is left for the next query to rebuild.
+    Without ``patch`` a current index only takes the new version, for the
+    bump a writer makes before its transaction commits (see
+    ``dashboard.signals``).
+    """
+    with _lock:
+        in_step = _index.version is not None and _index.version == get_version(STRIKE_GEO)
+        new_version = bump_version(STRIKE_GEO)
+        if in_step:
+            if patch:
+                _index.update(pk, lat, lon)
+            _index.version = new_version
@@ -0,0 +1,52 @@
+"""
+Loading one strike for its pages, neighbours and sources included.
+
+``load_strike`` reads the strike and the strikes just before and after it
+in (date, pk) order in one query: each neighbour is a subquery that seeks
+into the sidebar's (date, pk) index, as a JSON object of the columns the
+page links with. The sources, when asked for, are one prefetch query.
+"""
+from datetime import date
+
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import JSONObject
+
+from .models import Strike, StrikeListEntry
+
+
+def _neighbour(older):
+    day, pk = OuterRef('date'), OuterRef('pk')
+    # date <= day on its own, so the index scan starts at the strike
+    # rather than filtering its way there from the newest end
+    if older:
+        rows = StrikeListEntry.objects.filter(Q(date__lt=day) | Q(date=day, pk__lt=pk), date__lte=day)
+        rows = rows.order_by('-date', '-pk')
+    else:
+        rows = StrikeListEntry.objects.filter(Q(date__gt=day) | Q(date=day, pk__gt=pk), date__gte=day)
+        rows = rows.order_by('date', 'pk')
+    return Subquery(
+        rows.values(row=JSONObject(pk='pk', date='date', location_label='location_label'))[:1]
+    )
+
+
+def _row(value):
+    if value is None:
+        return None
+    return {**value, 'date': date.fromisoformat(value['date'])}
+
+
+def load_strike(pk, sources=False):
+    """
+    Strike ``pk``, Strike.DoesNotExist if there's none.
+
+    ``strike.previous`` and ``strike.next`` are the strikes just before and
+    after it by (date, pk), as dicts of pk, date and location_label, None at
+    either end. With ``sources``, ``strike.sources.all()`` is prefetched.
+    """
+    strikes = Strike.objects.annotate(previous_row=_neighbour(older=True), next_row=_neighbour(older=False))
+    if sources:
+        strikes = strikes.prefetch_related('sources')
+    strike = strikes.get(pk=pk)
+    strike.previous = _row(strike.previous_row)
+    strike.next = _row(strike.next_row)
+    return strike
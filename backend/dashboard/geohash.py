@@ -0,0 +1,88 @@
+"""
+Geohashes of strike locations, see Strike.geohash and dashboard.nearby.
+
+A geohash names a cell of a grid that halves longitude and latitude in
+turn, five bits per base 32 character. Points in one cell share its hash
+as a prefix, so the strikes in a cell are one range of the geohash index.
+"""
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Cells about 5 m across, finer than any reported location
+PRECISION = 9
+
+
+def encode(lat, lon, precision=PRECISION):
+    """Geohash of the cell at ``precision`` characters that holds lat/lon."""
+    south, north, west, east = -90.0, 90.0, -180.0, 180.0
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            middle = (west + east) / 2
+            bit = lon >= middle
+            west, east = (middle, east) if bit else (west, middle)
+        else:
+            middle = (south + north) / 2
+            bit = lat >= middle
+            south, north = (middle, north) if bit else (south, middle)
+        value = value << 1 | bit
+        bits += 1
+        even = not even
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def encode_location(lat, lon):
+    """Strike.geohash for a location, None when it's missing."""
+    if lat is None or lon is None:
+        return None
+    return encode(float(lat), float(lon))
+
+
+def cell_size(precision):
+    """``(height, width)`` of a cell in degrees."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** (bits - bits // 2)
+
+
+def bounds(geohash):
+    """``(south, north, west, east)`` of a cell."""
+    height, width = cell_size(len(geohash))
+    south, west = -90.0, -180.0
+    # Same walk as encode, adding up the halves the bits chose
+    lat_size, lon_size = 180.0, 360.0
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bit = value >> shift & 1
+            if even:
+                lon_size /= 2
+                west += bit * lon_size
+            else:
+                lat_size /= 2
+                south += bit * lat_size
+            even = not even
+    return south, south + height, west, west + width
+
+
+def neighbours(geohash):
+    """The up to eight cells around ``geohash``, none past the poles."""
+    south, north, west, east = bounds(geohash)
+    height, width = north - south, east - west
+    lat, lon = (south + north) / 2, (west + east) / 2
+    cells = []
+    for dlat in (-1, 0, 1):
+        for dlon in (-1, 0, 1):
+            if not dlat and not dlon:
+                continue
+            cell_lat = lat + dlat * height
+            if not -90 < cell_lat < 90:
+                continue
+            # Wraps round the antimeridian
+            cell_lon = (lon + dlon * width + 180) % 360 - 180
+            cells.append(encode(cell_lat, cell_lon, len(geohash)))
+    # The world is fewer than nine cells wide at precision 1
+    return sorted(set(cells) - {geohash})
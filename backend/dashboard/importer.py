@@ -0,0 +1,285 @@
+"""
+Bulk import of strikes and their sources, used by ``import_strikes``.
+
+Rows are read one at a time from CSV, JSON or NDJSON and written in
+batches: one upsert for the batch's strikes keyed on ``external_id``, one
+for its sources keyed on the canonical url hash and one insert for the links between
+them. Nothing outlives a batch, so memory stays flat however large the
+input is, and re-running an import only rewrites the same rows.
+
+Bulk writes skip save() and post_save, so each batch sends
+``strikes_bulk_saved`` for the caches, list entries and rollups instead.
+"""
+import csv
+import json
+from urllib.parse import urlsplit
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from sources.canonical import url_hash
+from sources.models import Source
+
+from .geohash import encode_location
+from .models import Strike
+from .signals import strikes_bulk_saved
+
+# Strike columns an import can set, ``external_id`` is required
+STRIKE_COLUMNS = (
+    'external_id', 'date', 'location_label', 'location_lat', 'location_lon',
+    'location_uncertainty_m', 'target', 'striker', 'target_origin',
+    'target_destination', 'crew_number', 'number_killed', 'image_url',
+    'image_label', 'video_url', 'dvids_video_id', 'summary',
+)
+FORMATS = ('csv', 'json', 'ndjson')
+
+# Read size when streaming a JSON array
+JSON_CHUNK = 64 * 1024
+
+
+class RowError(ValueError):
+    pass
+
+
+def _iter_json_array(fp):
+    """Yield the items of a top-level JSON array without loading it all."""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = '', 0, False
+    while True:
+        # Skip separators, refilling the buffer whenever it runs dry
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer):
+                break
+            chunk = fp.read(JSON_CHUNK)
+            if not chunk:
+                raise RowError("Unexpected end of JSON input")
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        if not started:
+            if buffer[pos] != '[':
+                raise RowError("JSON input must be an array of objects")
+            started, pos = True, pos + 1
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Most likely the item runs past the end of the buffer
+            chunk = fp.read(JSON_CHUNK)
+            if not chunk:
+                raise RowError("Invalid JSON input")
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+
+
+def read_rows(fp, fmt):
+    """Yield raw row dicts from a text file in ``fmt``."""
+    if fmt == 'csv':
+        yield from csv.DictReader(fp)
+    elif fmt == 'ndjson':
+        for line in fp:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == 'json':
+        yield from _iter_json_array(fp)
+    else:
+        raise ValueError(f"Unknown format {fmt!r}")
+
+
+def _sources(raw):
+    """
+    Source dicts from a row's ``sources``.
+
+    JSON rows may give a list of URLs or of ``{url, name, type}`` objects,
+    CSV rows a whitespace separated string of URLs.
+    """
+    if raw in (None, ''):
+        return []
+    if isinstance(raw, str):
+        raw = raw.split()
+    if not isinstance(raw, list):
+        raise RowError("sources must be a list")
+    sources = []
+    for item in raw:
+        if isinstance(item, str):
+            item = {'url': item}
+        if not isinstance(item, dict) or not item.get('url'):
+            raise RowError("every source needs a url")
+        sources.append(item)
+    return sources
+
+
+def _error_text(error):
+    if hasattr(error, 'message_dict'):
+        return '; '.join(f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items())
+    return ' '.join(error.messages)
+
+
+def clean_row(row):
+    """
+    Validate one raw row.
+
+    Returns ``(strike, sources)``: an unsaved Strike and a list of unsaved
+    Sources, with only the sources that came with a name flagged as
+    ``named`` so a bare URL doesn't overwrite a stored name. Raises
+    RowError with a readable message.
+    """
+    if not isinstance(row, dict):
+        raise RowError("row must be an object")
+    unknown = set(row) - set(STRIKE_COLUMNS) - {'sources'}
+    if unknown:
+        raise RowError(f"unknown columns: {', '.join(sorted(unknown))}")
+    if not row.get('external_id'):
+        raise RowError("external_id is required")
+
+    fields = {}
+    for column in STRIKE_COLUMNS:
+        value = row.get(column)
+        # CSV can't tell empty from missing
+        fields[column] = None if value == '' else value
+    fields['external_id'] = str(fields['external_id'])
+    strike = Strike(**fields)
+
+    sources = []
+    for item in _sources(row.get('sources')):
+        name = item.get('name')
+        source = Source(
+            url=item['url'],
+            name=name or urlsplit(item['url']).netloc or item['url'],
+            type=item.get('type') or Source.Type.PRIMARY,
+            url_hash=url_hash(item['url']),
+        )
+        source.named = bool(name)
+        sources.append(source)
+
+    # Missing nullable columns are fine even where the admin form wants
+    # them filled in (summary, for one)
+    missing = [
+        field.name for field in Strike._meta.concrete_fields
+        if field.null and getattr(strike, field.attname) is None
+    ]
+    try:
+        strike.full_clean(exclude=missing, validate_unique=False, validate_constraints=False)
+        for source in sources:
+            source.full_clean(exclude=['last_reviewed'], validate_unique=False, validate_constraints=False)
+    except ValidationError as error:
+        raise RowError(_error_text(error))
+    strike.geohash = encode_location(strike.location_lat, strike.location_lon)
+    return strike, sources
+
+
+def unhashed_sources():
+    """
+    Whether any Source is still without its url_hash. The importer only
+    matches sources on the hash, so it would add a second copy of those.
+    """
+    return Source.objects.filter(url_hash=None).exists()
+
+
+def upsert_sources(sources):
+    """
+    Upsert sources by canonical url, returns ``{url_hash: pk}``.
+
+    Takes unsaved Sources with ``url_hash`` set and a ``named`` flag, as
+    clean_row makes them. Variants of a stored url map to the stored
+    source and keep its url. Sources stored before url_hash existed need
+    ``canonicalize_urls`` first, see ``unhashed_sources``.
+    Sources already stored as given are left alone, so re-running an
+    import doesn't touch their updated_at.
+    """
+    by_hash = {}
+    for source in sources:
+        # A named mention of a url wins over a bare one
+        if source.url_hash not in by_hash or source.named:
+            by_hash[source.url_hash] = source
+    stored = {
+        digest: (pk, name, type_)
+        for digest, pk, name, type_ in Source.objects.filter(url_hash__in=by_hash)
+        .values_list('url_hash', 'pk', 'name', 'type')
+    }
+    # Bare urls only make it in here when the source is new
+    changed = [
+        s for s in by_hash.values()
+        if s.url_hash not in stored or (s.named and stored[s.url_hash][1:] != (s.name, s.type))
+    ]
+    if changed:
+        Source.objects.bulk_create(
+            changed, update_conflicts=True, unique_fields=['url_hash'],
+            update_fields=['name', 'type', 'updated_at'],
+        )
+    return {digest: pk for digest, (pk, _, _) in stored.items()} | {s.url_hash: s.pk for s in changed}
+
+
+def _unchanged(strike, row):
+    return all(getattr(strike, column) == row[column] for column in STRIKE_COLUMNS)
+
+
+def import_batch(rows):
+    """
+    Write one batch of ``clean_row`` results in a single transaction.
+
+    Later rows win when the batch repeats an external_id. Strikes and
+    sources already stored as given are skipped, and source links are only
+    ever added, an import never unlinks a source. Returns the number of
+    strikes created or changed.
+    """
+    by_id = {}
+    for strike, sources in rows:
+        by_id[strike.external_id] = (strike, sources)
+    if not by_id:
+        return 0
+
+    update_fields = [c for c in STRIKE_COLUMNS if c != 'external_id'] + ['geohash', 'updated_at']
+    Link = Strike.sources.through
+    with transaction.atomic():
+        previous = {
+            row['external_id']: row
+            for row in Strike.objects.filter(external_id__in=by_id).values()
+        }
+        changed = []
+        for external_id, (strike, _) in by_id.items():
+            row = previous.get(external_id)
+            if row is not None and _unchanged(strike, row):
+                strike.pk = row['id']
+            else:
+                changed.append(strike)
+        if changed:
+            Strike.objects.bulk_create(
+                changed, update_conflicts=True, unique_fields=['external_id'],
+                update_fields=update_fields,
+            )
+
+        source_pks = upsert_sources([s for _, sources in by_id.values() for s in sources])
+        linked = set(
+            Link.objects
+            .filter(strike_id__in=[strike.pk for strike, _ in by_id.values()])
+            .values_list('strike_id', 'source_id')
+        )
+        links = {
+            (strike.pk, source_pks[source.url_hash])
+            for strike, sources in by_id.values()
+            for source in sources
+        } - linked
+        Link.objects.bulk_create(
+            [Link(strike_id=strike_pk, source_id=source_pk) for strike_pk, source_pk in links],
+            ignore_conflicts=True,
+        )
+
+        # Strikes that only gained sources changed too, as far as pages go
+        relinked = {strike_pk for strike_pk, _ in links} - {strike.pk for strike in changed}
+        if relinked:
+            Strike.objects.filter(pk__in=relinked).update(updated_at=timezone.now())
+        saved = changed + [strike for strike, _ in by_id.values() if strike.pk in relinked]
+        if saved:
+            strikes_bulk_saved.send(
+                sender=Strike,
+                strikes=saved,
+                previous={row['id']: row for row in previous.values()},
+            )
+    return len(changed)
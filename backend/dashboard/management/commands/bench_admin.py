@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from dashboard.bench import measure, seed_sources, seed_strikes, throwaway_database
+from dashboard.models import Strike
+from sources.models import Source
+from stats.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Time admin changelists, change forms and autocomplete against "
+        "seeded strikes and sources. Runs in a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strikes', type=int, default=100_000)
+        parser.add_argument('--sources', type=int, default=500_000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+            seed_strikes(options['strikes'])
+            seed_sources(options['sources'])
+            rebuild()
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            client = Client()
+            client.force_login(get_user_model().objects.create_superuser('bench', password='bench'))
+            strike = Strike.objects.order_by('pk').first()
+            source = Source.objects.order_by('pk').first()
+            pages = [
+                '/admin/dashboard/strike/',
+                '/admin/dashboard/strike/?p=50',
+                '/admin/dashboard/strike/?q=cocaine+boat',
+                '/admin/dashboard/strike/?striker=US+Southern+Command',
+                '/admin/dashboard/strike/?date__year=2026',
+                f'/admin/dashboard/strike/{strike.pk}/change/',
+                '/admin/sources/source/',
+                '/admin/sources/source/?q=Reuters+1234',
+                f'/admin/sources/source/?q={source.url}',
+                f'/admin/sources/source/{source.pk}/change/',
+                '/admin/autocomplete/?app_label=dashboard&model_name=strike&field_name=sources&term=miami+herald+99',
+                '/admin/submit/submission/',
+            ]
+
+            self.stdout.write(f"{options['strikes']} strikes, {options['sources']} sources")
+            for url in pages:
+                queries = []
+                # connection.queries is reset per request, count them ourselves
+                with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                    status = client.get(url).status_code
+                result = measure(lambda: client.get(url), options['repeat'])
+                self.stdout.write(
+                    f"  {url[:70]:<70} {status}  {len(queries):>3} queries  "
+                    f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms"
+                )
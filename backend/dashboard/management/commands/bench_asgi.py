@@ -0,0 +1,175 @@
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from random import Random
+
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from dashboard.bench import seed_sources, seed_strikes, throwaway_database
+from dashboard.models import Strike
+
+# What each stack runs. The two ASGI ones differ only in where async views
+# run their queries, see dashboard/asyncdb.py.
+STACKS = {
+    'wsgi': lambda port, opts: [
+        sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(opts['workers']),
+        '--worker-class', 'gthread', '--threads', str(opts['threads']),
+        '--backlog', '2048', '--log-level', 'warning',
+    ],
+    'asgi-orm': lambda port, opts: [
+        sys.executable, '-m', 'uvicorn', 'config.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(opts['workers']),
+        '--backlog', '2048', '--no-access-log', '--log-level', 'warning',
+    ],
+    'asgi': lambda port, opts: STACKS['asgi-orm'](port, opts),
+}
+STACK_ENV = {
+    'wsgi': {},
+    # Queries on the request's thread one after another, as Django's async ORM runs them
+    'asgi-orm': {'ASYNC_DB_THREADS': '0'},
+    'asgi': {},
+}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _paths(strike_pks, count, seed=0):
+    """A mix of the read pages and HTMX endpoints, over random strikes."""
+    rng = Random(seed)
+    paths = []
+    for _ in range(count):
+        pk = rng.choice(strike_pks)
+        paths.append(rng.choice((
+            f'/dashboard/{pk}/',
+            f'/sources/{pk}/',
+            f'/sources/{pk}/',
+            '/submit/',
+            f'/submit/strike-search/?q=carib+{rng.randrange(10)}',
+            '/dashboard/search/?section=sources&q=cocaine+boat',
+        )))
+    return paths
+
+
+async def _load(port, paths, concurrency):
+    """Request every path with ``concurrency`` in flight. Returns timings, errors, seconds."""
+    queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+    timings, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return sorted(timings), errors, elapsed
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the read pages under gunicorn (WSGI) and uvicorn (ASGI) at "
+        "high concurrency, in a throwaway database on the configured Postgres."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strikes', type=int, default=20_000)
+        parser.add_argument('--sources', type=int, default=40_000)
+        parser.add_argument('--requests', type=int, default=3000)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[64, 256])
+        parser.add_argument('--workers', type=int, default=2, help="Server processes per stack.")
+        parser.add_argument('--threads', type=int, default=8, help="gthread threads per WSGI worker.")
+        parser.add_argument('--stacks', nargs='+', choices=list(STACKS), default=list(STACKS))
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help="Leave the page cache on. Off by default so every request reaches the database.",
+        )
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            seed_strikes(options['strikes'])
+            seed_sources(options['sources'])
+            strike_pks = list(Strike.objects.values_list('pk', flat=True))
+            database = connection.settings_dict['NAME']
+            # The servers need the database to themselves to drop it afterwards
+            connection.close()
+
+            self.stdout.write(
+                f"{options['strikes']} strikes, {options['sources']} sources, "
+                f"{options['workers']} workers per stack, {os.cpu_count()} CPUs"
+            )
+            for stack in options['stacks']:
+                for concurrency in options['concurrency']:
+                    self.bench(stack, database, strike_pks, concurrency, options)
+
+    def bench(self, stack, database, strike_pks, concurrency, options):
+        port = _free_port()
+        env = {
+            **os.environ,
+            'DB_NAME': database,
+            'SECRET_KEY': settings.SECRET_KEY,
+            'ALLOWED_HOSTS': '127.0.0.1',
+            'DEBUG': '0',
+            **STACK_ENV[stack],
+        }
+        if not options['page_cache']:
+            env['PAGE_CACHE_TIMEOUT'] = '0'
+        server = subprocess.Popen(
+            STACKS[stack](port, options), env=env, cwd=settings.BASE_DIR,
+            start_new_session=True,
+        )
+        try:
+            self.wait_for(port, server)
+            # Warm up every worker: templates, the typeahead index, connections
+            asyncio.run(_load(port, _paths(strike_pks, 200, seed=1), 16))
+            timings, errors, elapsed = asyncio.run(
+                _load(port, _paths(strike_pks, options['requests']), concurrency)
+            )
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait(timeout=30)
+
+        self.stdout.write(
+            f"  {stack:<9} c={concurrency:<4} {len(timings) / elapsed:8,.0f} req/s  "
+            f"p50 {statistics.median(timings):7.1f} ms  "
+            f"p95 {timings[int(len(timings) * 0.95)]:7.1f} ms  "
+            f"p99 {timings[int(len(timings) * 0.99)]:7.1f} ms  "
+            f"errors {errors}"
+        )
+
+    def wait_for(self, port, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with {server.returncode}")
+            try:
+                httpx.get(f'http://127.0.0.1:{port}/submit/thanks/', timeout=1)
+                return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise RuntimeError("Server didn't start")
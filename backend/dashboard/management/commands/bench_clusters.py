@@ -0,0 +1,55 @@
+import json
+import statistics
+import time
+from random import Random
+
+from django.core.management.base import BaseCommand
+
+from dashboard.clusters import ClusterIndex, TILE_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a cluster index over synthetic strikes and time bbox queries "
+        "for a 1280x800 viewport at several zoom levels. No database needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--zooms', type=int, nargs='+', default=[2, 5, 8, 11, 14])
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = Random(options['seed'])
+        index = ClusterIndex()
+
+        # Strikes concentrate in the Caribbean and Eastern Pacific
+        start = time.perf_counter()
+        for pk in range(options['points']):
+            index.update(pk, rng.uniform(0, 25), rng.uniform(-110, -60))
+        build_s = time.perf_counter() - start
+        self.stdout.write(f"built {len(index)} points in {build_s:.2f} s")
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            index.update(rng.randrange(options['points']), rng.uniform(0, 25), rng.uniform(-110, -60))
+        self.stdout.write(f"moving one strike: {(time.perf_counter() - start):.3f} ms avg")
+
+        for zoom in options['zooms']:
+            width = 1280 / TILE_SIZE * 360 / 2 ** zoom
+            height = 800 / TILE_SIZE * 180 / 2 ** zoom
+            timings, sizes = [], []
+            for _ in range(options['queries']):
+                west = rng.uniform(-110, -60) - width / 2
+                south = rng.uniform(0, 25) - height / 2
+                started = time.perf_counter()
+                clusters = index.query(west, south, west + width, south + height, zoom)
+                timings.append((time.perf_counter() - started) * 1000)
+                sizes.append(len(json.dumps({'zoom': zoom, 'clusters': clusters})))
+            timings.sort()
+            self.stdout.write(
+                f"zoom {zoom:>2}: p50 {statistics.median(timings):.3f} ms  "
+                f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms  "
+                f"response {statistics.mean(sizes) / 1024:.1f} KiB avg, {max(sizes) / 1024:.1f} KiB max"
+            )
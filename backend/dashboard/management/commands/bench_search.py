@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from dashboard.bench import measure, seed_strikes, throwaway_database
+from dashboard.models import Strike
+from dashboard.search import MAX_CANDIDATES, search_query, search_strikes, search_terms
+
+QUERIES = ('cocaine', 'carib', 'cocaine boat', 'semi submersible venezuela', 'trinidad 4242', 'drone strike footage')
+
+
+class Command(BaseCommand):
+    help = (
+        "Time sidebar search queries against a seeded strike table and check "
+        "they use the search index. Runs in a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--query', nargs='+', default=QUERIES)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            seed_strikes(options['rows'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE dashboard_strike')
+
+            self.stdout.write(f"{options['rows']} rows")
+            for query in options['query']:
+                for page in (1, 5):
+                    result = measure(lambda: search_strikes(query, page), options['repeat'])
+                    self.stdout.write(
+                        f"  {query!r:<30} page {page}  p50 {result['p50_ms']:>8} ms  "
+                        f"p95 {result['p95_ms']:>8} ms"
+                    )
+                self.stdout.write(f"  {'':<30} plan: {self.plan(query)}")
+
+    def plan(self, query):
+        """Which index the whole word candidate query is answered from."""
+        plan = (
+            Strike.objects.filter(search_vector=search_query(search_terms(query)))
+            .order_by('-date', '-pk').values('pk')[:MAX_CANDIDATES].explain()
+        )
+        for index in ('strike_search_idx', 'strike_label_trgm_idx', 'strike_date_id_idx'):
+            if index in plan:
+                return index
+        return 'sequential scan'
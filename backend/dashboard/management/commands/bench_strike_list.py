@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.bench import measure, seed_strikes, throwaway_database
+from dashboard.models import Strike, StrikeListEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare loading the full strike list from Strike and from the "
+        "StrikeListEntry read model. Runs in a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            seeded = 0
+            for rows in sorted(options['rows']):
+                seed_strikes(rows - seeded, seed=seeded)
+                seeded = rows
+
+                for name, queryset in (
+                    ('Strike.objects.all()', Strike.objects.all()),
+                    ('StrikeListEntry.objects.all()', StrikeListEntry.objects.all()),
+                ):
+                    result = measure(lambda: list(queryset.all()), options['repeat'])
+                    self.stdout.write(
+                        f"{rows:>8} rows  {name:<32} p50 {result['p50_ms']:>9} ms  "
+                        f"p95 {result['p95_ms']:>9} ms  peak {result['peak_kib']:>10} KiB"
+                    )
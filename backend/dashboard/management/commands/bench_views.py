@@ -0,0 +1,183 @@
+import json
+import subprocess
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from dashboard.bench import measure, seed_scale, throwaway_database
+from dashboard.models import Strike
+from dashboard.sidebar import encode_cursor
+
+# Query strings for the views that need one, by url name
+QUERIES = {
+    'sidebar_page': lambda strike: {'section': 'dashboard', 'after': encode_cursor(strike)},
+    'search': lambda strike: {'section': 'dashboard', 'q': 'cocaine boat'},
+    'clusters': lambda strike: {'bbox': '-90,0,-55,25', 'zoom': 4},
+    'submit:strike_fields': lambda strike: {'strike_type': 'existing'},
+    'submit:strike_search': lambda strike: {'q': 'carib sea'},
+    'api:strike_graph': lambda strike: {'depth': 2},
+}
+# Views behind a staff login
+STAFF_ONLY = {'monitoring:db_pool'}
+
+
+def _views(patterns=None, prefix='', namespace=None, seen=None):
+    """
+    ``(name, route, converters)`` for every view in config/urls.py except
+    the admin, which bench_admin covers. A view mounted twice is listed once.
+    """
+    if patterns is None:
+        patterns, seen = get_resolver().url_patterns, set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name == 'admin':
+                continue
+            yield from _views(
+                pattern.url_patterns, prefix + str(pattern.pattern),
+                pattern.namespace or namespace, seen,
+            )
+        elif isinstance(pattern, URLPattern) and pattern.callback not in seen:
+            seen.add(pattern.callback)
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, prefix + str(pattern.pattern), pattern.pattern.converters
+
+
+def _path(route, converters, strike):
+    """Fill the route's ``<int:...>`` parts with ``strike``'s pk, None if it has others."""
+    path = '/' + route
+    for kwarg, converter in converters.items():
+        placeholder = f'<int:{kwarg}>'
+        if placeholder not in path:
+            return None
+        path = path.replace(placeholder, str(strike.pk))
+    return path
+
+
+def _get(client, url):
+    response = client.get(url)
+    if response.streaming:
+        # Time the whole body, not just the first chunk
+        b''.join(response.streaming_content)
+    return response
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every view in config/urls.py at growing data sizes: p50/p95 "
+        "latency, queries and peak memory, written as JSON. Runs in a "
+        "throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10_000, 100_000],
+                            help="Strike counts, up to 1,000,000. Sources and submissions scale along.")
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', nargs='+', default=[], help="Url names to run, all by default.")
+        parser.add_argument('--output', default='bench_views.json')
+        parser.add_argument('--compare', help="Earlier --output to print the changes against.")
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help="Leave the page cache on. Off by default so every request renders.",
+        )
+
+    def handle(self, *args, **options):
+        page_cache = {} if options['page_cache'] else {'PAGE_CACHE_TIMEOUT': 0}
+        results = {
+            'commit': _commit(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'page_cache': options['page_cache'],
+            'scales': [],
+        }
+        with throwaway_database(), override_settings(ALLOWED_HOSTS=['testserver'], **page_cache):
+            client = Client()
+            staff = Client()
+            staff.force_login(get_user_model().objects.create_user('bench', is_staff=True))
+            for scale in sorted(options['scales']):
+                counts = seed_scale(scale, seed=options['seed'])
+                cache.clear()
+                self.stdout.write(
+                    f"{counts['strikes']:,} strikes, {counts['sources']:,} sources, "
+                    f"{counts['submissions']:,} submissions"
+                )
+                results['scales'].append({**counts, 'views': self.bench(client, staff, options)})
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.compare(json.load(f), results)
+
+    def bench(self, client, staff, options):
+        # A strike from the middle, neither the first nor the last page
+        strikes = Strike.objects.order_by('-date', '-pk')
+        strike = strikes[strikes.count() // 2]
+        views = []
+        for name, route, converters in _views():
+            if options['only'] and name not in options['only']:
+                continue
+            path = _path(route, converters, strike)
+            if path is None:
+                self.stdout.write(f"  {name:<28} skipped, no value for {route}")
+                continue
+            if name in QUERIES:
+                path += '?' + urlencode(QUERIES[name](strike))
+            view_client = staff if name in STAFF_ONLY else client
+
+            # First request builds in-memory indexes, the rest are warm
+            cache.clear()
+            response = _get(view_client, path)
+            result = measure(lambda: _get(view_client, path), options['repeat'])
+            view = {
+                'name': name,
+                'path': path,
+                'status': response.status_code,
+                'queries': response.metrics.queries,
+                **result,
+            }
+            views.append(view)
+            self.stdout.write(
+                f"  {name:<28} {view['status']}  {view['queries']:>3} queries  "
+                f"p50 {view['p50_ms']:>9} ms  p95 {view['p95_ms']:>9} ms  peak {view['peak_kib']:>9} KiB"
+            )
+        return views
+
+    def compare(self, before, after):
+        """Print how each view's numbers moved since ``before``, scale by scale."""
+        self.stdout.write(f"Against {before.get('commit') or 'earlier run'}:")
+        old_scales = {scale['strikes']: scale for scale in before['scales']}
+        for scale in after['scales']:
+            old = old_scales.get(scale['strikes'])
+            if old is None:
+                continue
+            old_views = {view['name']: view for view in old['views']}
+            self.stdout.write(f"{scale['strikes']:,} strikes")
+            for view in scale['views']:
+                previous = old_views.get(view['name'])
+                if previous is None:
+                    continue
+                ratio = view['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else 0
+                self.stdout.write(
+                    f"  {view['name']:<28} p50 {previous['p50_ms']:>9} -> {view['p50_ms']:>9} ms "
+                    f"(x{ratio:.2f})  queries {previous['queries']} -> {view['queries']}"
+                )
@@ -0,0 +1,35 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard import site
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every strike and sources page to a directory any static file "
+        "server can serve. Later runs only re-render the pages whose strike, "
+        "sources or sidebar changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.SITE_BUILD_DIR,
+                            help="Default SITE_BUILD_DIR.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Render processes, default one per CPU.")
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Render every page, e.g. after changing a view.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError("Pass --output or set SITE_BUILD_DIR")
+        start = time.perf_counter()
+        counts = site.build(options['output'], workers=options['workers'], full=options['full'])
+        self.stdout.write(
+            f"{counts['rendered']:,} strikes rendered, {counts['unchanged']:,} unchanged, "
+            f"{counts['removed']:,} removed in {time.perf_counter() - start:.1f}s"
+        )
@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.importer import FORMATS, RowError, clean_row, import_batch, read_rows, unhashed_sources
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert strikes and their sources from a CSV, JSON or NDJSON file, "
+        "keyed on Strike.external_id and the canonical Source url, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or - for stdin")
+        parser.add_argument('--format', choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint',
+            help="Record progress here after every batch and resume from it "
+                 "if a previous run over the same file stopped part way",
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in FORMATS:
+            raise CommandError(f"Can't tell the format of {path}, pass --format")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        if unhashed_sources():
+            raise CommandError("Some sources have no url hash yet, run `manage.py canonicalize_urls` first")
+
+        checkpoint = options['checkpoint']
+        if checkpoint and path == '-':
+            raise CommandError("Can't checkpoint stdin")
+        skip = 0 if options['restart'] else self.load_checkpoint(checkpoint, path)
+        if skip:
+            self.stdout.write(f"Resuming after row {skip}")
+
+        fp = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            self.run(read_rows(fp, fmt), skip, options['batch_size'], checkpoint, path)
+        except (RowError, json.JSONDecodeError) as error:
+            raise CommandError(f"Can't read {path}: {error}")
+        finally:
+            if fp is not sys.stdin:
+                fp.close()
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    def run(self, rows, skip, batch_size, checkpoint, path):
+        rows = enumerate(rows, start=1)
+        # Rows before the checkpoint still have to be parsed to get past them
+        for _ in islice(rows, skip):
+            pass
+
+        done, written, invalid = skip, 0, 0
+        start = time.perf_counter()
+        while batch := list(islice(rows, batch_size)):
+            cleaned = []
+            for number, row in batch:
+                try:
+                    cleaned.append(clean_row(row))
+                except RowError as error:
+                    invalid += 1
+                    self.stderr.write(f"Row {number}: {error}")
+            written += import_batch(cleaned)
+            done = batch[-1][0]
+            if checkpoint:
+                self.save_checkpoint(checkpoint, path, done)
+
+            rate = (done - skip) / (time.perf_counter() - start)
+            self.stdout.write(f"{done} rows, {rate:,.0f} rows/s")
+
+        elapsed = time.perf_counter() - start
+        rate = (done - skip) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} new or changed strikes from {done - skip} rows ({invalid} invalid) "
+            f"in {elapsed:.1f}s, {rate:,.0f} rows/s"
+        ))
+
+    def fingerprint(self, path):
+        # A checkpoint only applies to the file it was taken from
+        stat = os.stat(path)
+        return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load_checkpoint(self, checkpoint, path):
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as fp:
+            saved = json.load(fp)
+        if saved.get('file') != self.fingerprint(path):
+            raise CommandError(
+                f"{checkpoint} was written for a different or changed file, "
+                "pass --restart to start over"
+            )
+        return saved['rows']
+
+    def save_checkpoint(self, checkpoint, path, rows):
+        # Write then rename so a crash never leaves a half written checkpoint
+        tmp = f"{checkpoint}.tmp"
+        with open(tmp, 'w') as fp:
+            json.dump({'file': self.fingerprint(path), 'rows': rows}, fp)
+        os.replace(tmp, checkpoint)
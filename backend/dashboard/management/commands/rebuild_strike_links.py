@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.related import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute which strikes share sources from scratch. Needed after "
+        "loaddata or bulk writes that skip model signals, otherwise the links "
+        "stay current."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} strike links"))
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.bench import seed_scale
+from dashboard.models import Strike
+
+MAX_STRIKES = 1_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the configured database with synthetic strikes, sources, links "
+        "and submissions. The same options always give the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strikes', type=int, default=1000, help=f"Up to {MAX_STRIKES:,}.")
+        parser.add_argument('--sources', type=int, help="Default two per strike.")
+        parser.add_argument('--submissions', type=int, help="Default one per five strikes.")
+        parser.add_argument('--links-per-strike', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--top-up', action='store_true',
+            help="Add to a database that already has strikes, up to the given counts.",
+        )
+
+    def handle(self, *args, **options):
+        if not 1 <= options['strikes'] <= MAX_STRIKES:
+            raise CommandError(f"--strikes must be between 1 and {MAX_STRIKES:,}")
+        if Strike.objects.exists() and not options['top_up']:
+            raise CommandError("The database already has strikes, pass --top-up to add to them")
+
+        counts = seed_scale(
+            options['strikes'], options['sources'], options['submissions'],
+            links_per_strike=options['links_per_strike'], seed=options['seed'],
+        )
+        # Versions and rendered pages from before the bulk inserts are stale
+        cache.clear()
+        self.stdout.write(
+            f"{counts['strikes']:,} strikes, {counts['sources']:,} sources, "
+            f"{counts['submissions']:,} submissions"
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0010_strike_sources'),
+        ('sources', '0002_source_type'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='strike',
+            options={'ordering': ['-date', '-pk']},
+        ),
+        migrations.AddIndex(
+            model_name='strike',
+            index=models.Index(fields=['-date', '-id'], name='strike_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0011_strike_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='strike',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
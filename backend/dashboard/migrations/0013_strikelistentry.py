@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_list_entries(apps, schema_editor):
+    Strike = apps.get_model('dashboard', 'Strike')
+    StrikeListEntry = apps.get_model('dashboard', 'StrikeListEntry')
+    rows = Strike.objects.values_list('pk', 'date', 'location_label').iterator(chunk_size=2000)
+    batch = []
+    for pk, day, label in rows:
+        batch.append(StrikeListEntry(strike_id=pk, date=day, location_label=label))
+        if len(batch) == 2000:
+            StrikeListEntry.objects.bulk_create(batch)
+            batch = []
+    StrikeListEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0012_strike_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrikeListEntry',
+            fields=[
+                ('strike', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='list_entry', serialize=False, to='dashboard.strike')),
+                ('date', models.DateField()),
+                ('location_label', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ['-date', '-strike'],
+                'indexes': [models.Index(fields=['-date', '-strike'], name='strike_list_date_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_list_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:24
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# Fuzzy label matching needs pg_trgm. It ships with the postgres image we
+# deploy on, but not with every local build, so only use it when it's there
+# (dashboard.search checks for it at runtime too).
+ENABLE_TRIGRAM = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS strike_label_trgm_idx
+            ON dashboard_strike USING gin (location_label gin_trgm_ops);
+    END IF;
+END $$;
+"""
+
+DISABLE_TRIGRAM = 'DROP INDEX IF EXISTS strike_label_trgm_idx;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_strikelistentry'),
+        ('sources', '0003_source_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='strike',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('location_label', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('target', 'striker', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), '||', django.contrib.postgres.search.SearchVector('target_origin', 'target_destination', config='english', weight='C'), django.contrib.postgres.search.SearchConfig('english')), '||', django.contrib.postgres.search.SearchVector('summary', config='english', weight='D'), django.contrib.postgres.search.SearchConfig('english')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='strike',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='strike_search_idx'),
+        ),
+        migrations.RunSQL(ENABLE_TRIGRAM, DISABLE_TRIGRAM),
+    ]
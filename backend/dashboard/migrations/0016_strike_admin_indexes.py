@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_strike_external_id'),
+        ('sources', '0008_source_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='strike',
+            index=models.Index(fields=['striker', '-date', '-id'], name='strike_striker_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='strike',
+            index=models.Index(fields=['target_origin', '-date', '-id'], name='strike_origin_date_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:16
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+from dashboard.geohash import encode_location
+
+
+def backfill_geohashes(apps, schema_editor):
+    Strike = apps.get_model('dashboard', 'Strike')
+    rows = (
+        Strike.objects.exclude(location_lat=None).exclude(location_lon=None)
+        .values_list('pk', 'location_lat', 'location_lon').iterator(chunk_size=2000)
+    )
+    batch = []
+    for pk, lat, lon in rows:
+        batch.append(Strike(pk=pk, geohash=encode_location(lat, lon)))
+        if len(batch) == 2000:
+            Strike.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    Strike.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_strike_admin_indexes'),
+        ('sources', '0008_source_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='strike',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.RunPython(backfill_geohashes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='strike',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.comparison.Cast('geohash', models.TextField()), name='text_pattern_ops'), name='strike_geohash_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BACKFILL = """
+INSERT INTO dashboard_strikelink (strike_id, related_id, shared_sources)
+SELECT a.strike_id, b.strike_id, COUNT(*)
+FROM dashboard_strike_sources a
+JOIN dashboard_strike_sources b ON b.source_id = a.source_id AND b.strike_id <> a.strike_id
+GROUP BY a.strike_id, b.strike_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_strike_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrikeLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shared_sources', models.PositiveIntegerField()),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='dashboard.strike')),
+                ('strike', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='links', to='dashboard.strike')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['strike', '-shared_sources', '-related'], name='strike_link_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('strike', 'related'), name='strike_link_unique')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
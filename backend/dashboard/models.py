@@ -1,15 +1,25 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Cast
 from sources.models import Source
+
+from .geohash import encode_location
 # Create your models here.
 # This model is not showing up in migrations
 
 
 class Strike(models.Model):
+    # Natural key for imports, whatever id the upstream dataset uses
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
     date = models.DateField()
     location_label = models.CharField(max_length=255)
     location_lat = models.DecimalField(max_digits=16, decimal_places=14, blank=True, null=True)
     location_lon = models.DecimalField(max_digits=16, decimal_places=14, blank=True, null=True)
     location_uncertainty_m = models.PositiveIntegerField(blank=True, null=True)
+    # Of location_lat/lon, for nearest strike lookups (see dashboard.nearby).
+    # Set on save, bulk writers set it themselves
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
     target = models.CharField(max_length=255)
     striker = models.CharField(max_length=255)
     target_origin = models.CharField(max_length=255, null=True, blank=True)
@@ -22,9 +32,104 @@ class Strike(models.Model):
     target_destination = models.CharField(max_length=255, null=True, blank=True)
     summary = models.TextField(max_length=1500, null=True)
     sources = models.ManyToManyField('sources.Source', blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Kept up to date by Postgres itself, see dashboard.search
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('location_label', weight='A', config='english')
+            + SearchVector('target', 'striker', weight='B', config='english')
+            + SearchVector('target_origin', 'target_destination', weight='C', config='english')
+            + SearchVector('summary', weight='D', config='english')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     def __str__(self):
         return f"{self.date} - {self.pk}"
+
+    def save(self, *args, **kwargs):
+        self.geohash = encode_location(self.location_lat, self.location_lon)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'location_lat', 'location_lon'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
     
     class Meta:
-        ordering = ['-date']
\ No newline at end of file
+        # pk breaks ties between strikes on the same day so the order is
+        # stable enough to paginate by keyset on (date, pk)
+        ordering = ['-date', '-pk']
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='strike_date_id_idx'),
+            GinIndex(fields=['search_vector'], name='strike_search_idx'),
+            # Admin changelist filters, newest first within the filter
+            models.Index(fields=['striker', '-date', '-id'], name='strike_striker_date_idx'),
+            models.Index(fields=['target_origin', '-date', '-id'], name='strike_origin_date_idx'),
+            # Prefix scans for the strikes in a geohash cell, which compile to
+            # geohash::text LIKE 'x%'
+            models.Index(
+                OpClass(Cast('geohash', models.TextField()), name='text_pattern_ops'),
+                name='strike_geohash_idx',
+            ),
+        ]
+
+
+class StrikeListEntry(models.Model):
+    """
+    Compact copy of the Strike columns that list views show.
+
+    Sidebars and strike pickers only need pk, date and label, reading them
+    from here avoids dragging summaries, URLs and decimals along. Kept in
+    step with Strike by dashboard.signals.
+    """
+    strike = models.OneToOneField(
+        Strike, primary_key=True, on_delete=models.CASCADE, related_name='list_entry'
+    )
+    date = models.DateField()
+    location_label = models.CharField(max_length=255)
+
+    def __str__(self):
+        # Same as Strike.__str__ so pickers read the same either way
+        return f"{self.date} - {self.pk}"
+
+    @classmethod
+    def sync(cls, strikes):
+        """Upsert the entries for ``strikes`` in a single query."""
+        cls.objects.bulk_create(
+            [cls(strike_id=s.pk, date=s.date, location_label=s.location_label) for s in strikes],
+            update_conflicts=True,
+            unique_fields=['strike'],
+            update_fields=['date', 'location_label'],
+        )
+
+    class Meta:
+        ordering = ['-date', '-strike']
+        indexes = [
+            models.Index(fields=['-date', '-strike'], name='strike_list_date_idx'),
+        ]
+
+
+class StrikeLink(models.Model):
+    """
+    Two strikes that cite at least one of the same sources, and how many.
+
+    Stored both ways round, so a strike's related strikes are one index
+    range on ``strike``. Kept in step by dashboard.signals, see
+    dashboard.related.
+    """
+    # The unique constraint below indexes it
+    strike = models.ForeignKey(Strike, on_delete=models.CASCADE, related_name='links', db_index=False)
+    related = models.ForeignKey(Strike, on_delete=models.CASCADE, related_name='+')
+    shared_sources = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.strike_id} - {self.related_id} ({self.shared_sources})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['strike', 'related'], name='strike_link_unique'),
+        ]
+        indexes = [
+            # Most shared first, the order the sources page lists them in
+            models.Index(fields=['strike', '-shared_sources', '-related'], name='strike_link_rank_idx'),
+        ]
@@ -0,0 +1,125 @@
+"""
+Strikes nearest to a strike, for the dashboard's nearby panel.
+
+``nearest`` reads the strikes in the strike's geohash cell and the eight
+around it, one index range per cell, and has Postgres rank them by
+great-circle distance and keep the first few. It starts with cells a few
+km across and moves a level coarser until it has enough strikes that none
+outside the cells can be closer, so every lookup is a handful of index
+scans whatever the size of the table.
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cast, Cos, Least, Power, Radians, Round, Sin, Sqrt
+from django.template.loader import render_to_string
+
+from . import geohash
+from .caching import STRIKE_GEO, STRIKE_LIST, get_version
+from .models import Strike
+
+NEARBY_COUNT = 5
+EARTH_RADIUS_KM = 6371.0088
+# Finest cells searched, about 5 km across
+START_PRECISION = 5
+# Distances closer than this count as a tie, broken by the smaller
+# location_uncertainty_m. Same as the panel shows them.
+TIE_KM = 0.1
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _reach_km(lat, lon, cell):
+    """How far lat/lon is from the edge of the 3x3 cells around ``cell``, in km."""
+    south, north, west, east = geohash.bounds(cell)
+    height, width = north - south, east - west
+    # To the parallels above and below, along the meridian
+    along = min(lat - (south - height), (north + height) - lat)
+    km = math.radians(along) * EARTH_RADIUS_KM
+    # To the meridians either side, the shortest way to a great circle
+    across = min(lon - (west - width), (east + width) - lon)
+    if across < 90:
+        km = min(km, EARTH_RADIUS_KM * math.asin(
+            math.sin(math.radians(across)) * math.cos(math.radians(lat))
+        ))
+    return km
+
+
+def _distance_km(lat, lon):
+    """Haversine distance from lat/lon to a strike's location, as SQL."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    other_lat = Radians(Cast('location_lat', FloatField()))
+    other_lon = Radians(Cast('location_lon', FloatField()))
+    a = (
+        Power(Sin((other_lat - lat) / 2), 2)
+        + math.cos(lat) * Cos(other_lat) * Power(Sin((other_lon - lon) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0)))
+
+
+def nearest(strike, count=NEARBY_COUNT):
+    """
+    The ``count`` strikes closest to ``strike``, closest first, as dicts
+    with ``distance_km``. Empty when ``strike`` has no location.
+
+    Each level is one query: index ranges for the nine cells, ranked and
+    cut to ``count`` rows by Postgres, so Python never sees more than
+    ``count`` rows however many strikes the cells hold.
+    """
+    if strike.location_lat is None or strike.location_lon is None:
+        return []
+    lat, lon = float(strike.location_lat), float(strike.location_lon)
+    start = geohash.encode(lat, lon, START_PRECISION)
+    for precision in range(START_PRECISION, 0, -1):
+        cell = start[:precision]
+        in_cells = Q()
+        for prefix in [cell, *geohash.neighbours(cell)]:
+            in_cells |= Q(geohash__startswith=prefix)
+        rows = list(
+            Strike.objects.filter(in_cells).exclude(pk=strike.pk)
+            .annotate(distance_km=_distance_km(lat, lon))
+            # Distances within TIE_KM of each other tie, the more certain
+            # location wins and unknown uncertainty goes last
+            .order_by(
+                Round(F('distance_km') / TIE_KM),
+                F('location_uncertainty_m').asc(nulls_last=True),
+                'distance_km', 'pk',
+            )
+            .values('pk', 'date', 'location_label', 'distance_km', uncertainty_m=F('location_uncertainty_m'))
+            [:count]
+        )
+        # Strikes outside the cells are further than the reach, so they'd
+        # rank after every one of these
+        if len(rows) >= count and max(row['distance_km'] for row in rows) + TIE_KM <= _reach_km(lat, lon, cell):
+            break
+    # At precision 1 the cells cover a third of the globe, good enough
+    return rows
+
+
+def render_nearby(pk):
+    """
+    The nearby panel of strike ``pk``, None if there's no such strike.
+
+    Cached until a strike moves or is relabelled.
+    """
+    key = f'nearby:{pk}:{get_version(STRIKE_GEO)}:{get_version(STRIKE_LIST)}'
+    html = cache.get(key)
+    if html is None:
+        strike = Strike.objects.filter(pk=pk).only('location_lat', 'location_lon').first()
+        if strike is None:
+            return None
+        html = render_to_string('partials/nearby_strikes.html', {
+            'strike': strike,
+            'nearby': nearest(strike),
+        })
+        cache.set(key, html, settings.PAGE_CACHE_TIMEOUT)
+    return html
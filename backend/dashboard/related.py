@@ -0,0 +1,143 @@
+"""
+Strikes related through the sources they share.
+
+StrikeLink holds one row per ordered pair of strikes citing a common
+source, with the number of sources they share. ``refresh`` recomputes the
+rows of a few strikes after their sources change, ``rebuild`` all of them
+after bulk writes that skip the signals. Reading a strike's related
+strikes, or walking the graph, is then an index range per strike instead
+of a self-join of the strike/source table.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Strike, StrikeLink
+
+# Related strikes listed on a sources page
+RELATED_COUNT = 10
+# Deepest walk and most strikes the graph endpoint returns
+MAX_GRAPH_DEPTH = 2
+MAX_GRAPH_NODES = 500
+
+_PAIRS = """
+SELECT a.strike_id, b.strike_id, COUNT(*)
+FROM {through} a
+JOIN {through} b ON b.source_id = a.source_id AND b.strike_id <> a.strike_id
+{where}
+GROUP BY a.strike_id, b.strike_id
+"""
+
+
+def _tables():
+    return {
+        'links': connection.ops.quote_name(StrikeLink._meta.db_table),
+        'through': connection.ops.quote_name(Strike.sources.through._meta.db_table),
+    }
+
+
+def _rows(pks):
+    return set(
+        StrikeLink.objects.filter(strike__in=pks).values_list('strike', 'related', 'shared_sources')
+    )
+
+
+def refresh(pks):
+    """
+    Recompute the links of strikes ``pks``, in both directions. Returns the
+    pks of the other strikes whose related strikes changed as a result.
+    """
+    pks = list(set(pks))
+    if not pks:
+        return set()
+    tables = _tables()
+    with transaction.atomic():
+        before = _rows(pks)
+        StrikeLink.objects.filter(strike__in=pks).delete()
+        StrikeLink.objects.filter(related__in=pks).delete()
+        with connection.cursor() as cursor:
+            pairs = _PAIRS.format(through=tables['through'], where='WHERE a.strike_id = ANY(%s)')
+            cursor.execute(
+                f"INSERT INTO {tables['links']} (strike_id, related_id, shared_sources) {pairs}", [pks],
+            )
+            # And the other way round, except where the other strike's own
+            # rows above already have it
+            cursor.execute(
+                f"INSERT INTO {tables['links']} (strike_id, related_id, shared_sources) "
+                f"SELECT related_id, strike_id, shared_sources FROM {tables['links']} "
+                f"WHERE strike_id = ANY(%s) AND NOT related_id = ANY(%s)",
+                [pks, pks],
+            )
+        after = _rows(pks)
+    return {related for _, related, _ in before ^ after} - set(pks)
+
+
+def rebuild():
+    """Recompute every link from the strike/source table, returns the row count."""
+    tables = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {tables['links']}")
+        cursor.execute(
+            f"INSERT INTO {tables['links']} (strike_id, related_id, shared_sources) "
+            + _PAIRS.format(through=tables['through'], where=''),
+        )
+        return cursor.rowcount
+
+
+def related_strikes(pk, limit=RELATED_COUNT):
+    """Strikes sharing sources with ``pk``, most shared (then newest) first."""
+    return list(
+        StrikeLink.objects.filter(strike=pk)
+        .order_by('-shared_sources', '-related')
+        .values('shared_sources', pk=F('related'), date=F('related__date'),
+                location_label=F('related__location_label'))[:limit]
+    )
+
+
+def graph(pk, depth=1, max_nodes=MAX_GRAPH_NODES):
+    """
+    The strikes within ``depth`` shared-source hops of ``pk``, as
+    ``{'nodes': [...], 'edges': [...], 'truncated': bool}``, nearest hops
+    first. Each edge is listed once, weighted by ``shared_sources``. Stops
+    adding strikes at ``max_nodes``. One query per hop, plus one for the
+    edges between the last hop's strikes and one for the nodes.
+    """
+    hops = {pk: 0}
+    edges = []
+    truncated = False
+    for hop in range(depth):
+        frontier = [strike for strike, at in hops.items() if at == hop]
+        if not frontier:
+            break
+        links = (
+            StrikeLink.objects.filter(strike__in=frontier)
+            .order_by('strike', '-shared_sources', '-related')
+            .values_list('strike', 'related', 'shared_sources')
+        )
+        for strike, related, shared in links:
+            if related not in hops:
+                if len(hops) >= max_nodes:
+                    truncated = True
+                    continue
+                hops[related] = hop + 1
+            # Links between two walked strikes come up from both ends
+            if hops[related] == depth or strike < related:
+                edges.append((strike, related, shared))
+
+    last = [strike for strike, at in hops.items() if at == depth]
+    if len(last) > 1:
+        edges += (
+            StrikeLink.objects.filter(strike__in=last, related__in=last, strike__lt=F('related'))
+            .values_list('strike', 'related', 'shared_sources')
+        )
+    rows = {
+        row['pk']: row
+        for row in Strike.objects.filter(pk__in=hops).values('pk', 'date', 'location_label')
+    }
+    return {
+        'nodes': [
+            {'id': strike, 'date': rows[strike]['date'], 'location_label': rows[strike]['location_label'], 'hops': at}
+            for strike, at in hops.items() if strike in rows
+        ],
+        'edges': [{'source': a, 'target': b, 'shared_sources': n} for a, b, n in edges],
+        'truncated': truncated,
+    }
@@ -0,0 +1,110 @@
+"""
+Full-text search over strikes for the sidebar search box.
+
+Strike.search_vector is a tsvector generated by Postgres from the label,
+target, striker, origin, destination and summary, with a GIN index on it,
+so a search is an index lookup rather than a sequential icontains scan.
+When pg_trgm is installed (see migration 0014) misspelt location labels
+are matched through a trigram index as well.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+
+from .models import Strike
+
+SEARCH_PAGE_SIZE = 25
+
+# Longer queries than this are cut short, they only get slower to plan
+MAX_TERMS = 8
+
+# Ranking has to read every matching tsvector, which is most of the cost
+# for common words. Only the newest matches this deep get ranked.
+MAX_CANDIDATES = 1000
+
+# Letters and digits only, anything else would be tsquery syntax
+_TERM = re.compile(r'[^\W_]+')
+
+_trigram = None
+
+
+def trigram_available():
+    """Whether pg_trgm is installed, checked once per process."""
+    global _trigram
+    if _trigram is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram = cursor.fetchone() is not None
+    return _trigram
+
+
+def search_terms(text):
+    return _TERM.findall(text.lower())[:MAX_TERMS]
+
+
+def search_query(terms, prefix=False):
+    """
+    tsquery matching every term, with ``prefix`` the last one as a prefix.
+
+    The prefix match lets results show up while the last word is still
+    being typed.
+    """
+    last = terms[-1] + ':*' if prefix else terms[-1]
+    return SearchQuery(' & '.join(terms[:-1] + [last]), search_type='raw', config='english')
+
+
+def _candidates(terms, prefix):
+    """Newest MAX_CANDIDATES strike pks matching ``terms``."""
+    matches = Q(search_vector=search_query(terms, prefix))
+    if trigram_available():
+        matches |= Q(location_label__trigram_word_similar=' '.join(terms))
+    return list(
+        Strike.objects.filter(matches)
+        .order_by('-date', '-pk')
+        .values_list('pk', flat=True)[:MAX_CANDIDATES]
+    )
+
+
+def search_strikes(text, page=1, size=SEARCH_PAGE_SIZE):
+    """
+    One page of strikes matching ``text``, best match first.
+
+    Returns ``(strikes, next_page)`` where ``next_page`` is None on the
+    last page. Strikes only carry the columns the sidebar shows. Queries
+    matching more than MAX_CANDIDATES strikes only search the newest ones.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return [], None
+
+    # Postgres can't estimate prefix matches and guesses low, which for a
+    # common word means rechecking most of the table. Whole words estimate
+    # fine, so try those first and only fall back to a prefix match when
+    # they don't fill a page. Depends only on the text, so every page of
+    # one search makes the same choice.
+    prefix = False
+    candidates = _candidates(terms, prefix=False)
+    if len(candidates) <= size:
+        prefix = True
+        candidates = _candidates(terms, prefix=True)
+
+    query = search_query(terms, prefix)
+    rank = SearchRank(F('search_vector'), query)
+    if trigram_available():
+        rank = Greatest(rank, TrigramWordSimilarity(' '.join(terms), 'location_label'))
+
+    strikes = (
+        Strike.objects
+        .filter(pk__in=candidates)
+        .annotate(rank=rank)
+        .order_by('-rank', '-date', '-pk')
+        .only('pk', 'date', 'location_label')
+    )
+    offset = (page - 1) * size
+    # One extra row tells us whether there is another page without a COUNT
+    strikes = list(strikes[offset:offset + size + 1])
+    next_page = page + 1 if len(strikes) > size else None
+    return strikes[:size], next_page
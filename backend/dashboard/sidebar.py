@@ -0,0 +1,116 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .caching import STRIKE_LIST, get_version
+from .models import StrikeListEntry
+
+# Strikes rendered per sidebar page. The first page is part of the full
+# page render, the rest are pulled in by HTMX as the list is scrolled.
+SIDEBAR_PAGE_SIZE = 50
+
+# Where each sidebar links to, keyed by the section it is rendered in
+SECTIONS = {
+    'dashboard': '/dashboard/',
+    'sources': '/sources/',
+}
+
+# Selection dot markup from partials/strike_list_item.html
+UNSELECTED_DOT = '<span class="h-4 w-4 rounded-full border-2 border-amber-500/90" data-strike-dot="{pk}"></span>'
+SELECTED_DOT = '<span class="h-4 w-4 rounded-full bg-amber-500/90" data-strike-dot="{pk}"></span>'
+# Sent with the later page that holds the selected strike, so the copy
+# pinned above the first page goes once the strike's own row shows up
+UNPIN = '<li id="pinned-strike" hx-swap-oob="delete"></li>'
+
+
+def encode_cursor(strike):
+    """Cursor for the page that starts right after ``strike``."""
+    return f"{strike.date.isoformat()}.{strike.pk}"
+
+
+def decode_cursor(cursor):
+    """Turn a cursor back into a (date, pk) pair, ValueError if malformed."""
+    day, _, pk = cursor.partition('.')
+    return date.fromisoformat(day), int(pk)
+
+
+def strike_page(after=None, size=SIDEBAR_PAGE_SIZE):
+    """
+    One page of the sidebar as StrikeListEntry rows, newest first.
+
+    Keyset pagination on (date, pk) so every page costs the same no matter
+    how deep the user has scrolled. Returns ``(strikes, next_cursor)`` where
+    ``next_cursor`` is None on the last page.
+    """
+    strikes = StrikeListEntry.objects.order_by('-date', '-pk')
+    if after is not None:
+        day, pk = after
+        strikes = strikes.filter(Q(date__lt=day) | Q(date=day, pk__lt=pk))
+
+    # One extra row tells us whether there is another page without a COUNT
+    strikes = list(strikes[:size + 1])
+    next_cursor = encode_cursor(strikes[size - 1]) if len(strikes) > size else None
+    return strikes[:size], next_cursor
+
+
+def render_strike_list(section, after=None):
+    """
+    Rendered <li> rows for one sidebar page of ``section``.
+
+    The rows are the same for every request, so they are rendered once per
+    strike list version with nothing selected and shared from the cache.
+    Use ``select_strike`` to highlight the current strike.
+    """
+    cursor = f"{after[0].isoformat()}.{after[1]}" if after else 'first'
+    key = f'sidebar:{section}:{cursor}:{get_version(STRIKE_LIST)}'
+    html = cache.get(key)
+    if html is None:
+        strikes, next_cursor = strike_page(after)
+        html = render_to_string('partials/strike_list_page.html', {
+            'strikes': strikes,
+            'next_cursor': next_cursor,
+            'section': section,
+            'link_base': SECTIONS[section],
+        })
+        cache.set(key, html, settings.PAGE_CACHE_TIMEOUT)
+    return html
+
+
+def select_strike(html, pk):
+    """
+    Highlight strike ``pk`` in a rendered list.
+
+    Returns ``(html, found)``, ``found`` is False when the strike is not on
+    this page of the list.
+    """
+    unselected = UNSELECTED_DOT.format(pk=pk)
+    if pk is None or unselected not in html:
+        return html, False
+    return html.replace(unselected, SELECTED_DOT.format(pk=pk), 1), True
+
+
+def sidebar_context(section, selected=None, html=None):
+    """
+    Context for the first sidebar page of ``section``.
+
+    Async views pass ``html``, the page from ``render_strike_list``, after
+    fetching it off the event loop.
+    """
+    selected_pk = selected.pk if selected is not None else None
+    if html is None:
+        html = render_strike_list(section)
+    html, found = select_strike(html, selected_pk)
+
+    return {
+        'sidebar_html': mark_safe(html),
+        # Keep the selected strike visible even when it lives further down
+        # the list than the first page reaches
+        'pinned_strike': selected if selected is not None and not found else None,
+        'section': section,
+        'link_base': SECTIONS[section],
+        'selected_pk': selected_pk,
+    }
@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from sources.models import Source
+
+from . import clusters, related, site, typeahead
+from .caching import STRIKE_GEO, STRIKE_LABELS, STRIKE_LIST, bump_version, evict_strike_pages
+from .models import Strike, StrikeListEntry
+
+# Strike fields shown in the sidebar. Changing one of these changes every
+# page that renders the sidebar, anything else only that strike's pages.
+LIST_FIELDS = ('date', 'location_label')
+# The map and the nearby panels. Uncertainty breaks ties between neighbours.
+GEO_FIELDS = ('location_lat', 'location_lon', 'location_uncertainty_m')
+
+# Sent by bulk writers (see dashboard.importer) that skip save() and so
+# post_save. ``strikes`` are the saved instances with their pks, ``previous``
+# maps the pk of every strike that already existed to its row as it was
+# before the write, as a ``values()`` dict.
+strikes_bulk_saved = Signal()
+
+
+def _now_and_on_commit(func):
+    # Run straight away so the writer sees its own change, and again once the
+    # transaction commits so a request that re-cached the old data in between
+    # gets evicted too.
+    func()
+    transaction.on_commit(func)
+
+
+def _bump_now_patch_on_commit(func):
+    # The in-memory indexes. Bump the version straight away like the rest,
+    # so other workers stop trusting their copy, but patch this process's
+    # copy only once the change is committed. Nothing reloads an index that
+    # is current, so a rolled back change patched in would stay until restart.
+    func(patch=False)
+    transaction.on_commit(func)
+
+
+@receiver(pre_save, sender=Strike)
+def remember_previous_strike(sender, instance, raw, **kwargs):
+    """Stash the row as it was before this save so handlers can diff it."""
+    instance._previous = None
+    if instance.pk is not None and not raw:
+        instance._previous = Strike.objects.filter(pk=instance.pk).values().first()
+
+
+@receiver(post_save, sender=Strike)
+def strike_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    list_changed = created or previous is None or any(
+        previous[field] != getattr(instance, field) for field in LIST_FIELDS
+    )
+    if list_changed:
+        StrikeListEntry.sync([instance])
+        _now_and_on_commit(lambda: bump_version(STRIKE_LIST))
+        _bump_now_patch_on_commit(lambda **kwargs: typeahead.strike_labelled(
+            instance.pk, instance.date, instance.location_label, **kwargs,
+        ))
+    else:
+        _now_and_on_commit(lambda: evict_strike_pages([instance.pk]))
+
+    geo_changed = previous is None or any(
+        previous[field] != getattr(instance, field) for field in GEO_FIELDS
+    )
+    if geo_changed:
+        _bump_now_patch_on_commit(lambda **kwargs: clusters.strike_moved(
+            instance.pk, instance.location_lat, instance.location_lon, **kwargs,
+        ))
+
+
+@receiver(post_delete, sender=Strike)
+def strike_deleted(sender, instance, **kwargs):
+    # Django clears instance.pk once the delete finishes, keep our own copy
+    pk = instance.pk
+    _now_and_on_commit(lambda: bump_version(STRIKE_LIST))
+    _bump_now_patch_on_commit(lambda **kwargs: clusters.strike_moved(pk, None, None, **kwargs))
+    _bump_now_patch_on_commit(lambda **kwargs: typeahead.strike_labelled(pk, None, None, **kwargs))
+
+
+@receiver(strikes_bulk_saved)
+def strikes_bulk_changed(sender, strikes, previous, **kwargs):
+    StrikeListEntry.sync(strikes)
+    # Bulk writers may have linked sources too
+    related.refresh([strike.pk for strike in strikes])
+    # Invalidates every page anyway, no point evicting strike by strike
+    _now_and_on_commit(lambda: bump_version(STRIKE_LIST))
+    # The cluster and typeahead indexes notice the new version and reload on next use
+    _now_and_on_commit(lambda: bump_version(STRIKE_GEO))
+    _now_and_on_commit(lambda: bump_version(STRIKE_LABELS))
+
+
+def _source_strike_pks(source):
+    return list(
+        Strike.sources.through.objects
+        .filter(source_id=source.pk)
+        .values_list('strike_id', flat=True)
+    )
+
+
+def _touch_strikes(pks):
+    # A strike whose set of sources changed has changed too, even though no
+    # Strike row was saved. Keeps updated_at honest for page validators.
+    if pks:
+        Strike.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+def _sources_changed(pks):
+    # The strikes' related strikes changed with their sources, and so did
+    # those of every strike they started or stopped sharing a source with
+    pks = list(pks) + list(related.refresh(pks))
+    _touch_strikes(pks)
+    _now_and_on_commit(lambda: evict_strike_pages(pks, kinds=('sources',)))
+
+
+@receiver(post_save, sender=Source)
+def source_saved(sender, instance, **kwargs):
+    pks = _source_strike_pks(instance)
+    _now_and_on_commit(lambda: evict_strike_pages(pks, kinds=('sources',)))
+
+
+@receiver(pre_delete, sender=Source)
+def remember_source_strikes(sender, instance, **kwargs):
+    # The through rows are gone by post_delete, and deleting them does not
+    # send m2m_changed, so collect the affected strikes up front
+    instance._strike_pks = _source_strike_pks(instance)
+
+
+@receiver(post_delete, sender=Source)
+def source_deleted(sender, instance, **kwargs):
+    _sources_changed(getattr(instance, '_strike_pks', []))
+
+
+@receiver(m2m_changed, sender=Strike.sources.through)
+def strike_sources_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._strike_pks = _source_strike_pks(instance)
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        # strike.sources.add(...) etc, only this strike's sources changed
+        pks = [instance.pk]
+    elif action == 'post_clear':
+        pks = getattr(instance, '_strike_pks', [])
+    else:
+        # source.strike_set.add(...) etc, pk_set holds strike pks
+        pks = list(pk_set or ())
+    _sources_changed(pks)
+
+
+@receiver(post_save, sender=Strike)
+@receiver(post_delete, sender=Strike)
+@receiver(strikes_bulk_saved)
+@receiver(post_save, sender=Source)
+@receiver(post_delete, sender=Source)
+@receiver(m2m_changed, sender=Strike.sources.through)
+def site_changed(sender, **kwargs):
+    # The build works out which pages changed, see dashboard.site. Scheduled
+    # on commit so it reads the new rows.
+    if settings.SITE_BUILD_DIR:
+        transaction.on_commit(site.schedule_build)
@@ -0,0 +1,253 @@
+"""
+Static copy of the strike and sources pages, see ``manage.py build_site``.
+
+Every page is rendered by its view into ``<output>/<kind>/<pk>/index.html``,
+the same path it has on the site, so any static file server can serve
+them. Each page's inputs (its strike, that strike's sources, related
+strikes and neighbours by date, the first sidebar page, the templates and
+static files) are hashed, and the hashes kept in
+``<output>/manifest.json``. A rebuild only renders the pages whose hash
+changed and removes the pages of deleted strikes.
+
+The HTMX endpoints (sidebar pages, search, clusters) and the static files
+are still served by Django.
+"""
+import fcntl
+import hashlib
+import inspect
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.http import HttpRequest
+from django.template.utils import get_app_template_dirs
+
+from .caching import PAGE_KINDS
+from .models import Strike, StrikeLink, StrikeListEntry
+from .sidebar import strike_page
+
+MANIFEST = 'manifest.json'
+# Strikes per task handed to a render process
+CHUNK_SIZE = 200
+
+# Derived columns, they change when the ones they come from do
+_SKIP_FIELDS = {'search_vector'}
+_SOURCE_FIELDS = ('source_id', 'source__name', 'source__url', 'source__type', 'source__updated_at')
+
+
+def page_path(kind, pk):
+    return Path(kind) / str(pk) / 'index.html'
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, default=str).encode()).hexdigest()
+
+
+def _template_files():
+    dirs = [Path(d) for engine in settings.TEMPLATES for d in engine.get('DIRS', ())]
+    dirs += [Path(d) for d in get_app_template_dirs('templates')]
+    for directory in dirs:
+        yield from sorted(p for p in directory.rglob('*') if p.is_file())
+
+
+def shared_digest():
+    """Hash of what every page renders: the first sidebar page, templates and static names."""
+    strikes, next_cursor = strike_page()
+    sidebar = [(s.pk, s.date, s.location_label) for s in strikes]
+    templates = hashlib.sha256()
+    for path in _template_files():
+        templates.update(str(path).encode())
+        templates.update(path.read_bytes())
+    # Hashed static names, so new CSS means new pages. Empty before collectstatic
+    static = sorted(getattr(staticfiles_storage, 'hashed_files', {}).items())
+    return _digest([sidebar, next_cursor, templates.hexdigest(), static])
+
+
+def _grouped(rows):
+    groups = {}
+    for strike_id, *row in rows.iterator(chunk_size=5000):
+        groups.setdefault(strike_id, []).append(row)
+    return groups
+
+
+def _neighbours():
+    # {pk: (previous, next)} in (date, pk) order, as the pages' pager links them
+    rows = list(StrikeListEntry.objects.order_by('date', 'pk').values_list('pk', 'date', 'location_label'))
+    return {
+        row[0]: (rows[i - 1] if i else None, rows[i + 1] if i + 1 < len(rows) else None)
+        for i, row in enumerate(rows)
+    }
+
+
+def strike_digests():
+    """
+    ``{pk: hash}`` of every strike's own row, its sources, the strikes
+    related to it through them and the strikes either side of it, four
+    queries.
+    """
+    fields = [f.attname for f in Strike._meta.concrete_fields if f.name not in _SKIP_FIELDS]
+    sources = _grouped(
+        Strike.sources.through.objects
+        .order_by('strike_id', 'source_id')
+        .values_list('strike_id', *_SOURCE_FIELDS)
+    )
+    related = _grouped(
+        StrikeLink.objects
+        .order_by('strike', 'related')
+        .values_list('strike', 'related', 'shared_sources', 'related__date', 'related__location_label')
+    )
+    neighbours = _neighbours()
+    return {
+        row[0]: _digest([row, sources.get(row[0], []), related.get(row[0], []), neighbours.get(row[0])])
+        for row in Strike.objects.order_by('pk').values_list('pk', *fields).iterator(chunk_size=5000)
+    }
+
+
+def _views():
+    # Imported here, sources depends on dashboard and not the other way round
+    from sources import views as source_views
+    from . import views
+    # Without the page cache and validators around them, every call renders
+    return {
+        'dashboard': (inspect.unwrap(views.index), 'pk'),
+        'sources': (inspect.unwrap(source_views.index), 'strike_pk'),
+    }
+
+
+def render_page(kind, pk, views=None):
+    """The HTML of strike ``pk``'s ``kind`` page, as the view renders it."""
+    view, pk_kwarg = (views or _views())[kind]
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = f'/{kind}/{pk}/'
+    request.META['SERVER_NAME'] = 'localhost'
+    request.META['SERVER_PORT'] = '80'
+    request.user = AnonymousUser()
+    response = async_to_sync(view)(request, **{pk_kwarg: pk})
+    return response.content
+
+
+def _write(path, content):
+    # Write then rename, a server never sees half a page
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _render_chunk(output, pks):
+    views = _views()
+    for pk in pks:
+        for kind in PAGE_KINDS:
+            _write(Path(output) / page_path(kind, pk), render_page(kind, pk, views))
+    return len(pks)
+
+
+def _render(output, pks, workers):
+    chunks = [pks[i:i + CHUNK_SIZE] for i in range(0, len(pks), CHUNK_SIZE)]
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            _render_chunk(output, chunk)
+        return
+    # Forked children would share the parent's connection socket otherwise
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(min(workers, len(chunks)), mp_context=context) as executor:
+        for _ in executor.map(_render_chunk, [output] * len(chunks), chunks):
+            pass
+
+
+def _remove(output, pk):
+    for kind in PAGE_KINDS:
+        path = Path(output) / page_path(kind, pk)
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+
+def _read_manifest(output):
+    try:
+        with open(Path(output) / MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def build(output, workers=1, full=False):
+    """
+    Bring the pages in ``output`` up to date, rendering ``workers`` chunks
+    of strikes at a time. ``full`` renders every page whatever the manifest
+    says. Returns ``{'rendered': n, 'removed': n, 'unchanged': n}`` strikes.
+    """
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    # One build at a time per directory, a second one waits and then picks
+    # up whatever changed meanwhile
+    with open(output / '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        old = _read_manifest(output).get('pages', {})
+        shared = shared_digest()
+        pages = {
+            str(pk): _digest([shared, digest]) for pk, digest in strike_digests().items()
+        }
+        stale = sorted(
+            int(pk) for pk, digest in pages.items() if full or old.get(pk) != digest
+        )
+        gone = [int(pk) for pk in old if pk not in pages]
+
+        _render(output, stale, workers)
+        for pk in gone:
+            _remove(output, pk)
+        _write(output / MANIFEST, json.dumps({'pages': pages}).encode())
+    return {'rendered': len(stale), 'removed': len(gone), 'unchanged': len(pages) - len(stale)}
+
+
+_timer = None
+_timer_lock = threading.Lock()
+
+
+def _spawn_build():
+    global _timer
+    with _timer_lock:
+        _timer = None
+    # Its own process, so a long build doesn't hold up this worker. Builds
+    # queue up on the lock in build()
+    subprocess.Popen(
+        [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'build_site', '--verbosity', '0'],
+        cwd=settings.BASE_DIR, start_new_session=True,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+    )
+
+
+def schedule_build():
+    """
+    Rebuild the static site ``SITE_BUILD_DELAY`` seconds from now, unless a
+    rebuild is already due. A burst of admin edits makes one rebuild.
+    """
+    global _timer
+    with _timer_lock:
+        if _timer is not None:
+            return
+        _timer = threading.Timer(settings.SITE_BUILD_DELAY, _spawn_build)
+        _timer.daemon = True
+        _timer.start()
@@ -33,3 +33,40 @@ L.tileLayer('https://tile.openstreetmap.org/{z}/{x}/{y}.png', {
     attribution: '&copy; <a href="http://www.openstreetmap.org/copyright">OpenStreetMap</a>'
 }).addTo(map);
 
+
+// Every other strike, clustered server side for the part of the map in view.
+// Single strikes link to their own page.
+var clusterLayer = L.layerGroup().addTo(map);
+
+function loadClusters() {
+    var bounds = map.getBounds();
+    var params = new URLSearchParams({
+        bbox: [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()].join(','),
+        zoom: map.getZoom()
+    });
+
+    fetch('/dashboard/clusters/?' + params)
+        .then(function(response) { return response.json(); })
+        .then(function(data) {
+            clusterLayer.clearLayers();
+            data.clusters.forEach(function(cluster) {
+                var marker = L.circleMarker([cluster.lat, cluster.lon], {
+                    color: 'orange',
+                    fillOpacity: 0.6,
+                    radius: 6 + Math.log2(cluster.count) * 3
+                });
+                if (cluster.pk) {
+                    marker.bindTooltip('Strike ' + cluster.pk);
+                    marker.on('click', function() {
+                        window.location = '/dashboard/' + cluster.pk + '/';
+                    });
+                } else {
+                    marker.bindTooltip(cluster.count + ' strikes');
+                }
+                clusterLayer.addLayer(marker);
+            });
+        });
+}
+
+map.on('moveend', loadClusters);
+loadClusters();
@@ -1,8 +1,56 @@
-from django.test import TestCase, Client
-from dashboard.models import Strike
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from io import StringIO
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.checks.security.base import check_security_middleware, check_xframe_options_middleware
+from django.core.checks.security.csrf import check_csrf_middleware
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import (
+    AsyncRequestFactory, Client, RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from dashboard.caching import STRIKE_GEO, STRIKE_LABELS, bump_version, page_cache_stats, reset_page_cache_stats
+from dashboard.clusters import MAX_ZOOM, ClusterIndex
+from dashboard.bench import seed_sources, seed_strikes
+from dashboard.importer import read_rows
+from dashboard.models import Strike, StrikeLink, StrikeListEntry
+from dashboard.signals import strikes_bulk_saved
+from dashboard.changelist import EstimatedCountPaginator, SkipScanDatesMixin
+from dashboard.search import SEARCH_PAGE_SIZE, search_strikes
+from dashboard.typeahead import TYPEAHEAD_LIMIT, PrefixIndex
+from dashboard import asyncdb, clusters, geohash, related, site, typeahead
+from dashboard.detail import load_strike
+from dashboard.nearby import NEARBY_COUNT, START_PRECISION, haversine_km, nearest
+from dashboard.sidebar import (
+    SIDEBAR_PAGE_SIZE, SELECTED_DOT, UNPIN, UNSELECTED_DOT, decode_cursor, encode_cursor,
+    render_strike_list, select_strike, sidebar_context, strike_page,
+)
+from monitoring.testing import QueryBudgetMixin
 from sources.models import Source
+from stats.models import StrikeRollup
+from submit.models import Submission
 from decimal import Decimal
-from datetime import date
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+
+def sidebar_pks(response):
+    """Pks of the strikes in the rendered sidebar rows, top to bottom."""
+    return [int(pk) for pk in re.findall(r'data-strike-dot="(\d+)"', response.context['sidebar_html'])]
 
 
 class StrikeModelTests(TestCase):
@@ -95,8 +143,8 @@ class DashboardViewTests(TestCase):
         response = self.client.get(f'/dashboard/{self.strike.pk}/')
         self.assertEqual(response.context['strike'], self.strike)
 
-    def test_index_view_context_contains_all_strikes(self):
-        """Context includes all strikes for sidebar."""
+    def test_index_view_sidebar_lists_all_strikes(self):
+        """The sidebar lists every strike, newest first."""
         second_strike = Strike.objects.create(
             date=date(2024, 2, 1),
             location_label="Second Strike",
@@ -106,12 +154,1427 @@ class DashboardViewTests(TestCase):
             striker="Second Striker",
         )
         response = self.client.get(f'/dashboard/{self.strike.pk}/')
-        all_strikes = list(response.context['all_strikes'])
-        self.assertEqual(len(all_strikes), 2)
-        self.assertIn(self.strike, all_strikes)
-        self.assertIn(second_strike, all_strikes)
+        self.assertEqual(sidebar_pks(response), [second_strike.pk, self.strike.pk])
 
     def test_index_view_uses_correct_template(self):
         """View renders with dashboard/index.html."""
         response = self.client.get(f'/dashboard/{self.strike.pk}/')
         self.assertTemplateUsed(response, 'dashboard/index.html')
+
+
+class DashboardQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test that dashboard pages run a fixed number of queries however many strikes there are."""
+
+    def setUp(self):
+        seed_strikes(20)
+        self.strike = Strike.objects.order_by('pk').first()
+        self.strike.sources.add(Source.objects.create(name="Budget Source", url="https://example.com/budget"))
+
+    def grow(self):
+        seed_strikes(3000, seed=1)
+        seed_sources(6000)
+        self.strike.sources.add(*Source.objects.order_by('-pk')[:200])
+
+    def test_index_budget(self):
+        """The strike, its last-modified stamp and one sidebar page."""
+        self.assertQueryBudget(f'/dashboard/{self.strike.pk}/', 3, grow=self.grow)
+
+    def test_search_budget(self):
+        """Search falls back to prefix matching when few strikes match, never past four queries."""
+        self.assertQueryBudget('/dashboard/search/?section=dashboard&q=cocaine', 4)
+        self.grow()
+        self.assertQueryBudget('/dashboard/search/?section=dashboard&q=cocaine', 4)
+
+    def test_nearby_budget(self):
+        """The strike, then one query per cell level, never past five levels."""
+        path = f'/dashboard/{self.strike.pk}/nearby/'
+        self.assertQueryBudget(path, 1 + START_PRECISION)
+        self.grow()
+        self.assertQueryBudget(path, 1 + START_PRECISION)
+
+
+class GeohashTests(TestCase):
+    """Test the geohash helpers."""
+
+    def test_encode_known_points(self):
+        """Matches the reference geohashes."""
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash.encode(42.6, -5.6, 5), 'ezs42')
+        self.assertIsNone(geohash.encode_location(None, Decimal('1')))
+
+    def test_bounds_hold_the_point(self):
+        """A cell's bounds contain the point it was encoded from."""
+        south, north, west, east = geohash.bounds(geohash.encode(12.5, -70.25, 6))
+        self.assertTrue(south <= 12.5 < north and west <= -70.25 < east)
+
+    def test_neighbours(self):
+        """Eight cells of the same size touching the cell, wrapping at the antimeridian."""
+        self.assertEqual(
+            geohash.neighbours('ezs42'),
+            sorted(['ezefr', 'ezs43', 'ezefp', 'ezs40', 'ezs48', 'ezs49', 'ezefx', 'ezs41']),
+        )
+        east = geohash.encode(0.5, 179.9, 3)
+        self.assertIn(geohash.encode(0.5, -179.9, 3), geohash.neighbours(east))
+        self.assertEqual(len(geohash.neighbours(geohash.encode(89.9, 0, 2))), 5)
+
+    def test_save_keeps_geohash_current(self):
+        """Saving a strike, or just its location fields, updates the geohash."""
+        strike = Strike.objects.create(
+            date=date(2024, 1, 1), location_label="Hash", target="T", striker="S",
+            location_lat=Decimal('57.64911'), location_lon=Decimal('10.40744'),
+        )
+        self.assertEqual(Strike.objects.get(pk=strike.pk).geohash, 'u4pruydqq')
+        strike.location_lat = None
+        strike.save(update_fields=['location_lat'])
+        self.assertIsNone(Strike.objects.get(pk=strike.pk).geohash)
+
+
+class NearbyTests(TestCase):
+    """Test the nearest strikes lookup and the dashboard's nearby panel."""
+
+    def strike(self, lat, lon, uncertainty=None, label="Nearby"):
+        return Strike.objects.create(
+            date=date(2024, 3, 1), location_label=label, target="T", striker="S",
+            location_lat=Decimal(str(lat)), location_lon=Decimal(str(lon)),
+            location_uncertainty_m=uncertainty,
+        )
+
+    def test_matches_brute_force(self):
+        """Same strikes, in the same order, as measuring the distance to every strike."""
+        seed_strikes(500)
+        for strike in Strike.objects.order_by('pk')[:25]:
+            found = [s['pk'] for s in nearest(strike)]
+            lat, lon = float(strike.location_lat), float(strike.location_lon)
+            distances = sorted(
+                (haversine_km(lat, lon, float(other.location_lat), float(other.location_lon)), other.pk)
+                for other in Strike.objects.exclude(pk=strike.pk)
+            )
+            self.assertEqual(found, [pk for _, pk in distances[:NEARBY_COUNT]])
+
+    def test_finds_strikes_across_cell_edges(self):
+        """A strike just over a cell boundary beats one further away inside the cell."""
+        cell = geohash.encode(10.0, -70.0, START_PRECISION)
+        south, north, west, east = geohash.bounds(cell)
+        origin = self.strike(south + 0.001, west + 0.001)
+        over_the_edge = self.strike(south - 0.001, west - 0.001)
+        inside = self.strike(north - 0.001, east - 0.001)
+        self.assertEqual([s['pk'] for s in nearest(origin, count=2)], [over_the_edge.pk, inside.pk])
+        self.assertAlmostEqual(nearest(origin, count=1)[0]['distance_km'], 0.31, places=2)
+
+    def test_far_strikes_when_nothing_is_close(self):
+        """Widening reaches strikes hundreds of km away."""
+        origin = self.strike(10, -70)
+        far = self.strike(14, -64)
+        self.assertEqual([s['pk'] for s in nearest(origin)], [far.pk])
+        self.assertEqual(round(nearest(origin)[0]['distance_km']), 790)
+
+    def test_ties_go_to_the_more_certain_location(self):
+        """Equally distant strikes rank by location_uncertainty_m, unknown last."""
+        origin = self.strike(10, -70)
+        unknown = self.strike(10, -69.9)
+        vague = self.strike(10, -70.1, uncertainty=5000)
+        precise = self.strike(10, -69.9, uncertainty=50)
+        self.assertEqual([s['pk'] for s in nearest(origin)], [precise.pk, vague.pk, unknown.pk])
+
+    def test_no_location(self):
+        """A strike without coordinates has no neighbours."""
+        self.strike(10, -70)
+        lost = Strike.objects.create(date=date(2024, 1, 1), location_label="Lost", target="T", striker="S")
+        self.assertEqual(nearest(lost), [])
+        response = Client().get(f'/dashboard/{lost.pk}/nearby/')
+        self.assertContains(response, "No location is available")
+
+    def test_panel(self):
+        """The dashboard loads the panel, which lists neighbours with distances."""
+        origin = self.strike(10, -70)
+        self.strike(10, -69.9, uncertainty=250, label="Next Door")
+        self.assertContains(Client().get(f'/dashboard/{origin.pk}/'), f'hx-get="/dashboard/{origin.pk}/nearby/"')
+        response = Client().get(f'/dashboard/{origin.pk}/nearby/')
+        self.assertContains(response, "Next Door")
+        self.assertContains(response, "11.0 km")
+        self.assertContains(response, "± 250 m")
+        self.assertEqual(Client().get('/dashboard/999999/nearby/').status_code, 404)
+
+    def test_panel_follows_moves(self):
+        """Moving a strike shows up in its neighbours' cached panels."""
+        origin = self.strike(10, -70)
+        other = self.strike(10, -69.9, label="Mover")
+        Client().get(f'/dashboard/{origin.pk}/nearby/')
+        other.location_lat = Decimal('12')
+        other.save()
+        self.assertContains(Client().get(f'/dashboard/{origin.pk}/nearby/'), "222.")
+
+
+class StrikeLinkTests(TestCase):
+    """Test the strike-to-strike links through shared sources."""
+
+    def links(self):
+        return sorted(StrikeLink.objects.values_list('strike', 'related', 'shared_sources'))
+
+    def rebuilt(self):
+        related.rebuild()
+        return self.links()
+
+    def test_follows_link_changes(self):
+        """Adds, removes, clears and deletes keep the links the same as a rebuild."""
+        seed_strikes(30)
+        seed_sources(20, links_per_strike=2)
+        related.rebuild()
+        strikes = list(Strike.objects.order_by('pk'))
+        sources = list(Source.objects.order_by('pk'))
+
+        strikes[0].sources.add(*sources[:5])
+        strikes[1].sources.remove(*strikes[1].sources.all()[:1])
+        sources[6].strike_set.add(*strikes[10:15])
+        sources[7].strike_set.clear()
+        sources[8].delete()
+        strikes[2].delete()
+        incremental = self.links()
+        self.assertEqual(incremental, self.rebuilt())
+        self.assertTrue(incremental)
+
+    def test_counts_shared_sources_both_ways(self):
+        """Two shared sources make a link of two, stored from each side."""
+        a, b, c = (
+            Strike.objects.create(date=date(2024, 1, 1), location_label=name, target="T", striker="S")
+            for name in 'abc'
+        )
+        first, second = (Source.objects.create(name=n, url=f"https://example.com/{n}") for n in ('one', 'two'))
+        a.sources.add(first, second)
+        b.sources.add(first, second)
+        c.sources.add(second)
+        self.assertEqual(self.links(), sorted([
+            (a.pk, b.pk, 2), (b.pk, a.pk, 2), (a.pk, c.pk, 1), (c.pk, a.pk, 1), (b.pk, c.pk, 1), (c.pk, b.pk, 1),
+        ]))
+        self.assertEqual(
+            [(r['pk'], r['shared_sources']) for r in related.related_strikes(a.pk)],
+            [(b.pk, 2), (c.pk, 1)],
+        )
+
+    def test_refresh_reports_changed_neighbours(self):
+        """Only strikes whose links changed come back."""
+        a, b, c = (
+            Strike.objects.create(date=date(2024, 1, 1), location_label=name, target="T", striker="S")
+            for name in 'abc'
+        )
+        shared = Source.objects.create(name="Shared", url="https://example.com/shared")
+        a.sources.add(shared)
+        c.sources.add(shared)
+        Strike.sources.through.objects.create(strike=b, source=shared)
+        self.assertEqual(related.refresh([b.pk]), {a.pk, c.pk})
+        self.assertEqual(related.refresh([b.pk]), set())
+
+
+class StrikeDetailTests(TestCase):
+    """Test load_strike and the previous/next links on the strike pages."""
+
+    def setUp(self):
+        # Two strikes on the middle day, so the pk tiebreak is exercised
+        self.strikes = [
+            Strike.objects.create(date=date(2024, 5, day), location_label=f"Detail {i}", target="T", striker="S")
+            for i, day in enumerate((1, 2, 2, 3))
+        ]
+
+    def test_neighbours_in_date_then_pk_order(self):
+        """Each strike links to the ones either side of it, the ends to nothing."""
+        pks = [s.pk for s in self.strikes]
+        for i, pk in enumerate(pks):
+            strike = load_strike(pk)
+            self.assertEqual(strike.previous and strike.previous['pk'], pks[i - 1] if i else None)
+            self.assertEqual(strike.next and strike.next['pk'], pks[i + 1] if i + 1 < len(pks) else None)
+        self.assertEqual(load_strike(pks[1]).next, {'pk': pks[2], 'date': date(2024, 5, 2), 'location_label': "Detail 2"})
+
+    def test_query_counts(self):
+        """One query for the strike and its neighbours, one more for its sources."""
+        strike = self.strikes[1]
+        strike.sources.add(Source.objects.create(name="Detail Source", url="https://example.com/detail"))
+        with self.assertNumQueries(1):
+            load_strike(strike.pk)
+        with self.assertNumQueries(2):
+            loaded = load_strike(strike.pk, sources=True)
+            self.assertEqual([s.name for s in loaded.sources.all()], ["Detail Source"])
+        with self.assertRaises(Strike.DoesNotExist):
+            load_strike(999999)
+
+    def test_pages_link_neighbours(self):
+        """Both pages link to the neighbours' page of the same kind."""
+        first, second, third = self.strikes[:3]
+        response = Client().get(f'/dashboard/{second.pk}/')
+        self.assertContains(response, f'href="/dashboard/{first.pk}/"\n      rel="prev"')
+        self.assertContains(response, f'href="/dashboard/{third.pk}/"\n      rel="next"')
+        response = Client().get(f'/sources/{first.pk}/')
+        self.assertContains(response, "First strike")
+        self.assertContains(response, f'href="/sources/{second.pk}/"\n      rel="next"')
+
+    def test_neighbours_follow_new_strikes(self):
+        """A strike dated in between becomes the neighbour on the cached pages."""
+        first, second = self.strikes[:2]
+        Client().get(f'/dashboard/{first.pk}/')
+        between = Strike.objects.create(date=date(2024, 5, 1), location_label="Between", target="T", striker="S")
+        self.assertContains(Client().get(f'/dashboard/{first.pk}/'), f'href="/dashboard/{between.pk}/"\n      rel="next"')
+
+
+class SidebarPaginationTests(TestCase):
+    """Test keyset pagination of the strike sidebar."""
+
+    def setUp(self):
+        self.client = Client()
+        # Two strikes per day so the pk tiebreak is exercised
+        self.strikes = [
+            Strike.objects.create(
+                date=date(2024, 1, 1 + i // 2),
+                location_label=f"Strike {i}",
+                target="Target",
+                striker="Striker",
+            )
+            for i in range(SIDEBAR_PAGE_SIZE + 10)
+        ]
+        self.newest_first = sorted(self.strikes, key=lambda s: (s.date, s.pk), reverse=True)
+
+    def test_first_page_is_limited(self):
+        """Only the first page of strikes is rendered with the page."""
+        response = self.client.get(f'/dashboard/{self.newest_first[0].pk}/')
+        self.assertEqual(
+            sidebar_pks(response),
+            [strike.pk for strike in self.newest_first[:SIDEBAR_PAGE_SIZE]],
+        )
+        self.assertContains(response, 'data-strike-dot=', count=SIDEBAR_PAGE_SIZE)
+        self.assertContains(response, 'hx-get="/dashboard/sidebar/?section=dashboard&after=')
+        self.assertIsNone(response.context['pinned_strike'])
+
+    def test_pages_cover_every_strike_once(self):
+        """Walking the cursors returns every strike exactly once, in order."""
+        seen, cursor = [], None
+        while True:
+            page, next_cursor = strike_page(decode_cursor(cursor) if cursor else None, size=7)
+            seen.extend(entry.pk for entry in page)
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+        self.assertEqual(seen, [strike.pk for strike in self.newest_first])
+
+    def test_selected_strike_outside_first_page_is_pinned(self):
+        """A selected strike beyond the first page is still shown and highlighted."""
+        oldest = self.newest_first[-1]
+        response = self.client.get(f'/dashboard/{oldest.pk}/')
+        self.assertEqual(response.context['pinned_strike'], oldest)
+        self.assertContains(response, f'href="/dashboard/{oldest.pk}/"')
+        self.assertContains(response, 'id="pinned-strike"', count=1)
+
+    def test_pin_is_dropped_when_its_page_loads(self):
+        """The page holding the pinned strike removes the pin, so it isn't listed twice."""
+        oldest = self.newest_first[-1]
+        cursor = encode_cursor(self.newest_first[SIDEBAR_PAGE_SIZE - 1])
+        response = self.client.get('/dashboard/sidebar/', {'after': cursor, 'selected': oldest.pk})
+        self.assertContains(response, SELECTED_DOT.format(pk=oldest.pk))
+        self.assertContains(response, UNPIN, count=1)
+        # Pages without it leave the pin alone
+        response = self.client.get('/dashboard/sidebar/', {'after': cursor, 'selected': self.newest_first[0].pk})
+        self.assertNotContains(response, 'pinned-strike')
+
+    def test_sidebar_page_endpoint(self):
+        """HTMX endpoint returns the rows after the cursor and no further sentinel."""
+        cursor = encode_cursor(self.newest_first[SIDEBAR_PAGE_SIZE - 1])
+        response = self.client.get('/dashboard/sidebar/', {'section': 'sources', 'after': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-strike-dot=', count=len(self.strikes) - SIDEBAR_PAGE_SIZE)
+        self.assertContains(response, f'href="/sources/{self.newest_first[-1].pk}/"')
+        self.assertNotContains(response, 'hx-get')
+
+    def test_no_selection_sends_zero(self):
+        """Without a selected strike both sidebars send 0, which the page endpoint accepts."""
+        for section, template in (('dashboard', 'strikes_sidebar'), ('sources', 'sources_sidebar')):
+            html = render_to_string(f'partials/{template}.html', sidebar_context(section))
+            self.assertIn('"selected": "0"', html)
+            self.assertNotIn('None', html)
+        cursor = encode_cursor(self.newest_first[SIDEBAR_PAGE_SIZE - 1])
+        response = self.client.get('/dashboard/sidebar/', {'after': cursor, 'selected': '0'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_sidebar_page_rejects_bad_cursor(self):
+        """Malformed cursors and unknown sections return 400."""
+        self.assertEqual(self.client.get('/dashboard/sidebar/', {'after': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get('/dashboard/sidebar/', {'section': 'x', 'after': '2024-01-01.1'}).status_code, 400)
+
+
+class PageCacheTests(TestCase):
+    """Test the rendered page cache and its invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15),
+            location_label="Cached Strike",
+            target="Target",
+            striker="Striker",
+        )
+        self.other = Strike.objects.create(
+            date=date(2024, 2, 1),
+            location_label="Other Strike",
+            target="Target",
+            striker="Striker",
+        )
+        self.urls = [
+            f'/{kind}/{strike.pk}/'
+            for strike in (self.strike, self.other)
+            for kind in ('dashboard', 'sources')
+        ]
+
+    def cache_status(self, url):
+        return self.client.get(url)['X-Page-Cache']
+
+    def prime(self):
+        for url in self.urls:
+            self.client.get(url)
+
+    def test_second_request_is_served_from_cache(self):
+        """Repeat requests hit the cache and are counted."""
+        reset_page_cache_stats()
+        url = f'/dashboard/{self.strike.pk}/'
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(page_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_edit_evicts_only_that_strikes_pages(self):
+        """Editing a field outside the sidebar evicts just the edited strike."""
+        self.prime()
+        self.strike.summary = "Updated summary"
+        self.strike.save()
+
+        self.assertEqual(self.cache_status(f'/dashboard/{self.strike.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/sources/{self.strike.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/dashboard/{self.other.pk}/'), 'hit')
+        self.assertEqual(self.cache_status(f'/sources/{self.other.pk}/'), 'hit')
+        self.assertContains(self.client.get(f'/dashboard/{self.strike.pk}/'), "Updated summary")
+
+    def test_sidebar_edit_evicts_every_page(self):
+        """Editing a field shown in the sidebar evicts every page."""
+        self.prime()
+        self.strike.location_label = "Renamed"
+        self.strike.save()
+        for url in self.urls:
+            self.assertEqual(self.cache_status(url), 'miss')
+
+    def test_new_and_deleted_strikes_evict_every_page(self):
+        """Adding or removing a strike changes the sidebar everywhere."""
+        self.prime()
+        extra = Strike.objects.create(
+            date=date(2024, 3, 1), location_label="Extra", target="T", striker="S",
+        )
+        self.assertEqual(self.cache_status(self.urls[-1]), 'miss')
+        self.prime()
+        extra.delete()
+        self.assertEqual(self.cache_status(self.urls[-1]), 'miss')
+
+    def test_post_is_not_cached(self):
+        """Only GET/HEAD responses go through the cache."""
+        self.client.get(f'/dashboard/{self.strike.pk}/')
+        response = self.client.post(f'/dashboard/{self.strike.pk}/')
+        self.assertNotIn('X-Page-Cache', response)
+
+
+class SidebarFragmentCacheTests(TestCase):
+    """Test the shared, pre-rendered sidebar list."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Fragment Strike", target="T", striker="S",
+        )
+        self.other = Strike.objects.create(
+            date=date(2024, 2, 1), location_label="Other Strike", target="T", striker="S",
+        )
+
+    def test_list_rendered_once_per_version(self):
+        """The list is queried once and then served from the cache."""
+        with self.assertNumQueries(1):
+            first = render_strike_list('dashboard')
+        with self.assertNumQueries(0):
+            self.assertEqual(render_strike_list('dashboard'), first)
+
+    def test_strike_write_rerenders_list(self):
+        """A new strike bumps the version and shows up in the list."""
+        render_strike_list('dashboard')
+        Strike.objects.create(date=date(2024, 3, 1), location_label="Brand New", target="T", striker="S")
+        self.assertIn("Brand New", render_strike_list('dashboard'))
+
+    def test_cached_list_has_nothing_selected(self):
+        """Selection is applied per request, never baked into the fragment."""
+        self.client.get(f'/dashboard/{self.strike.pk}/')
+        self.assertNotIn('rounded-full bg-amber-500/90', render_strike_list('dashboard'))
+
+    def test_select_strike_marks_one_row(self):
+        """Only the requested strike gets the filled dot."""
+        html, found = select_strike(render_strike_list('sources'), self.strike.pk)
+        self.assertTrue(found)
+        self.assertIn(SELECTED_DOT.format(pk=self.strike.pk), html)
+        self.assertIn(UNSELECTED_DOT.format(pk=self.other.pk), html)
+
+    def test_page_highlights_current_strike(self):
+        """Dashboard and sources pages highlight the strike being viewed."""
+        for url in (f'/dashboard/{self.strike.pk}/', f'/sources/{self.strike.pk}/'):
+            response = self.client.get(url)
+            self.assertContains(response, SELECTED_DOT.format(pk=self.strike.pk), count=1)
+            self.assertContains(response, UNSELECTED_DOT.format(pk=self.other.pk), count=1)
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag/Last-Modified revalidation of strike pages."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Validated Strike", target="T", striker="S",
+        )
+        self.source = Source.objects.create(name="Validated Source", url="https://example.com/v")
+        self.strike.sources.add(self.source)
+        self.url = f'/dashboard/{self.strike.pk}/'
+
+    def revalidate(self, response):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_response_carries_validators(self):
+        """Pages are sent with ETag, Last-Modified and no-cache."""
+        response = self.client.get(self.url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_unchanged_page_is_304_without_queries(self):
+        """Revalidating an unchanged page touches neither DB nor templates."""
+        response = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            revalidated = self.revalidate(response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+
+    def test_if_modified_since(self):
+        """If-Modified-Since with the sent Last-Modified answers 304."""
+        response = self.client.get(self.url)
+        revalidated = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_strike_edit_changes_validator(self):
+        """Editing the strike makes the old ETag stale."""
+        response = self.client.get(self.url)
+        self.strike.summary = "New summary"
+        self.strike.save()
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_source_changes_change_validator(self):
+        """Editing or unlinking a linked source makes the old ETag stale."""
+        response = self.client.get(self.url)
+        self.source.name = "Renamed"
+        self.source.save()
+        response = self.revalidate(response)
+        self.assertEqual(response.status_code, 200)
+
+        self.strike.sources.remove(self.source)
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_sidebar_change_changes_validator(self):
+        """A new strike in the sidebar makes every old ETag stale."""
+        response = self.client.get(self.url)
+        Strike.objects.create(date=date(2024, 5, 1), location_label="New", target="T", striker="S")
+        self.assertEqual(self.revalidate(response).status_code, 200)
+
+    def test_sources_page_has_its_own_etag(self):
+        """Dashboard and sources pages of one strike don't share an ETag."""
+        dashboard = self.client.get(self.url)
+        sources = self.client.get(f'/sources/{self.strike.pk}/')
+        self.assertNotEqual(dashboard['ETag'], sources['ETag'])
+        self.assertEqual(
+            self.client.get(f'/sources/{self.strike.pk}/', HTTP_IF_NONE_MATCH=sources['ETag']).status_code,
+            304,
+        )
+
+
+class AsgiStackTests(TransactionTestCase):
+    """Test the async views and middleware the way ASGI servers run them."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(asyncdb.shutdown)
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Async Strike", target="T", striker="S",
+        )
+        self.strike.sources.add(Source.objects.create(name="Async Source", url="https://example.com/a"))
+
+    def get(self, path, **extra):
+        return async_to_sync(self.async_client.get)(path, **extra)
+
+    def test_gather_runs_queries_concurrently(self):
+        """Under ASGI independent queries overlap, each on its own connection."""
+        def sleep():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_sleep(0.3)')
+            return threading.get_ident()
+
+        request = AsyncRequestFactory().get('/')
+        start = time.perf_counter()
+        threads = async_to_sync(asyncdb.gather)(request, sleep, sleep, sleep)
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual(len(set(threads)), 3)
+
+    def test_gather_hands_pooled_connections_back(self):
+        """With the connection pool, database threads don't hold on to connections."""
+        pool = connection.pool
+        request = AsyncRequestFactory().get('/')
+        async_to_sync(asyncdb.gather)(request, Strike.objects.count, Source.objects.count)
+        stats = pool.get_stats()
+        # Only this test's own connection is still out
+        self.assertEqual(stats['pool_size'] - stats['pool_available'], 1 if connection.connection else 0)
+
+    def test_gather_stays_on_the_calling_thread_outside_asgi(self):
+        """Outside ASGI the calls share the request's thread and connection."""
+        request = RequestFactory().get('/')
+        threads = async_to_sync(asyncdb.gather)(request, threading.get_ident, threading.get_ident)
+        self.assertEqual(threads, [threading.get_ident()] * 2)
+
+    def test_pages_render(self):
+        """Dashboard, sources and submit pages come back whole over ASGI."""
+        self.assertContains(self.get(f'/dashboard/{self.strike.pk}/'), "Async Strike")
+        self.assertContains(self.get(f'/sources/{self.strike.pk}/'), "Async Source")
+        self.assertContains(self.get('/submit/'), "Submit Source")
+        self.assertContains(self.get('/submit/strike-search/', QUERY_STRING='q=async'), "Async Strike")
+
+    def test_conditional_and_cached_pages(self):
+        """Revalidation and the page cache work on the async views."""
+        first = self.get(f'/sources/{self.strike.pk}/')
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertEqual(self.get(f'/sources/{self.strike.pk}/')['X-Page-Cache'], 'hit')
+        self.assertEqual(self.get(f'/sources/{self.strike.pk}/', headers={'if-none-match': first['ETag']}).status_code, 304)
+
+    def test_deploy_checks_see_the_stock_middleware(self):
+        """Security, CSRF and clickjacking middleware are the stock classes the deploy checks look for."""
+        self.assertEqual(check_security_middleware(None), [])
+        self.assertEqual(check_csrf_middleware(None), [])
+        self.assertEqual(check_xframe_options_middleware(None), [])
+        self.assertFalse([check for check in settings.SILENCED_SYSTEM_CHECKS if check.startswith('security.')])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class StaticFilesTests(TestCase):
+    """Test the hashed, compressed static files and how they're served."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Compressing the admin's files takes a few seconds, do it once
+        root = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(root.cleanup)
+        cls.root = root.name
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.root))
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def setUp(self):
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Static Strike", target="T", striker="S",
+        )
+
+    def stylesheet(self, response):
+        href = response.content.decode().split('rel="stylesheet" type="text/css" href="')[1].split('"')[0]
+        self.assertRegex(href, r'^/static/css/dist/styles\.[0-9a-f]{12}\.css$')
+        return href
+
+    def test_pages_link_the_hashed_stylesheet(self):
+        """Templates ask for the hashed copy, served pre-compressed and cached for good."""
+        href = self.stylesheet(Client().get(f'/dashboard/{self.strike.pk}/'))
+        response = Client().get(href, headers={'accept-encoding': 'gzip, br'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_served_under_asgi(self):
+        """Under ASGI static files come back whole, pre-compressed."""
+        href = self.stylesheet(Client().get('/submit/'))
+        response = async_to_sync(self.async_client.get)(href, headers={'accept-encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        self.assertEqual(int(response['Content-Length']), len(body))
+
+    def test_plain_names_without_a_manifest(self):
+        """Before collectstatic has run, templates fall back to the unhashed name."""
+        empty = tempfile.TemporaryDirectory()
+        self.addCleanup(empty.cleanup)
+        with override_settings(STATIC_ROOT=empty.name):
+            response = Client().get('/submit/')
+        self.assertContains(response, 'href="/static/css/dist/styles.css"')
+
+
+class StrikeListEntryTests(TestCase):
+    """Test the compact strike list read model stays in step with Strike."""
+
+    def setUp(self):
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Listed", target="T", striker="S",
+            summary="x" * 1500,
+        )
+
+    def test_entry_created_with_strike(self):
+        """Creating a strike creates its list entry."""
+        entry = StrikeListEntry.objects.get(pk=self.strike.pk)
+        self.assertEqual((entry.date, entry.location_label), (self.strike.date, "Listed"))
+        self.assertEqual(str(entry), str(self.strike))
+
+    def test_entry_follows_list_fields(self):
+        """Changing date or label updates the entry."""
+        self.strike.date = date(2024, 2, 2)
+        self.strike.location_label = "Moved"
+        self.strike.save()
+        entry = StrikeListEntry.objects.get(pk=self.strike.pk)
+        self.assertEqual((entry.date, entry.location_label), (date(2024, 2, 2), "Moved"))
+
+    def test_entry_deleted_with_strike(self):
+        """Deleting a strike removes its entry."""
+        self.strike.delete()
+        self.assertFalse(StrikeListEntry.objects.exists())
+
+    def test_sync_upserts(self):
+        """sync() inserts missing entries and refreshes stale ones."""
+        StrikeListEntry.objects.all().delete()
+        StrikeListEntry.sync([self.strike])
+        Strike.objects.filter(pk=self.strike.pk).update(location_label="Bulk edit")
+        self.strike.refresh_from_db()
+        StrikeListEntry.sync([self.strike])
+        self.assertEqual(StrikeListEntry.objects.get().location_label, "Bulk edit")
+
+
+class ClusterIndexTests(TestCase):
+    """Test the in-process grid behind the overview map."""
+
+    def test_counts_add_up_at_every_zoom(self):
+        """Clusters at any zoom account for every point exactly once."""
+        index = ClusterIndex()
+        for pk in range(200):
+            index.update(pk, 5 + (pk % 20), -80 + (pk % 17))
+        for zoom in (0, 4, 9, MAX_ZOOM):
+            clusters = index.query(-180, -90, 180, 90, zoom)
+            self.assertEqual(sum(c['count'] for c in clusters), 200)
+
+    def test_update_and_discard(self):
+        """Moving or removing a point leaves no trace at the old spot."""
+        index = ClusterIndex()
+        index.update(1, 10.0, -70.0)
+        index.update(1, -10.0, 70.0)
+        self.assertEqual(index.query(-75, 5, -65, 15, 6), [])
+        self.assertEqual(index.query(65, -15, 75, -5, 6), [{'lat': -10.0, 'lon': 70.0, 'count': 1, 'pk': 1}])
+        index.discard(1)
+        self.assertEqual(index.query(-180, -90, 180, 90, 0), [])
+        self.assertEqual(index.leaf_pks, {})
+
+    def test_nearby_points_merge_when_zoomed_out(self):
+        """Close points are one cluster zoomed out and apart zoomed in."""
+        index = ClusterIndex()
+        index.update(1, 10.0, -70.0)
+        index.update(2, 10.001, -70.001)
+        self.assertEqual([c['count'] for c in index.query(-80, 0, -60, 20, 3)], [2])
+        self.assertEqual(len(index.query(-80, 0, -60, 20, MAX_ZOOM)), 2)
+
+    def test_bbox_across_antimeridian(self):
+        """A bbox with west > east covers both sides of the antimeridian."""
+        index = ClusterIndex()
+        index.update(1, 0.0, 179.5)
+        index.update(2, 0.0, -179.5)
+        index.update(3, 0.0, 0.0)
+        clusters = index.query(179, -1, -179, 1, 10)
+        self.assertEqual(sorted(c['pk'] for c in clusters), [1, 2])
+
+
+class ClusterEndpointTests(TestCase):
+    """Test the cluster endpoint and that Strike writes keep it current."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15),
+            location_label="Mapped",
+            location_lat=Decimal("12.00000000000000"),
+            location_lon=Decimal("-70.00000000000000"),
+            target="T",
+            striker="S",
+        )
+
+    def clusters(self, bbox='-180,-90,180,90', zoom=8):
+        return self.client.get('/dashboard/clusters/', {'bbox': bbox, 'zoom': zoom}).json()['clusters']
+
+    def test_returns_strike(self):
+        """A lone strike comes back with its pk."""
+        self.assertEqual(self.clusters(), [{'lat': 12.0, 'lon': -70.0, 'count': 1, 'pk': self.strike.pk}])
+
+    def test_follows_strike_writes(self):
+        """Creating, moving and deleting strikes show up once committed, without a restart."""
+        self.clusters()
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Strike.objects.create(
+                date=date(2024, 1, 16), location_label="Other", target="T", striker="S",
+                location_lat=Decimal("12.00010000000000"), location_lon=Decimal("-70.00010000000000"),
+            )
+        self.assertEqual([c['count'] for c in self.clusters(zoom=2)], [2])
+
+        other.location_lat = Decimal("-30.00000000000000")
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        self.assertEqual(len(self.clusters(bbox='-80,0,-60,20')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(sum(c['count'] for c in self.clusters(zoom=2)), 1)
+
+    def test_rolled_back_moves_are_not_kept(self):
+        """The index is only patched on commit, a rolled back move never reaches it."""
+        self.clusters()
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            self.strike.location_lat = Decimal("-30.00000000000000")
+            self.strike.save()
+            raise DatabaseError("rolled back")
+        self.assertEqual(self.clusters()[0]['lat'], 12.0)
+
+    def test_rebuilds_after_missed_change(self):
+        """A version bump from another worker makes the index reload."""
+        self.clusters()
+        Strike.objects.filter(pk=self.strike.pk).update(location_lat=Decimal("-45.00000000000000"))
+        bump_version(STRIKE_GEO)
+        self.assertEqual(self.clusters()[0]['lat'], -45.0)
+
+    def test_queries_wait_for_writers(self):
+        """A query doesn't walk the cells while a writer holds the lock."""
+        self.clusters()
+        result = []
+        with clusters._lock:
+            reader = threading.Thread(target=lambda: result.append(clusters.query(-180, -90, 180, 90, 8)))
+            reader.start()
+            reader.join(0.2)
+            self.assertTrue(reader.is_alive())
+        reader.join()
+        self.assertEqual(result[0][0]['count'], 1)
+
+    def test_queries_use_the_old_index_during_a_reload(self):
+        """While another thread reloads, queries answer from the index they have."""
+        self.clusters()
+        Strike.objects.filter(pk=self.strike.pk).update(location_lat=Decimal("-45.00000000000000"))
+        bump_version(STRIKE_GEO)
+        with clusters._reload_lock:
+            self.assertEqual(self.clusters()[0]['lat'], 12.0)
+        self.assertEqual(self.clusters()[0]['lat'], -45.0)
+
+    def test_bad_parameters_are_400(self):
+        """Missing or malformed bbox and zoom are rejected."""
+        for params in ({}, {'bbox': '1,2,3', 'zoom': 1}, {'bbox': '1,2,3,4', 'zoom': 'x'}, {'bbox': 'nan,1,2,3', 'zoom': 1}):
+            self.assertEqual(self.client.get('/dashboard/clusters/', params).status_code, 400)
+
+
+class PrefixIndexTests(TestCase):
+    """Test the in-process prefix index behind the strike picker."""
+
+    def setUp(self):
+        self.index = PrefixIndex()
+        self.index.load([
+            (1, date(2025, 9, 2), "Caribbean Sea, off Venezuela"),
+            (2, date(2025, 10, 14), "Eastern Pacific"),
+            (3, date(2025, 10, 16), "Caribbean Sea"),
+        ])
+
+    def pks(self, query, limit=TYPEAHEAD_LIMIT):
+        return [pk for pk, _, _ in self.index.search(query, limit)]
+
+    def test_matches_label_prefixes_newest_first(self):
+        """Every term has to prefix a label word, newest strike first."""
+        self.assertEqual(self.pks('carib'), [3, 1])
+        self.assertEqual(self.pks('carib venez'), [1])
+        self.assertEqual(self.pks('PACIF'), [2])
+        self.assertEqual(self.pks('caribbean atlantic'), [])
+
+    def test_matches_date_prefixes(self):
+        """ISO dates and the start of them match."""
+        self.assertEqual(self.pks('2025-10'), [3, 2])
+        self.assertEqual(self.pks('2025-09-02'), [1])
+        self.assertEqual(self.pks('2025-10 sea'), [3])
+
+    def test_empty_query_gives_newest(self):
+        """No terms means the newest strikes."""
+        self.assertEqual(self.pks(''), [3, 2, 1])
+
+    def test_limit_is_strict(self):
+        """Never more than the limit, however many strikes match."""
+        self.index.load([(pk, date(2025, 1, 1), "Caribbean Sea") for pk in range(1, 500)])
+        self.assertEqual(self.pks('sea', limit=5), [499, 498, 497, 496, 495])
+        self.assertEqual(len(self.pks('')), TYPEAHEAD_LIMIT)
+
+    def test_update_and_discard(self):
+        """Relabelled or removed strikes leave no trace under their old words."""
+        self.index.update(2, date(2025, 10, 14), "Gulf of Mexico")
+        self.assertEqual(self.pks('pacific'), [])
+        self.assertEqual(self.pks('gulf'), [2])
+        self.index.update(3, None, None)
+        self.assertEqual(self.pks('carib'), [1])
+        self.assertNotIn('pacific', self.index.vocabulary)
+
+
+class TypeaheadRefreshTests(TestCase):
+    """Test that Strike writes keep the typeahead current."""
+
+    def setUp(self):
+        cache.clear()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Caribbean Sea", target="T", striker="S",
+        )
+
+    def pks(self, query):
+        return [pk for pk, _, _ in typeahead.search(query)]
+
+    def test_follows_strike_writes(self):
+        """Creating, relabelling and deleting strikes show up once committed, without a restart."""
+        self.assertEqual(self.pks('carib'), [self.strike.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Strike.objects.create(date=date(2024, 1, 16), location_label="Eastern Pacific", target="T", striker="S")
+        self.assertEqual(self.pks('east'), [other.pk])
+
+        other.location_label = "Caribbean, north of Aruba"
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+        self.assertEqual(self.pks('east'), [])
+        self.assertEqual(self.pks('carib'), [other.pk, self.strike.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.pks('carib'), [self.strike.pk])
+
+    def test_rolled_back_labels_are_not_kept(self):
+        """The index is only patched on commit, a rolled back label never reaches it."""
+        self.pks('carib')
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            self.strike.location_label = "Gulf of Mexico"
+            self.strike.save()
+            raise DatabaseError("rolled back")
+        self.assertEqual(self.pks('gulf'), [])
+        self.assertEqual(self.pks('carib'), [self.strike.pk])
+
+    def test_rebuilds_after_bulk_write(self):
+        """Bulk writers only bump the version, the index reloads from the list."""
+        self.pks('carib')
+        self.strike.location_label = "Gulf of Mexico"
+        strikes_bulk_saved.send(sender=Strike, strikes=[self.strike], previous={})
+        self.assertEqual(self.pks('gulf'), [self.strike.pk])
+
+    def test_searches_use_the_old_index_during_a_reload(self):
+        """While another thread reloads, searches answer from the index they have."""
+        self.pks('carib')
+        StrikeListEntry.objects.filter(pk=self.strike.pk).update(location_label="Gulf of Mexico")
+        bump_version(STRIKE_LABELS)
+        with typeahead._reload_lock:
+            self.assertEqual(self.pks('carib'), [self.strike.pk])
+        self.assertEqual(self.pks('gulf'), [self.strike.pk])
+
+
+class StrikeSearchTests(TestCase):
+    """Test full-text search over strikes and the sidebar search endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        self.in_label = Strike.objects.create(
+            date=date(2024, 1, 10), location_label="Gulf of Venezuela",
+            target="Go-fast boat", striker="US Navy", summary="Routine patrol.",
+        )
+        self.in_summary = Strike.objects.create(
+            date=date(2024, 1, 12), location_label="Eastern Pacific",
+            target="Semi-submersible", striker="US Southern Command",
+            target_destination="Mexico", summary="Vessel departed Venezuela with cocaine.",
+        )
+
+    def pks(self, text, page=1):
+        return [strike.pk for strike in search_strikes(text, page)[0]]
+
+    def test_matches_every_searched_column(self):
+        """Label, target, striker, destination and summary are all searched."""
+        self.assertEqual(self.pks("go-fast"), [self.in_label.pk])
+        self.assertEqual(self.pks("southern command"), [self.in_summary.pk])
+        self.assertEqual(self.pks("mexico"), [self.in_summary.pk])
+        self.assertEqual(self.pks("cocaine"), [self.in_summary.pk])
+
+    def test_label_match_ranks_first(self):
+        """A hit in the label beats a newer hit in the summary."""
+        self.assertEqual(self.pks("venezuela"), [self.in_label.pk, self.in_summary.pk])
+
+    def test_last_word_matches_as_prefix(self):
+        """Half-typed last words still find strikes."""
+        self.assertEqual(self.pks("submers"), [self.in_summary.pk])
+        self.assertEqual(self.pks("eastern pac"), [self.in_summary.pk])
+
+    def test_query_syntax_is_ignored(self):
+        """tsquery operators in the input are treated as plain text."""
+        self.assertEqual(self.pks("cocaine & | !( :*"), [self.in_summary.pk])
+        self.assertEqual(self.pks("&|!"), [])
+
+    def test_follows_edits(self):
+        """The search vector is regenerated when a strike changes."""
+        self.in_label.summary = "Footage released by the Secretary."
+        self.in_label.save()
+        self.assertEqual(self.pks("footage"), [self.in_label.pk])
+
+    def test_pages(self):
+        """Results are paged, the last page has no next page."""
+        Strike.objects.bulk_create([
+            Strike(date=date(2023, 1, 1), location_label="Paged", target="T", striker="S")
+            for _ in range(SEARCH_PAGE_SIZE)
+        ])
+        first, next_page = search_strikes("paged")
+        self.assertEqual((len(first), next_page), (SEARCH_PAGE_SIZE, None))
+        Strike.objects.create(date=date(2023, 1, 2), location_label="Paged", target="T", striker="S")
+        first, next_page = search_strikes("paged")
+        second, last = search_strikes("paged", next_page)
+        self.assertEqual((len(second), last), (1, None))
+        self.assertFalse({s.pk for s in first} & {s.pk for s in second})
+
+    def test_endpoint_renders_rows(self):
+        """The endpoint returns sidebar rows linking into the right section."""
+        response = self.client.get('/dashboard/search/', {
+            'q': 'cocaine', 'section': 'sources', 'selected': self.in_summary.pk,
+        })
+        self.assertContains(response, f'href="/sources/{self.in_summary.pk}/"')
+        self.assertContains(response, SELECTED_DOT.format(pk=self.in_summary.pk), html=False)
+        self.assertNotContains(response, f'/sources/{self.in_label.pk}/')
+
+    def test_endpoint_no_results_and_empty_query(self):
+        """No match says so, an empty box brings back the normal list."""
+        self.assertContains(self.client.get('/dashboard/search/', {'q': 'zzzz'}), 'No strikes match')
+        response = self.client.get('/dashboard/search/', {'q': ' '})
+        self.assertContains(response, f'/dashboard/{self.in_label.pk}/')
+        self.assertContains(response, f'/dashboard/{self.in_summary.pk}/')
+
+    def test_endpoint_bad_parameters_are_400(self):
+        """Unknown sections and bad pages are rejected."""
+        for params in ({'section': 'nope'}, {'q': 'x', 'page': '0'}, {'q': 'x', 'page': 'x'}):
+            self.assertEqual(self.client.get('/dashboard/search/', params).status_code, 400)
+
+    def test_sidebar_has_search_box(self):
+        """The dashboard sidebar carries the HTMX search input."""
+        response = self.client.get(f'/dashboard/{self.in_label.pk}/')
+        self.assertContains(response, 'hx-get="/dashboard/search/"')
+        self.assertContains(response, 'id="strike-list"')
+
+
+class SeedSyntheticTests(TestCase):
+    """Test the seed_synthetic data generator."""
+
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_synthetic', *args, stdout=out)
+        return out.getvalue()
+
+    def rows(self):
+        return (
+            list(Strike.objects.order_by('pk').values_list('date', 'location_label', 'number_killed')),
+            list(Source.objects.order_by('pk').values_list('url', flat=True)),
+            list(Submission.objects.order_by('pk').values_list('source_url', 'approved', 'new_strike')),
+        )
+
+    def test_counts_scale_with_strikes(self):
+        """Sources, links and submissions follow the strike count, rollups are rebuilt."""
+        self.assertIn("100 strikes, 200 sources, 20 submissions", self.seed('--strikes', '100'))
+        self.assertEqual(StrikeListEntry.objects.count(), 100)
+        self.assertEqual(Strike.sources.through.objects.values('strike').distinct().count(), 100)
+        self.assertTrue(Submission.objects.exclude(duplicate_of=None).exists())
+        self.assertTrue(StrikeRollup.objects.exists())
+
+    def test_same_seed_same_rows(self):
+        """Seeding an empty database twice with the same options gives the same data."""
+        self.seed('--strikes', '60', '--seed', '3')
+        first = self.rows()
+        Submission.objects.all().delete()
+        Strike.objects.all().delete()
+        Source.objects.all().delete()
+        self.seed('--strikes', '60', '--seed', '3')
+        self.assertEqual(self.rows(), first)
+
+    def test_refuses_to_mix_without_top_up(self):
+        """A database with strikes in it is only added to when asked."""
+        self.seed('--strikes', '20')
+        with self.assertRaises(CommandError):
+            self.seed('--strikes', '40')
+        self.assertIn("40 strikes, 80 sources", self.seed('--strikes', '40', '--top-up'))
+
+
+class SiteBuildTests(TestCase):
+    """Test the static copy of the strike pages from build_site."""
+
+    def setUp(self):
+        out = tempfile.TemporaryDirectory()
+        self.addCleanup(out.cleanup)
+        self.out = out.name
+        self.strikes = [
+            Strike.objects.create(
+                date=date(2024, 1, day), location_label=f"Site Strike {day}", target="T", striker="S",
+            )
+            for day in range(1, 4)
+        ]
+        self.source = Source.objects.create(name="Site Source", url="https://example.com/site")
+        self.strikes[0].sources.add(self.source)
+
+    def build(self, *args):
+        out = StringIO()
+        call_command('build_site', '--output', self.out, '--workers', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def page(self, kind, strike):
+        with open(os.path.join(self.out, kind, str(strike.pk), 'index.html')) as f:
+            return f.read()
+
+    def test_renders_every_page_like_the_view(self):
+        """Both pages of every strike are written where the site serves them."""
+        self.assertIn("3 strikes rendered, 0 unchanged", self.build())
+        strike = self.strikes[0]
+        self.assertEqual(
+            self.page('dashboard', strike),
+            Client().get(f'/dashboard/{strike.pk}/').content.decode(),
+        )
+        self.assertIn("Site Source", self.page('sources', strike))
+
+    def test_second_run_renders_nothing(self):
+        """Unchanged data means no pages rendered."""
+        self.build()
+        self.assertIn("0 strikes rendered, 3 unchanged", self.build())
+        self.assertIn("3 strikes rendered", self.build('--full'))
+
+    def test_only_changed_strikes_rerender(self):
+        """A summary or a source edit re-renders that strike's pages only."""
+        self.build()
+        strike = Strike.objects.get(pk=self.strikes[1].pk)
+        strike.summary = "A new summary"
+        strike.save()
+        self.assertIn("1 strikes rendered, 2 unchanged", self.build())
+        self.assertIn("A new summary", self.page('dashboard', strike))
+
+        self.source.name = "Renamed Source"
+        self.source.save()
+        self.assertIn("1 strikes rendered, 2 unchanged", self.build())
+        self.assertIn("Renamed Source", self.page('sources', self.strikes[0]))
+
+    def test_sidebar_change_rerenders_everything(self):
+        """A new label in the sidebar is on every page."""
+        self.build()
+        strike = Strike.objects.get(pk=self.strikes[2].pk)
+        strike.location_label = "Relabelled"
+        strike.save()
+        self.assertIn("3 strikes rendered", self.build())
+        self.assertIn("Relabelled", self.page('sources', self.strikes[0]))
+
+    def test_deleted_strike_pages_are_removed(self):
+        """Pages of a deleted strike go, along with their directory."""
+        self.build()
+        pk = self.strikes[1].pk
+        self.strikes[1].delete()
+        # It was in everyone's sidebar
+        self.assertIn("2 strikes rendered, 0 unchanged, 1 removed", self.build())
+        self.assertFalse(os.path.exists(os.path.join(self.out, 'dashboard', str(pk))))
+        self.assertTrue(os.path.exists(os.path.join(self.out, 'dashboard', str(self.strikes[0].pk))))
+
+    def test_needs_an_output(self):
+        """Without --output or SITE_BUILD_DIR there's nowhere to build."""
+        with self.assertRaises(CommandError):
+            call_command('build_site', '--output', '')
+
+    def test_edits_schedule_one_rebuild(self):
+        """With SITE_BUILD_DIR set, a burst of edits spawns a single build after the delay."""
+        with override_settings(SITE_BUILD_DIR=self.out, SITE_BUILD_DELAY=0.05), \
+                mock.patch('dashboard.site.subprocess.Popen') as popen:
+            with self.captureOnCommitCallbacks(execute=True):
+                for strike in self.strikes:
+                    strike.summary = "Edited"
+                    strike.save()
+            time.sleep(0.3)
+        popen.assert_called_once()
+        self.assertEqual(popen.call_args.args[0][-3:], ['build_site', '--verbosity', '0'])
+
+    def test_no_rebuild_without_site_build_dir(self):
+        """Edits leave the static site alone unless it's configured."""
+        with mock.patch('dashboard.site.schedule_build') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.strikes[0].save()
+        schedule.assert_not_called()
+
+
+class ParallelSiteBuildTests(TransactionTestCase):
+    """Test build_site across render processes, which need committed rows."""
+
+    def test_parallel_build_matches_serial(self):
+        """Pages rendered in forked processes are the same as rendered inline."""
+        for day in range(1, 5):
+            Strike.objects.create(date=date(2024, 2, day), location_label=f"P{day}", target="T", striker="S")
+        with tempfile.TemporaryDirectory() as parallel, tempfile.TemporaryDirectory() as serial, \
+                mock.patch('dashboard.site.CHUNK_SIZE', 1):
+            self.assertEqual(site.build(parallel, workers=2)['rendered'], 4)
+            site.build(serial, workers=1)
+            for strike in Strike.objects.all():
+                path = os.path.join('sources', str(strike.pk), 'index.html')
+                with open(os.path.join(parallel, path)) as a, open(os.path.join(serial, path)) as b:
+                    self.assertEqual(a.read(), b.read())
+
+
+class ImportStrikesTests(TestCase):
+    """Test the import_strikes bulk import command."""
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w', newline='') as fp:
+            fp.write(text)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_strikes', path, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def row(self, external_id, **fields):
+        values = {
+            'external_id': external_id, 'date': '2025-09-02', 'location_label': 'Caribbean Sea',
+            'target': 'Vessel', 'striker': 'US Navy', 'number_killed': 11,
+        }
+        values.update(fields)
+        return values
+
+    def test_sources_are_deduplicated_by_canonical_url(self):
+        """Variants of a stored source url link to that source."""
+        source = Source.objects.create(name="Stored", url="https://example.com/story")
+        rows = [
+            self.row('a', sources=['http://www.example.com/story/?utm_source=feed']),
+            self.row('b', sources=['https://example.com/story#top', 'https://example.com/other']),
+        ]
+        path = self.write('strikes.ndjson', '\n'.join(json.dumps(r) for r in rows))
+        self.run_import(path)
+        self.assertEqual(Source.objects.count(), 2)
+        self.assertEqual(Source.objects.get(pk=source.pk).url, "https://example.com/story")
+        for external_id in ('a', 'b'):
+            self.assertIn(source, Strike.objects.get(external_id=external_id).sources.all())
+
+    def test_refuses_while_sources_are_unhashed(self):
+        """Sources from before url_hash would be imported a second time, so it waits for canonicalize_urls."""
+        source = Source.objects.create(name="Old", url="https://example.com/old")
+        Source.objects.filter(pk=source.pk).update(url_hash=None)
+        path = self.write('strikes.ndjson', json.dumps(self.row('a', sources=['https://example.com/old'])))
+        with self.assertRaisesMessage(CommandError, 'canonicalize_urls'):
+            self.run_import(path)
+        call_command('canonicalize_urls', stdout=StringIO())
+        self.run_import(path)
+        self.assertEqual(list(Strike.objects.get(external_id='a').sources.all()), [source])
+
+    def test_ndjson_import_is_idempotent(self):
+        """Importing the same file twice leaves one copy of everything."""
+        rows = [
+            self.row('a', sources=[{'url': 'https://example.com/a', 'name': 'Story A'}]),
+            self.row('b', sources=['https://example.com/a', 'https://example.com/b']),
+        ]
+        path = self.write('strikes.ndjson', '\n'.join(json.dumps(r) for r in rows))
+        out, err = self.run_import(path, '--batch-size', '1')
+        self.assertIn('Wrote 2 new or changed strikes from 2 rows', out)
+        self.assertEqual(err, '')
+        updated_at = set(Strike.objects.values_list('updated_at', flat=True))
+        out, _ = self.run_import(path, '--batch-size', '1')
+        self.assertIn('Wrote 0 new or changed strikes from 2 rows', out)
+        self.assertEqual(set(Strike.objects.values_list('updated_at', flat=True)), updated_at)
+        self.assertEqual(Strike.objects.count(), 2)
+        self.assertEqual(Source.objects.count(), 2)
+        self.assertEqual(Source.objects.get(url='https://example.com/a').name, 'Story A')
+        strike_b = Strike.objects.get(external_id='b')
+        self.assertEqual(strike_b.sources.count(), 2)
+        self.assertEqual(strike_b.number_killed, 11)
+
+    def test_new_source_on_known_strike(self):
+        """Adding a source to an unchanged strike links it and bumps updated_at."""
+        self.run_import(self.write('one.ndjson', json.dumps(self.row('a'))))
+        strike = Strike.objects.get(external_id='a')
+        self.run_import(self.write('two.ndjson', json.dumps(self.row('a', sources=['https://example.com/new']))))
+        self.assertEqual(list(strike.sources.values_list('url', flat=True)), ['https://example.com/new'])
+        self.assertGreater(Strike.objects.get(pk=strike.pk).updated_at, strike.updated_at)
+
+    def test_update_keeps_derived_data_in_step(self):
+        """Re-imported rows update the strike, its list entry and the rollups."""
+        from stats.rollups import rebuild, snapshot
+
+        path = self.write('one.json', json.dumps([self.row('a')]))
+        self.run_import(path)
+        strike = Strike.objects.get(external_id='a')
+        self.assertEqual(StrikeListEntry.objects.get(pk=strike.pk).location_label, 'Caribbean Sea')
+
+        path = self.write('two.json', json.dumps([self.row('a', location_label='Pacific', number_killed=2)]))
+        self.run_import(path)
+        strike.refresh_from_db()
+        self.assertEqual((strike.location_label, strike.number_killed), ('Pacific', 2))
+        self.assertEqual(StrikeListEntry.objects.get(pk=strike.pk).location_label, 'Pacific')
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(incremental, snapshot())
+
+    def test_shared_sources_link_strikes(self):
+        """Strikes imported citing the same source are related through it."""
+        rows = [self.row(f'link-{i}', sources=[{'url': 'https://example.com/both'}]) for i in range(2)]
+        self.run_import(self.write('links.ndjson', '\n'.join(json.dumps(row) for row in rows)))
+        self.assertEqual(StrikeLink.objects.filter(shared_sources=1).count(), 2)
+
+    def test_csv_with_invalid_rows(self):
+        """Bad rows are reported with their row number and skipped."""
+        path = self.write('strikes.csv', (
+            'external_id,date,location_label,target,striker,location_lat,sources\n'
+            'a,2025-09-02,Caribbean Sea,Vessel,US Navy,12.5,https://example.com/x https://example.com/y\n'
+            'b,not-a-date,Caribbean Sea,Vessel,US Navy,,\n'
+            ',2025-09-02,Caribbean Sea,Vessel,US Navy,,\n'
+        ))
+        out, err = self.run_import(path)
+        self.assertIn('Wrote 1 new or changed strikes from 3 rows (2 invalid)', out)
+        self.assertIn('Row 2: date', err)
+        self.assertIn('Row 3: external_id is required', err)
+        strike = Strike.objects.get(external_id='a')
+        self.assertIsNone(strike.target_origin)
+        self.assertEqual(strike.sources.count(), 2)
+
+    def test_resumes_from_checkpoint(self):
+        """A matching checkpoint skips the rows it already covers."""
+        path = self.write('strikes.ndjson', '\n'.join(json.dumps(self.row(str(i))) for i in range(5)))
+        checkpoint = os.path.join(self.dir.name, 'import.checkpoint')
+        self.run_import(path, '--checkpoint', checkpoint)
+        self.assertFalse(os.path.exists(checkpoint))
+
+        # Pretend a run stopped after three rows
+        with open(checkpoint, 'w') as fp:
+            stat = os.stat(path)
+            json.dump({'file': {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}, 'rows': 3}, fp)
+        Strike.objects.filter(external_id__in=['3', '4']).delete()
+        out, _ = self.run_import(path, '--checkpoint', checkpoint)
+        self.assertIn('Resuming after row 3', out)
+        self.assertIn('Wrote 2 new or changed strikes from 2 rows', out)
+        self.assertEqual(Strike.objects.count(), 5)
+
+    def test_checkpoint_for_other_file_is_refused(self):
+        """A checkpoint taken from a different file is not applied."""
+        path = self.write('strikes.ndjson', json.dumps(self.row('a')))
+        checkpoint = self.write('import.checkpoint', json.dumps({'file': {}, 'rows': 1}))
+        with self.assertRaises(CommandError):
+            self.run_import(path, '--checkpoint', checkpoint)
+
+    def test_json_array_streams_across_reads(self):
+        """The JSON reader copes with items split over read boundaries."""
+        rows = [self.row(str(i), summary='x' * 3000) for i in range(50)]
+        with tempfile.TemporaryFile('w+') as fp:
+            json.dump(rows, fp, indent=2)
+            fp.seek(0)
+            self.assertEqual([r['external_id'] for r in read_rows(fp, 'json')], [str(i) for i in range(50)])
+
+
+class StrikeAdminTests(TestCase):
+    """Test the Strike admin and the estimated count paginator."""
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='admin'))
+        self.strike = Strike.objects.create(
+            date=date(2025, 9, 2), location_label="Caribbean Sea", target="Vessel",
+            striker="US Navy", target_origin="Venezuela", external_id="ext-1",
+            summary="Cocaine smuggling boat struck",
+        )
+        self.other = Strike.objects.create(
+            date=date(2025, 10, 1), location_label="Eastern Pacific", target="Vessel",
+            striker="US Air Force", summary="Semi-submersible struck",
+        )
+        self.sources = [
+            Source.objects.create(name=f"Outlet {i}", url=f"https://example.com/{i}") for i in range(3)
+        ]
+        self.strike.sources.add(*self.sources[:2])
+
+    def changelist(self, query=''):
+        return self.client.get(f'/admin/dashboard/strike/{query}')
+
+    def test_changelist_shows_source_counts(self):
+        """Each row carries its source count."""
+        response = self.changelist()
+        self.assertEqual(response.status_code, 200)
+        counts = {s.pk: s.source_count for s in response.context['cl'].result_list}
+        self.assertEqual(counts, {self.strike.pk: 2, self.other.pk: 0})
+
+    def test_search_uses_full_text_and_external_id(self):
+        """Search matches words anywhere in the strike, prefixes and external ids."""
+        for query, expected in (('cocaine', [self.strike]), ('submers', [self.other]), ('ext-1', [self.strike])):
+            response = self.changelist(f'?q={query}')
+            self.assertEqual(list(response.context['cl'].result_list), expected, query)
+
+    def test_filters_come_from_rollups(self):
+        """Striker and origin choices are the rollup values and filter the list."""
+        response = self.changelist()
+        self.assertContains(response, '?striker=US+Navy')
+        self.assertContains(response, '?target_origin=-')
+        response = self.changelist('?target_origin=-')
+        self.assertEqual(list(response.context['cl'].result_list), [self.other])
+
+    def test_change_form_autocompletes_sources(self):
+        """Only linked sources are rendered, the rest come from autocomplete."""
+        response = self.client.get(f'/admin/dashboard/strike/{self.strike.pk}/change/')
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertContains(response, 'Outlet 0')
+        self.assertNotContains(response, 'Outlet 2')
+        response = self.client.get(
+            '/admin/autocomplete/',
+            {'app_label': 'dashboard', 'model_name': 'strike', 'field_name': 'sources', 'term': 'outlet 2'},
+        )
+        self.assertEqual([r['text'] for r in response.json()['results']], [str(self.sources[2])])
+
+    def test_skip_scan_dates_match_distinct(self):
+        """The date hierarchy's skip scan finds the same buckets as DISTINCT."""
+        Strike.objects.create(date=date(2026, 1, 5), location_label="Later", target="T", striker="S")
+        queryset = Strike.objects.all()
+        queryset.__class__ = type('SkipScan', (SkipScanDatesMixin, queryset.__class__), {})
+        for kind in ('year', 'month', 'day'):
+            for order in ('ASC', 'DESC'):
+                self.assertEqual(queryset.dates('date', kind, order), list(Strike.objects.dates('date', kind, order)))
+        response = self.changelist('?date__year=2025')
+        self.assertContains(response, '?date__month=10&amp;date__year=2025')
+
+    def test_skip_scan_datetimes_match_distinct(self):
+        """Datetime hierarchies bucket in the active timezone, as date_trunc does."""
+        utc = ZoneInfo("UTC")
+        Submission.objects.bulk_create([
+            Submission(description=f"At {moment}", source_url="https://example.com/", submitted_at=moment)
+            for moment in (
+                datetime(2025, 1, 1, 3, 0, tzinfo=utc),  # still 2024 in New York
+                datetime(2025, 3, 31, 23, 30, tzinfo=utc),
+                datetime(2025, 4, 1, 1, 0, tzinfo=utc),
+                datetime(2025, 11, 2, 12, 0, tzinfo=utc),
+            )
+        ])
+        queryset = Submission.objects.all()
+        queryset.__class__ = type('SkipScan', (SkipScanDatesMixin, queryset.__class__), {})
+        for zone in ('UTC', 'America/New_York'):
+            with timezone.override(zone):
+                for kind in ('year', 'month', 'day'):
+                    for order in ('ASC', 'DESC'):
+                        self.assertEqual(
+                            queryset.datetimes('submitted_at', kind, order),
+                            list(Submission.objects.datetimes('submitted_at', kind, order)),
+                            (zone, kind, order),
+                        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/submit/submission/?submitted_at__year=2025')
+        self.assertContains(response, '?submitted_at__month=4&amp;submitted_at__year=2025')
+        self.assertFalse([q['sql'] for q in queries if 'DISTINCT' in q['sql']])
+
+    def test_paginator_estimates_large_counts(self):
+        """Large results take the planner's estimate, small ones an exact count."""
+        # Rows that earlier tests rolled back still fill pages, and the
+        # planner scales its estimate by them until the table is analyzed
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE dashboard_strike')
+        self.assertEqual(EstimatedCountPaginator(Strike.objects.all(), 100).count, 2)
+        with mock.patch('dashboard.changelist.EXACT_BELOW', 0):
+            with self.assertNumQueries(1):
+                count = EstimatedCountPaginator(Strike.objects.all(), 100).count
+        self.assertIsInstance(count, int)
@@ -0,0 +1,232 @@
+"""
+In-memory prefix index behind the strike picker on the submit form.
+
+Every strike is indexed under the words of its location label and its ISO
+date, so "2025-09" or "carib sea" find it. Each word has a posting list
+sorted newest first, and the vocabulary is kept sorted so a prefix is a
+bisect away. A query walks the postings of its most selective term,
+newest first, checks the other terms against each candidate and stops at
+``limit`` matches or SCAN_LIMIT candidates, whichever comes first. The work
+per query is bounded by those two numbers, not by the number of strikes.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from datetime import date
+
+from .caching import STRIKE_LABELS, bump_version, get_version
+from .models import StrikeListEntry
+
+# Most matches a query returns, the picker shows them all
+TYPEAHEAD_LIMIT = 10
+# Candidates a query looks at before giving up on finding more matches
+SCAN_LIMIT = 2000
+# A prefix matching more words than this is too vague to drive a query,
+# it is only checked against candidates found through the other terms
+MAX_EXPANSION = 64
+
+# ISO dates and the start of them ("2025", "2025-09", "2025-09-0"), or words
+_TOKEN = re.compile(r'\d{4}(?:-\d{0,2}){0,2}|\w+')
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _words(day, label):
+    return set(re.findall(r'\w+', label.lower())) | {day.isoformat()}
+
+
+class PrefixIndex:
+    """Strike dates and labels by word prefix, updated in place."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # pk -> (sort key, date, label, words)
+        self.entries = {}
+        # word -> sort keys of the strikes that have it, newest first
+        self.postings = {}
+        # Every indexed word, sorted, for prefix lookups
+        self.vocabulary = []
+        # Every sort key, newest first, for queries without a usable term
+        self.recent = []
+        self.version = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def sort_key(pk, day):
+        return (-day.toordinal(), -pk)
+
+    def load(self, rows):
+        """Index ``(pk, date, label)`` rows in one go, faster than update() per row."""
+        self.clear()
+        for pk, day, label in rows:
+            key = self.sort_key(pk, day)
+            words = _words(day, label)
+            self.entries[pk] = (key, day, label, words)
+            for word in words:
+                self.postings.setdefault(word, []).append(key)
+        for keys in self.postings.values():
+            keys.sort()
+        self.vocabulary = sorted(self.postings)
+        self.recent = sorted(entry[0] for entry in self.entries.values())
+
+    def discard(self, pk):
+        entry = self.entries.pop(pk, None)
+        if entry is None:
+            return
+        key, _, _, words = entry
+        _remove(self.recent, key)
+        for word in words:
+            keys = self.postings[word]
+            _remove(keys, key)
+            if not keys:
+                del self.postings[word]
+                _remove(self.vocabulary, word)
+
+    def update(self, pk, day, label):
+        """Index strike ``pk`` under its date and label, or drop it when ``day`` is None."""
+        self.discard(pk)
+        if day is None:
+            return
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        key = self.sort_key(pk, day)
+        words = _words(day, label or '')
+        self.entries[pk] = (key, day, label, words)
+        insort(self.recent, key)
+        for word in words:
+            if word not in self.postings:
+                self.postings[word] = []
+                insort(self.vocabulary, word)
+            insort(self.postings[word], key)
+
+    def _expand(self, prefix):
+        """Indexed words starting with ``prefix``."""
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '\uffff', start)
+        return self.vocabulary[start:end]
+
+    def search(self, query, limit=TYPEAHEAD_LIMIT):
+        """
+        Up to ``limit`` strikes matching every term of ``query`` as a
+        prefix, newest first, as ``(pk, date, label)``. An empty query
+        gives the newest strikes.
+        """
+        terms = tokenize(query)
+        driver = None
+        best = None
+        for term in terms:
+            words = self._expand(term)
+            if not words:
+                # Nothing has this word, nothing can match
+                return []
+            if len(words) > MAX_EXPANSION:
+                continue
+            size = sum(len(self.postings[word]) for word in words)
+            if best is None or size < best:
+                driver, best = (term, words), size
+
+        if driver is None:
+            candidates = self.recent
+            rest = terms
+        else:
+            term, words = driver
+            # A strike can have several words with the prefix, merge keeps
+            # its copies next to each other
+            candidates = heapq.merge(*(self.postings[word] for word in words))
+            rest = [other for other in terms if other != term]
+
+        matches = []
+        previous = None
+        for scanned, key in enumerate(candidates):
+            if scanned >= SCAN_LIMIT or len(matches) >= limit:
+                break
+            if key == previous:
+                continue
+            previous = key
+            pk = -key[1]
+            _, day, label, entry_words = self.entries[pk]
+            if all(any(word.startswith(other) for word in entry_words) for other in rest):
+                matches.append((pk, day, label))
+        return matches
+
+
+def _remove(keys, value):
+    position = bisect_left(keys, value)
+    if position < len(keys) and keys[position] == value:
+        del keys[position]
+
+
+_index = PrefixIndex()
+_lock = threading.Lock()
+# One reload at a time
+_reload_lock = threading.Lock()
+
+
+def _rebuild(index):
+    index.load(
+        StrikeListEntry.objects.order_by()
+        .values_list('pk', 'date', 'location_label')
+        .iterator(chunk_size=5000)
+    )
+
+
+def get_index():
+    """
+    The process-wide prefix index, rebuilt when another process moved on.
+
+    Same scheme as the cluster index: writes here patch it in place (see
+    ``dashboard.signals``), the shared version tells other workers to reload.
+    Every import or approval batch bumps it, so a reload builds a new index
+    off to the side and swaps it in, like ``clusters.get_index``. Other
+    threads keep answering from the old one meanwhile, only a worker's
+    first query waits.
+    """
+    global _index
+    version = get_version(STRIKE_LABELS)
+    if _index.version == version:
+        return _index
+    if not _reload_lock.acquire(blocking=_index.version is None):
+        return _index
+    try:
+        if _index.version != version:
+            index = PrefixIndex()
+            _rebuild(index)
+            # Changes made meanwhile bumped the version past this one, the
+            # next query reloads again
+            index.version = version
+            with _lock:
+                _index = index
+    finally:
+        _reload_lock.release()
+    return _index
+
+
+def search(query, limit=TYPEAHEAD_LIMIT):
+    """Strikes matching ``query``, see PrefixIndex.search. Never more than TYPEAHEAD_LIMIT."""
+    index = get_index()
+    # Writers insert into the posting lists in place, don't read them halfway
+    with _lock:
+        return index.search(query, min(limit, TYPEAHEAD_LIMIT))
+
+
+def strike_labelled(pk, day, label, patch=True):
+    """
+    Record strike ``pk``'s new date and label (None date for removed).
+
+    Bumps the shared label version and patches the local index when it was
+    current, like ``clusters.strike_moved``.
+    """
+    with _lock:
+        in_step = _index.version is not None and _index.version == get_version(STRIKE_LABELS)
+        new_version = bump_version(STRIKE_LABELS)
+        if in_step:
+            if patch:
+                _index.update(pk, day, label)
+            _index.version = new_version
@@ -4,4 +4,8 @@ from . import views
 
 urlpatterns = [
     path('<int:pk>/', views.index, name='index'),
-]
\ No newline at end of file
+    path('<int:pk>/nearby/', views.nearby, name='nearby'),
+    path('sidebar/', views.sidebar_page, name='sidebar_page'),
+    path('search/', views.search, name='search'),
+    path('clusters/', views.clusters, name='clusters'),
+]
@@ -1,8 +1,15 @@
+import math
+
 from django.shortcuts import render
 from django.template import loader
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
 
-from .models import Strike
+from . import asyncdb, clusters as cluster_index
+from .caching import cached_strike_page, conditional_strike_page
+from .detail import load_strike
+from .nearby import render_nearby
+from .search import search_strikes
+from .sidebar import SECTIONS, UNPIN, decode_cursor, render_strike_list, select_strike, sidebar_context
 
 ## TODO:
 ## add db urls for images,
@@ -11,10 +18,96 @@ from .models import Strike
 ## Add headline field to model and use it to replace 
 ## current heading in top left table
 
-def index(request, pk):
+@conditional_strike_page('dashboard')
+@cached_strike_page('dashboard')
+async def index(request, pk):
     template = loader.get_template('dashboard/index.html')
+    # The strike and the sidebar don't depend on each other
+    strike, sidebar_html = await asyncdb.gather(
+        request,
+        lambda: load_strike(pk),
+        lambda: render_strike_list('dashboard'),
+    )
     context = {
-        'strike': Strike.objects.get(pk=pk),
-        'all_strikes': Strike.objects.all()
+        'strike': strike,
+        **sidebar_context('dashboard', selected=strike, html=sidebar_html),
     }
-    return HttpResponse(template.render(context, request))
\ No newline at end of file
+    return HttpResponse(template.render(context, request))
+
+
+async def nearby(request, pk):
+    """HTMX endpoint returning the dashboard's panel of strikes nearest to ``pk``."""
+    html = await asyncdb.run(request, render_nearby, pk)
+    if html is None:
+        raise Http404('No such strike')
+    return HttpResponse(html)
+
+
+async def sidebar_page(request):
+    """HTMX endpoint returning the next page of sidebar strikes as <li> rows."""
+    section = request.GET.get('section', 'dashboard')
+    if section not in SECTIONS:
+        return HttpResponseBadRequest('Unknown section')
+    try:
+        after = decode_cursor(request.GET['after'])
+        selected_pk = int(request.GET.get('selected', 0))
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('Invalid cursor')
+
+    html = await asyncdb.run(request, render_strike_list, section, after)
+    html, found = select_strike(html, selected_pk)
+    if found:
+        html += UNPIN
+    return HttpResponse(html)
+
+
+async def search(request):
+    """HTMX endpoint returning ranked sidebar rows for the search box."""
+    section = request.GET.get('section', 'dashboard')
+    if section not in SECTIONS:
+        return HttpResponseBadRequest('Unknown section')
+    try:
+        page = int(request.GET.get('page', 1))
+        selected_pk = int(request.GET.get('selected') or 0)
+        if page < 1:
+            raise ValueError
+    except ValueError:
+        return HttpResponseBadRequest('Invalid page')
+
+    q = request.GET.get('q', '').strip()
+    if not q:
+        # Cleared the box, put the normal list back
+        html = await asyncdb.run(request, render_strike_list, section)
+        html, _ = select_strike(html, selected_pk)
+        return HttpResponse(html)
+
+    strikes, next_page = await asyncdb.run(request, search_strikes, q, page)
+    template = loader.get_template('partials/strike_search_page.html')
+    context = {
+        'strikes': strikes,
+        'next_page': next_page,
+        'page': page,
+        'q': q,
+        'section': section,
+        'link_base': SECTIONS[section],
+        'selected_pk': selected_pk,
+    }
+    return HttpResponse(template.render(context, request))
+
+
+async def clusters(request):
+    """Pre-clustered strike points inside ``bbox`` at ``zoom``, for the overview map."""
+    try:
+        west, south, east, north = (float(value) for value in request.GET['bbox'].split(','))
+        zoom = int(request.GET['zoom'])
+        if not all(math.isfinite(value) for value in (west, south, east, north)):
+            raise ValueError
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'bbox=west,south,east,north and zoom are required'}, status=400)
+
+    # Off the event loop, the index reloads from the database when stale
+    clusters = await asyncdb.run(request, cluster_index.query, west, south, east, north, zoom)
+    return JsonResponse({
+        'zoom': zoom,
+        'clusters': clusters,
+    })
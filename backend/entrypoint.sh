@@ -1,15 +1,38 @@
 #!/bin/bash
 set -e
 
-# Install Tailwind dependencies if node_modules doesn't exist
-if [ ! -d "/app/theme/static_src/node_modules" ]; then
-    echo "Installing Tailwind dependencies..."
-    python manage.py tailwind install
-fi
+# CSS and static files are built into the image, see Dockerfile. Servers
+# only check the schema is current before booting, run
+# `python manage.py migrate` to apply migrations. Other commands (migrate
+# itself, flush_submissions, shells) start as they are.
+case "$*" in
+    uvicorn*|gunicorn*|*"manage.py runserver"*)
+        python manage.py migrate --check
+        ;;
+esac
 
-# Build Tailwind CSS
-echo "Building Tailwind CSS..."
-python manage.py tailwind build
+# Without REDIS_URL the cache is per process, so an edit handled by one
+# worker would leave the others serving stale pages. Refuse to start more
+# than one.
+workers="${WEB_CONCURRENCY:-1}"
+case "$1" in
+    uvicorn|gunicorn)
+        prev=""
+        for arg in "$@"; do
+            case "$prev" in
+                --workers|-w) workers="$arg" ;;
+            esac
+            case "$arg" in
+                --workers=*) workers="${arg#--workers=}" ;;
+            esac
+            prev="$arg"
+        done
+        if [ "$workers" -gt 1 ] && [ -z "$REDIS_URL" ]; then
+            echo "Refusing to start $workers workers without REDIS_URL, the cache is per process" >&2
+            exit 1
+        fi
+        ;;
+esac
 
 # Execute the main command
 exec "$@"
@@ -0,0 +1,17 @@
+import os
+
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        # Reports every connection's queries to the request's metrics
+        from . import metrics  # noqa: F401
+
+        # A worker forked from a process that already opened the pool
+        # (gunicorn --preload) must not share its connections
+        from .pool import forget_inherited_pools
+        os.register_at_fork(after_in_child=forget_inherited_pools)
@@ -0,0 +1,128 @@
+"""
+Per-request query counts and database time.
+
+RequestMetricsMiddleware opens a ``Metrics`` for each request and every
+database connection reports its queries to whichever one is current.
+"Current" is a context variable, which follows the request onto the
+threads its sync code and async views' database calls run on, so queries
+run through ``dashboard.asyncdb`` count too.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class Metrics:
+    """Queries run for one request, with their SQL and total time."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.sql = []
+        # Async views run queries on several threads at once
+        self._lock = threading.Lock()
+
+    def add(self, sql, seconds):
+        with self._lock:
+            self.queries += 1
+            self.db_seconds += seconds
+            self.sql.append(sql)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total_ms(self):
+        return ((self.finished or time.perf_counter()) - self.started) * 1000
+
+    @property
+    def db_ms(self):
+        # Summed over threads, can be more than total_ms when queries overlap
+        return self.db_seconds * 1000
+
+    @property
+    def app_ms(self):
+        """Time outside the database: views, templates, middleware."""
+        return max(self.total_ms - self.db_ms, 0.0)
+
+
+@contextmanager
+def recording():
+    """Collect the queries run in this context into a new Metrics."""
+    metrics = Metrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        metrics.finish()
+        _current.reset(token)
+
+
+def record_stream(content, metrics, done):
+    """
+    Yield ``content``, recording the queries run to produce each chunk.
+
+    Streaming views query while the server sends the body, after the
+    middleware has returned. ``done`` is called once it's all sent.
+    """
+    if hasattr(content, '__aiter__'):
+        return _arecord_stream(content, metrics, done)
+    return _record_stream(content, metrics, done)
+
+
+def _record_stream(content, metrics, done):
+    chunks = iter(content)
+    while True:
+        # Set and reset around each chunk, a generator may be resumed
+        # from a different context than the last time
+        token = _current.set(metrics)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        finally:
+            _current.reset(token)
+        yield chunk
+    metrics.finish()
+    done()
+
+
+async def _arecord_stream(content, metrics, done):
+    chunks = aiter(content)
+    while True:
+        token = _current.set(metrics)
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            break
+        finally:
+            _current.reset(token)
+        yield chunk
+    metrics.finish()
+    done()
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created)
+def install_wrapper(sender, connection, **kwargs):
+    # Sent on every connect, pooled ones included, for the same wrapper object
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,61 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import record_stream, recording
+
+logger = logging.getLogger('monitoring.requests')
+
+
+class RequestMetricsMiddleware:
+    """
+    Count each request's queries and time its database and app work.
+
+    Logs a line per request to ``monitoring.requests`` and, with
+    REQUEST_METRICS_HEADER on, adds a Server-Timing header browsers' dev
+    tools show. The Metrics stay on ``response.metrics`` for tests, see
+    monitoring.testing. Goes first in MIDDLEWARE so it sees everything.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with recording() as metrics:
+            response = self.get_response(request)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        with recording() as metrics:
+            response = await self.get_response(request)
+        return self.report(request, response, metrics)
+
+    def report(self, request, response, metrics):
+        response.metrics = metrics
+
+        def log():
+            logger.info(
+                '%s %s %s queries=%d db=%.1fms app=%.1fms total=%.1fms',
+                request.method, request.path, response.status_code,
+                metrics.queries, metrics.db_ms, metrics.app_ms, metrics.total_ms,
+            )
+        if response.streaming:
+            # Logged once the body is out, the header only covers the
+            # work done before it
+            response.streaming_content = record_stream(response.streaming_content, metrics, log)
+        else:
+            log()
+        if settings.REQUEST_METRICS_HEADER:
+            response['Server-Timing'] = (
+                f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries", '
+                f'app;dur={metrics.app_ms:.1f}, total;dur={metrics.total_ms:.1f}'
+            )
+        return response
@@ -0,0 +1,61 @@
+"""
+Connection pool statistics, for sizing DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE.
+
+Every worker process has its own pool, so the numbers are per process and
+``pid`` says which one answered. Counters are cumulative since the pool
+opened, sample twice and subtract for rates.
+"""
+import os
+
+from django.db import connections
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+
+def forget_inherited_pools():
+    """
+    Drop the pools a forked child got from its parent.
+
+    Their worker threads didn't survive the fork and their sockets are
+    still the parent's. The child opens its own pool on first use.
+    """
+    DatabaseWrapper._connection_pools.clear()
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else None
+
+
+def pool_stats():
+    """
+    ``{alias: stats}`` for every database with a pool open in this
+    process. Unpooled databases are left out.
+    """
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None or pool.closed:
+            continue
+        raw = pool.get_stats()
+        size = raw.get('pool_size', 0)
+        available = raw.get('pool_available', 0)
+        stats[alias] = {
+            'min_size': raw.get('pool_min'),
+            'max_size': raw.get('pool_max'),
+            'size': size,
+            'in_use': size - available,
+            'available': available,
+            'waiting': raw.get('requests_waiting', 0),
+            'requests': raw.get('requests_num', 0),
+            # Requests that found no free connection and had to wait
+            'requests_queued': raw.get('requests_queued', 0),
+            'requests_timed_out': raw.get('requests_errors', 0),
+            'wait_ms_avg': _average(raw.get('requests_wait_ms', 0), raw.get('requests_queued', 0)),
+            'usage_ms_avg': _average(raw.get('usage_ms', 0), raw.get('requests_num', 0)),
+            'connections': raw.get('connections_num', 0),
+            'connect_ms_avg': _average(raw.get('connections_ms', 0), raw.get('connections_num', 0)),
+            'connection_errors': raw.get('connections_errors', 0),
+            'connections_lost': raw.get('connections_lost', 0),
+            # Connections that came back broken or mid-transaction
+            'returned_bad': raw.get('returns_bad', 0),
+        }
+    return {'pid': os.getpid(), 'pools': stats}
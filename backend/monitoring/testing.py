@@ -0,0 +1,42 @@
+"""Query budgets for view tests."""
+from django.core.cache import cache
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin checking a page's query count doesn't grow with the data.
+
+    Counts come from RequestMetricsMiddleware, so queries an async view
+    runs on other threads are included. The cache is cleared before each
+    request, the budget is for a cold page.
+    """
+
+    def get_queries(self, path, **extra):
+        """Request ``path`` with a cold cache, return ``(response, metrics)``."""
+        cache.clear()
+        response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200, path)
+        return response, response.metrics
+
+    def assertQueryBudget(self, path, budget, grow=None, **extra):
+        """
+        Fail if ``path`` runs more than ``budget`` queries. With ``grow``,
+        request it again after ``grow()`` adds rows, and fail unless the
+        count stayed the same.
+        """
+        _, metrics = self.get_queries(path, **extra)
+        self.assertLessEqual(
+            metrics.queries, budget,
+            f"{path} ran {metrics.queries} queries, budget {budget}:\n" + "\n".join(metrics.sql),
+        )
+        if grow is None:
+            return metrics
+        small = metrics
+        grow()
+        _, metrics = self.get_queries(path, **extra)
+        self.assertEqual(
+            metrics.queries, small.queries,
+            f"{path} went from {small.queries} to {metrics.queries} queries as rows were added:\n"
+            + "\n".join(metrics.sql),
+        )
+        return metrics
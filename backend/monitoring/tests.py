@@ -0,0 +1,134 @@
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.postgresql.base import DatabaseWrapper
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.urls import reverse
+
+from dashboard import asyncdb
+from dashboard.models import Strike
+from monitoring.pool import forget_inherited_pools, pool_stats
+
+
+class PoolStatsTests(TestCase):
+    """Test the connection pool statistics and their endpoint."""
+
+    def test_stats_report_the_open_pool(self):
+        """The default database's pool shows up, with this test's connection in use."""
+        connection.ensure_connection()
+        stats = pool_stats()
+        pool = stats['pools']['default']
+        self.assertEqual(pool['max_size'], connection.settings_dict['OPTIONS']['pool']['max_size'])
+        self.assertGreaterEqual(pool['in_use'], 1)
+        self.assertEqual(pool['size'], pool['in_use'] + pool['available'])
+        self.assertGreaterEqual(pool['connections'], 1)
+        self.assertIsNotNone(pool['connect_ms_avg'])
+
+    def test_endpoint_is_staff_only(self):
+        """Anonymous requests are sent to the admin login, staff get JSON."""
+        url = reverse('monitoring:db_pool')
+        client = Client()
+        response = client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        client.force_login(User.objects.create_user('ops', is_staff=True))
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('default', response.json()['pools'])
+
+    def test_forked_child_forgets_pools(self):
+        """Pools inherited over fork are dropped, not closed, the parent still uses them."""
+        inherited = mock.Mock()
+        with mock.patch.dict(DatabaseWrapper._connection_pools, {'default': inherited}, clear=True):
+            forget_inherited_pools()
+            self.assertEqual(DatabaseWrapper._connection_pools, {})
+        inherited.close.assert_not_called()
+
+
+class PoolHealthCheckTests(TransactionTestCase):
+    """Test dead pooled connections are replaced before a request gets one."""
+
+    def test_request_after_backends_are_killed(self):
+        """Postgres dropping the pool's idle connections doesn't fail the next request."""
+        strike = Strike.objects.create(date=date(2024, 1, 15), location_label="Pooled", target="T", striker="S")
+        self.assertIsNotNone(connection.pool._check)
+        # Fill the pool with idle connections, then kill them all but this one
+        pool = connection.pool
+        for _ in range(pool.min_size):
+            with pool.connection():
+                pass
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+            )
+        connection.close()
+
+        for _ in range(pool.max_size):
+            response = Client().get(f'/dashboard/{strike.pk}/')
+            self.assertEqual(response.status_code, 200)
+
+
+class RequestMetricsTests(TestCase):
+    """Test the per-request query counts and timings."""
+
+    def setUp(self):
+        cache.clear()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Metrics Strike", target="T", striker="S",
+        )
+
+    def test_counts_the_requests_queries(self):
+        """response.metrics holds every query the page ran, and nothing else."""
+        Strike.objects.count()
+        response = Client().get(f'/dashboard/{self.strike.pk}/')
+        metrics = response.metrics
+        self.assertEqual(metrics.queries, len(metrics.sql))
+        self.assertGreater(metrics.queries, 0)
+        self.assertTrue(all('COUNT' not in sql for sql in metrics.sql))
+        self.assertGreaterEqual(metrics.total_ms, metrics.app_ms)
+
+    def test_counts_streamed_queries(self):
+        """Queries a streaming response runs while it's sent count, and it's logged once sent."""
+        with self.assertLogs('monitoring.requests', 'INFO') as logs:
+            response = Client().get('/api/strikes.ndjson')
+            self.assertEqual(logs.output, [])
+            b''.join(response.streaming_content)
+        self.assertGreater(response.metrics.queries, 0)
+        self.assertIn(f'queries={response.metrics.queries} ', logs.output[0])
+
+    def test_logs_a_line_per_request(self):
+        """Each request logs its path, status and query count."""
+        with self.assertLogs('monitoring.requests', 'INFO') as logs:
+            response = Client().get(f'/sources/{self.strike.pk}/')
+        self.assertIn(f'GET /sources/{self.strike.pk}/ 200 queries={response.metrics.queries} ', logs.output[0])
+
+    def test_server_timing_header(self):
+        """The Server-Timing header is only sent when switched on."""
+        self.assertNotIn('Server-Timing', Client().get('/submit/'))
+        with override_settings(REQUEST_METRICS_HEADER=True):
+            response = Client().get('/submit/')
+        self.assertIn(f'desc="{response.metrics.queries} queries"', response['Server-Timing'])
+
+
+class AsyncRequestMetricsTests(TransactionTestCase):
+    """Test that queries async views run on other threads are counted."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(asyncdb.shutdown)
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Metrics Strike", target="T", striker="S",
+        )
+
+    def test_counts_queries_on_database_threads(self):
+        """Under ASGI the page's gathered queries count the same as under WSGI."""
+        path = f'/sources/{self.strike.pk}/'
+        wsgi = Client().get(path).metrics
+        cache.clear()
+        asgi = async_to_sync(self.async_client.get)(path).metrics
+        self.assertEqual(asgi.queries, wsgi.queries)
@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from .pool import pool_stats
+
+
+@staff_member_required
+def db_pool(request):
+    """This worker's connection pool statistics, for staff."""
+    return JsonResponse(pool_stats())
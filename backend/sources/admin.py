@@ -1,4 +1,44 @@
 from django.contrib import admin
 
-from .models import Source
-admin.site.register(Source)
+from dashboard.admin import link_count
+from dashboard.changelist import LargeTableAdmin
+
+from .canonical import url_hash
+from .models import Source, SourceCheck
+
+
+@admin.register(Source)
+class SourceAdmin(LargeTableAdmin):
+    list_display = ['name', 'type', 'url', 'last_reviewed', 'strike_count']
+    list_filter = ['type']
+    date_hierarchy = 'last_reviewed'
+    # Answered from the name prefix index or url_hash, see get_search_results
+    search_fields = ['name']
+    search_help_text = "The start of a source name, or a full url."
+    readonly_fields = ['last_reviewed', 'updated_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(strike_count=link_count('source_id'))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.startswith(('http://', 'https://')):
+            return queryset.filter(url_hash=url_hash(term)), False
+        if not term:
+            return queryset, False
+        # The whole term as one prefix, so 'miami herald 9' narrows down
+        # rather than matching every name starting with 'miami' or '9'
+        return queryset.filter(name__istartswith=term), False
+
+    @admin.display(description='strikes', ordering='strike_count')
+    def strike_count(self, obj):
+        return obj.strike_count
+
+
+@admin.register(SourceCheck)
+class SourceCheckAdmin(LargeTableAdmin):
+    list_display = ['source', 'checked_at', 'status', 'latency_ms', 'final_url', 'error']
+    list_filter = ['status']
+    list_select_related = ['source']
+    autocomplete_fields = ['source']
+    date_hierarchy = 'checked_at'
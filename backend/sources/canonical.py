@@ -0,0 +1,91 @@
+"""
+Canonical form of source URLs, for spotting the same article linked twice.
+
+Links to one story differ in scheme, ``www.``, trailing slashes, fragments
+and tracking parameters. ``canonicalize_url`` strips all of that, and
+``url_hash`` turns the result into the fixed width key that Source and
+Submission store and index.
+"""
+import hashlib
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit
+
+# Query parameters that only ever track where a click came from. Generic
+# names like ref, cid or s pick out the content on some sites, and two
+# sources sharing a hash are one source, so they stay
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+# Parameters that are only tracking on particular sites
+HOST_TRACKING_PARAMS = {
+    'youtube.com': {'feature', 'si'},
+}
+
+# Hosts that serve the same pages under another name
+HOST_ALIASES = {
+    'twitter.com': 'x.com',
+    'mobile.twitter.com': 'x.com',
+    'mobile.x.com': 'x.com',
+    'm.youtube.com': 'youtube.com',
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Characters left alone when re-quoting the path
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def _tracking(host, key):
+    key = key.lower()
+    return (
+        key in TRACKING_PARAMS
+        or key.startswith(TRACKING_PREFIXES)
+        or key in HOST_TRACKING_PARAMS.get(host, ())
+    )
+
+
+def canonicalize_url(url):
+    """
+    The canonical form of ``url``.
+
+    http and https are treated as the same, hosts are lowercased without
+    ``www.``, default ports, credentials, fragments, trailing slashes and
+    tracking parameters are dropped, and the remaining query is sorted.
+    Anything that doesn't parse as http(s) comes back stripped but
+    otherwise unchanged.
+    """
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    host = HOST_ALIASES.get(host, host)
+    if port is not None and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+
+    path = quote(unquote(parts.path), safe=PATH_SAFE)
+    while '//' in path:
+        path = path.replace('//', '/')
+    path = path.rstrip('/')
+
+    params = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _tracking(host, key)
+    )
+    query = f"?{urlencode(params)}" if params else ''
+    return f"https://{host}{path}{query}"
+
+
+def url_hash(url):
+    """Hex SHA-256 of the canonical form of ``url``."""
+    return hashlib.sha256(canonicalize_url(url).encode()).hexdigest()
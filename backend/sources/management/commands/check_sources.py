@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from sources import linkcheck
+from sources.models import Source, SourceCheck
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every source url concurrently and record status, final url "
+        "and latency in SourceCheck. Requests are conditional on the last "
+        "check's ETag and Last-Modified, and rate limited per host."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=linkcheck.CONCURRENCY,
+                            help="Requests in flight at once, and the connection pool size")
+        parser.add_argument('--per-host', type=int, default=linkcheck.PER_HOST,
+                            help="Requests in flight at once to any one host")
+        parser.add_argument('--interval', type=float, default=linkcheck.HOST_INTERVAL,
+                            help="Seconds between request starts to any one host")
+        parser.add_argument('--timeout', type=float, default=linkcheck.TIMEOUT)
+        parser.add_argument('--batch-size', type=int, default=linkcheck.BATCH_SIZE)
+        parser.add_argument('--stale', type=float, metavar='HOURS',
+                            help="Only check sources not checked in the last HOURS")
+
+    def handle(self, *args, **options):
+        for name in ('concurrency', 'per_host', 'batch_size'):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+
+        sources = Source.objects.all()
+        if options['stale'] is not None:
+            since = timezone.now() - timedelta(hours=options['stale'])
+            sources = sources.exclude(checks__checked_at__gte=since)
+
+        started = timezone.now()
+        clock = time.monotonic()
+        count = linkcheck.run(
+            sources,
+            concurrency=options['concurrency'],
+            per_host=options['per_host'],
+            interval=options['interval'],
+            timeout=options['timeout'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.monotonic() - clock
+
+        totals = SourceCheck.objects.filter(checked_at__gte=started).aggregate(
+            ok=Count('pk', filter=Q(status__gte=200, status__lt=300)),
+            unchanged=Count('pk', filter=Q(status=304)),
+            broken=Count('pk', filter=Q(status__gte=400)),
+            failed=Count('pk', filter=Q(status=None)),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {count} sources in {elapsed:.1f} s: {totals['ok']} ok, "
+            f"{totals['unchanged']} not modified, {totals['broken']} broken, "
+            f"{totals['failed']} unreachable"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sources', '0002_source_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sources', '0003_source_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='source',
+            name='url_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
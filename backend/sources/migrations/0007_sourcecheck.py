@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sources', '0006_source_url_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SourceCheck',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_at', models.DateTimeField()),
+                ('status', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('final_url', models.URLField(blank=True, max_length=2048)),
+                ('latency_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checks', to='sources.source')),
+            ],
+            options={
+                'ordering': ['-checked_at'],
+                'indexes': [models.Index(fields=['source', '-checked_at'], name='source_check_latest_idx')],
+            },
+        ),
+    ]
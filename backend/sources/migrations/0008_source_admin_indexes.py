@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:59
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sources', '0007_sourcecheck'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='source',
+            index=models.Index(fields=['-last_reviewed', '-id'], name='source_reviewed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='source',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('name', models.TextField())), name='text_pattern_ops'), name='source_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sourcecheck',
+            index=models.Index(fields=['-checked_at', '-id'], name='source_check_time_idx'),
+        ),
+    ]
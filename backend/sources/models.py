@@ -1,9 +1,18 @@
+from django.contrib.postgres.indexes import OpClass
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Cast, Upper
+
+from .canonical import url_hash
 
 class Source(models.Model):
     name = models.CharField(max_length=255)
     url = models.URLField()
+    # Hash of the canonical url, so variants of one link are one source.
+    # Set on save, bulk writers set it themselves (see canonicalize_urls)
+    url_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
     last_reviewed = models.DateField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
     class Type(models.TextChoices):
@@ -19,6 +28,62 @@ class Source(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.pk}"
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude)
+        if exclude and 'url' in exclude:
+            return
+        # url_hash isn't on any form, so report a clash against the url
+        clash = Source.objects.filter(url_hash=url_hash(self.url)).exclude(pk=self.pk)
+        if clash.exists():
+            raise ValidationError({'url': "A source with this url (or a variant of it) already exists."})
+
+    def save(self, *args, **kwargs):
+        self.url_hash = url_hash(self.url)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'url_hash'}
+        super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-last_reviewed']
+        indexes = [
+            # The admin changelist order, it adds -pk as a tie breaker
+            models.Index(fields=['-last_reviewed', '-id'], name='source_reviewed_idx'),
+            # Admin '^name' search, which compiles to UPPER(name::text) LIKE 'X%'
+            models.Index(
+                OpClass(Upper(Cast('name', models.TextField())), name='text_pattern_ops'),
+                name='source_name_prefix_idx',
+            ),
+        ]
+
+
+class SourceCheck(models.Model):
+    """One link health check of a source, written by check_sources."""
+    source = models.ForeignKey(Source, on_delete=models.CASCADE, related_name='checks')
+    checked_at = models.DateTimeField()
+    # None when the request never got a response, see error
+    status = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Where redirects ended up
+    final_url = models.URLField(max_length=2048, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    # Validators for the next check's conditional request
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+
+    def __str__(self):
+        return f"{self.source_id} {self.status or self.error} at {self.checked_at}"
+
+    @property
+    def ok(self):
+        # 304 is the page being unchanged since the last check
+        return self.status is not None and (200 <= self.status < 400)
+
+    class Meta:
+        ordering = ['-checked_at']
+        indexes = [
+            models.Index(fields=['-checked_at', '-id'], name='source_check_time_idx'),
+            # Latest check of each source, for the next conditional request
+            models.Index(fields=['source', '-checked_at'], name='source_check_latest_idx'),
+        ]
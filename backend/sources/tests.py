@@ -1,5 +1,17 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
 from django.test import TestCase, Client
-from sources.models import Source
+from dashboard.bench import seed_sources, seed_strikes
+from monitoring.testing import QueryBudgetMixin
+from sources.canonical import canonicalize_url, url_hash
+from sources.models import Source, SourceCheck
 from dashboard.models import Strike
 from datetime import date
 from decimal import Decimal
@@ -103,10 +115,10 @@ class SourcesViewTests(TestCase):
         response = self.client.get(f'/sources/{self.strike.pk}/')
         self.assertEqual(response.context['strike'], self.strike)
 
-    def test_sources_view_context_contains_all_strikes(self):
-        """Context includes all strikes for sidebar."""
+    def test_sources_view_sidebar_lists_the_strike(self):
+        """The rendered sidebar rows include the strike."""
         response = self.client.get(f'/sources/{self.strike.pk}/')
-        self.assertIn(self.strike, response.context['all_strikes'])
+        self.assertIn(f'data-strike-dot="{self.strike.pk}"', response.context['sidebar_html'])
 
     def test_sources_view_filters_by_strike(self):
         """Only sources for the specified strike are returned."""
@@ -139,3 +151,315 @@ class SourcesViewTests(TestCase):
         self.assertEqual(len(sources_in_context), 2)
         self.assertIn(self.source, sources_in_context)
         self.assertIn(source2, sources_in_context)
+
+
+class SourcesQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test that the sources page runs a fixed number of queries however many rows there are."""
+
+    def setUp(self):
+        seed_strikes(20)
+        self.strike = Strike.objects.order_by('pk').first()
+        self.strike.sources.add(Source.objects.create(name="Budget Source", url="https://example.com/budget"))
+
+    def grow(self):
+        seed_strikes(3000, seed=1)
+        seed_sources(6000)
+        # Hundreds of sources on the page itself, an N+1 would show here
+        self.strike.sources.add(*Source.objects.order_by('-pk')[:300])
+
+    def test_index_budget(self):
+        """The strike, its last-modified stamp, its sources, its related strikes and one sidebar page."""
+        metrics = self.assertQueryBudget(f'/sources/{self.strike.pk}/', 5, grow=self.grow)
+        self.assertFalse([sql for sql in metrics.sql if 'DISTINCT' in sql])
+
+
+class SourcePageCacheTests(TestCase):
+    """Test that source writes evict only the sources pages they appear on."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15),
+            location_label="Linked Strike",
+            target="Target",
+            striker="Striker",
+        )
+        self.other = Strike.objects.create(
+            date=date(2024, 2, 1),
+            location_label="Unlinked Strike",
+            target="Target",
+            striker="Striker",
+        )
+        self.unrelated = Strike.objects.create(
+            date=date(2024, 3, 1),
+            location_label="Unrelated Strike",
+            target="Target",
+            striker="Striker",
+        )
+        self.source = Source.objects.create(name="Cached Source", url="https://example.com/cached")
+        self.strike.sources.add(self.source)
+        for strike in (self.strike, self.other, self.unrelated):
+            self.client.get(f'/dashboard/{strike.pk}/')
+            self.client.get(f'/sources/{strike.pk}/')
+
+    def cache_status(self, url):
+        return self.client.get(url)['X-Page-Cache']
+
+    def test_source_edit_evicts_linked_sources_page(self):
+        """Editing a source evicts the sources page of strikes citing it."""
+        self.source.name = "Renamed Source"
+        self.source.save()
+        self.assertEqual(self.cache_status(f'/sources/{self.strike.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/dashboard/{self.strike.pk}/'), 'hit')
+        self.assertEqual(self.cache_status(f'/sources/{self.other.pk}/'), 'hit')
+
+    def test_source_delete_evicts_linked_sources_page(self):
+        """Deleting a source evicts the pages it was listed on."""
+        self.source.delete()
+        response = self.client.get(f'/sources/{self.strike.pk}/')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertNotContains(response, "Cached Source")
+        self.assertEqual(self.cache_status(f'/sources/{self.other.pk}/'), 'hit')
+
+    def test_linking_source_evicts_only_that_strike(self):
+        """strike.sources.add() evicts the strike it was added to."""
+        self.unrelated.sources.add(Source.objects.create(name="Own Source", url="https://example.com/own"))
+        self.assertEqual(self.cache_status(f'/sources/{self.unrelated.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/sources/{self.strike.pk}/'), 'hit')
+
+    def test_shared_source_evicts_related_strikes(self):
+        """Linking a source another strike cites changes both strikes' related lists."""
+        self.other.sources.add(self.source)
+        response = self.client.get(f'/sources/{self.strike.pk}/')
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, "1 shared source\n")
+        self.assertEqual(self.cache_status(f'/sources/{self.other.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/sources/{self.unrelated.pk}/'), 'hit')
+
+        self.other.sources.remove(self.source)
+        self.assertContains(self.client.get(f'/sources/{self.strike.pk}/'), "No other strike cites these sources.")
+
+    def test_reverse_link_changes_evict_affected_strikes(self):
+        """source.strike_set changes evict the strikes on the other side."""
+        self.source.strike_set.add(self.other)
+        self.assertEqual(self.cache_status(f'/sources/{self.other.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/sources/{self.unrelated.pk}/'), 'hit')
+
+        self.source.strike_set.clear()
+        self.assertEqual(self.cache_status(f'/sources/{self.strike.pk}/'), 'miss')
+        self.assertEqual(self.cache_status(f'/sources/{self.other.pk}/'), 'miss')
+
+
+class CanonicalUrlTests(TestCase):
+    """Test source url canonicalization."""
+
+    def test_variants_share_a_canonical_form(self):
+        """Scheme, www, case, ports, fragments, slashes and tracking don't matter."""
+        variants = [
+            "https://example.com/news/story?id=7",
+            "http://www.Example.com/news/story/?id=7",
+            "https://example.com:443/news//story?id=7#comments",
+            "https://example.com/news/story?utm_source=x&id=7&fbclid=abc",
+            "  https://user:pw@EXAMPLE.COM./news/story?id=7  ",
+        ]
+        self.assertEqual({canonicalize_url(url) for url in variants}, {"https://example.com/news/story?id=7"})
+        self.assertEqual(len({url_hash(url) for url in variants}), 1)
+        self.assertEqual(len(url_hash(variants[0])), 64)
+
+    def test_meaningful_differences_are_kept(self):
+        """Paths, real query params and non-default ports still tell urls apart."""
+        self.assertNotEqual(url_hash("https://example.com/a"), url_hash("https://example.com/b"))
+        self.assertNotEqual(url_hash("https://example.com/a?id=1"), url_hash("https://example.com/a?id=2"))
+        self.assertNotEqual(url_hash("https://example.com/a"), url_hash("https://example.com:8080/a"))
+
+    def test_query_is_sorted(self):
+        """Parameter order doesn't matter."""
+        self.assertEqual(canonicalize_url("https://example.com/?b=2&a=1"), canonicalize_url("https://example.com/?a=1&b=2"))
+
+    def test_host_specific_rules(self):
+        """Twitter is x.com and share tracking is dropped on YouTube."""
+        self.assertEqual(
+            canonicalize_url("https://mobile.twitter.com/SOUTHCOM/status/1"),
+            "https://x.com/SOUTHCOM/status/1",
+        )
+        self.assertEqual(
+            canonicalize_url("https://m.youtube.com/watch?v=abc&feature=share&si=xyz"),
+            "https://youtube.com/watch?v=abc",
+        )
+        # Only tracking on that host
+        self.assertEqual(canonicalize_url("https://example.com/?si=term"), "https://example.com?si=term")
+
+    def test_ambiguous_params_are_kept(self):
+        """Names that pick out the content on some sites aren't taken for tracking."""
+        for param in ('cid', 'ref', 'ocid', 's', 't'):
+            with self.subTest(param=param):
+                self.assertNotEqual(
+                    url_hash(f"https://example.com/article?{param}=1"),
+                    url_hash(f"https://example.com/article?{param}=2"),
+                )
+        self.assertNotEqual(url_hash("https://x.com/search?s=1"), url_hash("https://x.com/search?s=2"))
+
+    def test_percent_encoding_is_normalized(self):
+        """Escaped and unescaped paths are the same url."""
+        self.assertEqual(canonicalize_url("https://example.com/a%7Eb"), canonicalize_url("https://example.com/a~b"))
+
+    def test_other_schemes_are_left_alone(self):
+        """Anything but http(s) is only stripped."""
+        self.assertEqual(canonicalize_url(" mailto:press@example.com "), "mailto:press@example.com")
+
+    def test_variant_url_fails_validation(self):
+        """A second source for a variant of a stored url doesn't validate."""
+        Source.objects.create(name="Stored", url="https://example.com/story")
+        variant = Source(name="Variant", url="http://www.example.com/story/", type=Source.Type.PRIMARY)
+        with self.assertRaises(ValidationError) as error:
+            variant.full_clean()
+        self.assertIn('url', error.exception.message_dict)
+
+    def test_save_sets_hash(self):
+        """Saving a source stores the hash of its url."""
+        source = Source.objects.create(name="Hashed", url="http://www.example.com/hashed/")
+        self.assertEqual(source.url_hash, url_hash("https://example.com/hashed"))
+        source.url = "https://example.com/moved"
+        source.save(update_fields=['url'])
+        source.refresh_from_db()
+        self.assertEqual(source.url_hash, url_hash("https://example.com/moved"))
+
+
+class SourceAdminTests(TestCase):
+    """Test the Source admin search."""
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='admin'))
+        self.source = Source.objects.create(name="Miami Herald", url="https://example.com/story")
+        Source.objects.create(name="Reuters", url="https://example.com/other")
+
+    def search(self, term):
+        response = self.client.get('/admin/sources/source/', {'q': term})
+        return [s.name for s in response.context['cl'].result_list]
+
+    def test_name_prefix_search(self):
+        """Names match from the start, case insensitively."""
+        self.assertEqual(self.search('miami'), ["Miami Herald"])
+        self.assertEqual(self.search('herald'), [])
+
+    def test_url_search_matches_variants(self):
+        """A pasted url finds the source through its canonical hash."""
+        self.assertEqual(self.search('http://www.example.com/story/?utm_source=x'), ["Miami Herald"])
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Pages for the link checker to check, served from a local thread."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.requests.append((self.path, dict(self.headers)))
+        try:
+            if self.path == '/ok':
+                if self.headers.get('If-None-Match') == '"v1"':
+                    self.reply(304)
+                else:
+                    self.reply(200, b'fine', ETag='"v1"')
+            elif self.path == '/moved':
+                self.reply(301, Location='/ok')
+            elif self.path == '/slow':
+                time.sleep(1)
+                self.reply(200, b'late')
+            elif self.path.startswith('/busy'):
+                time.sleep(0.05)
+                self.reply(200, b'busy')
+            else:
+                self.reply(404, b'gone')
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def reply(self, status, body=b'', **headers):
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The checker gave up on /slow
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class CheckSourcesTests(TestCase):
+    """Test the check_sources link checker against a local server."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.server.lock = threading.Lock()
+        self.server.in_flight = self.server.max_in_flight = 0
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def source(self, path):
+        return Source.objects.create(name=path, url=self.base + path)
+
+    def check_sources(self, *args):
+        out = StringIO()
+        call_command('check_sources', '--timeout', '0.3', '--interval', '0', *args, stdout=out)
+        return out.getvalue()
+
+    def test_records_status_final_url_and_latency(self):
+        """Every source gets a check row with what the server said."""
+        ok, moved, gone, slow = (self.source(p) for p in ('/ok', '/moved', '/gone', '/slow'))
+        out = self.check_sources()
+        self.assertIn('Checked 4 sources', out)
+        self.assertIn('2 ok, 0 not modified, 1 broken, 1 unreachable', out)
+
+        check = ok.checks.get()
+        self.assertEqual((check.status, check.etag), (200, '"v1"'))
+        self.assertIsNotNone(check.latency_ms)
+        check = moved.checks.get()
+        self.assertEqual((check.status, check.final_url), (200, self.base + '/ok'))
+        self.assertEqual(gone.checks.get().status, 404)
+        check = slow.checks.get()
+        self.assertEqual((check.status, check.error), (None, 'timeout'))
+
+    def test_unreachable_host_is_recorded(self):
+        """A refused connection is an error, not a crash."""
+        source = Source.objects.create(name="Nobody home", url="http://127.0.0.1:9/")
+        self.check_sources()
+        check = source.checks.get()
+        self.assertIsNone(check.status)
+        self.assertIn('ConnectError', check.error)
+
+    def test_second_check_is_conditional(self):
+        """The next check sends the stored ETag and records 304."""
+        source = self.source('/ok')
+        self.check_sources()
+        out = self.check_sources()
+        self.assertIn('0 ok, 1 not modified', out)
+        self.assertEqual(self.server.requests[-1][1].get('If-None-Match'), '"v1"')
+        latest = source.checks.first()
+        self.assertEqual((latest.status, latest.etag), (304, '"v1"'))
+        self.assertTrue(latest.ok)
+
+    def test_stale_skips_recent_checks(self):
+        """--stale only checks sources without a recent check."""
+        self.source('/ok')
+        self.check_sources()
+        self.assertIn('Checked 0 sources', self.check_sources('--stale', '1'))
+
+    def test_per_host_limit(self):
+        """No more than --per-host requests reach one host at once."""
+        for i in range(12):
+            self.source(f'/busy/{i}')
+        self.check_sources('--concurrency', '8', '--per-host', '2', '--batch-size', '5')
+        self.assertEqual(SourceCheck.objects.filter(status=200).count(), 12)
+        self.assertLessEqual(self.server.max_in_flight, 2)
@@ -2,14 +2,29 @@ from django.shortcuts import render
 from django.template import loader
 from django.http import HttpResponse
 
-from .models import Source
-from dashboard.models import Strike
+from dashboard import asyncdb
+from dashboard.detail import load_strike
+from dashboard.related import related_strikes
+from dashboard.caching import cached_strike_page, conditional_strike_page
+from dashboard.sidebar import render_strike_list, sidebar_context
 
-def index(request, strike_pk):
+@conditional_strike_page('sources', pk_kwarg='strike_pk')
+@cached_strike_page('sources', pk_kwarg='strike_pk')
+async def index(request, strike_pk):
     template = loader.get_template('sources/index.html')
+    # Three independent reads, run side by side under ASGI. The strike's
+    # sources are prefetched through the link table's (strike, source)
+    # unique index, whose uniqueness also means no DISTINCT.
+    strike, related, sidebar_html = await asyncdb.gather(
+        request,
+        lambda: load_strike(strike_pk, sources=True),
+        lambda: related_strikes(strike_pk),
+        lambda: render_strike_list('sources'),
+    )
     context = {
-        'strike': Strike.objects.get(pk=strike_pk),
-        'all_strikes': Strike.objects.all(),
-        'sources': Source.objects.filter(strike__pk=strike_pk).distinct()
+        'strike': strike,
+        'sources': strike.sources.all(),
+        'related': related,
+        **sidebar_context('sources', selected=strike, html=sidebar_html),
     }
-    return HttpResponse(template.render(context, request))
\ No newline at end of file
+    return HttpResponse(template.render(context, request))
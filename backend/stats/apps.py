@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class StatsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'stats'
+
+    def ready(self):
+        # Keeps the rollups in step with Strike writes
+        from . import signals  # noqa: F401
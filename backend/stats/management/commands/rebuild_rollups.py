@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from stats.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the strike rollups from scratch. Needed after loaddata or "
+        "bulk writes that skip model signals, otherwise they stay current."
+    )
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} rollup rows"))
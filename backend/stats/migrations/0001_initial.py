@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:34
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    Strike = apps.get_model('dashboard', 'Strike')
+    StrikeRollup = apps.get_model('stats', 'StrikeRollup')
+    totals = defaultdict(lambda: [0, 0, 0])
+    rows = Strike.objects.values_list(
+        'date', 'striker', 'target_origin', 'number_killed', 'crew_number',
+    ).iterator(chunk_size=2000)
+    for day, striker, origin, killed, crew in rows:
+        starts = (('week', day - timedelta(days=day.weekday())), ('month', day.replace(day=1)))
+        for period, start in starts:
+            for dimension, value in (('all', ''), ('striker', striker), ('target_origin', origin or '')):
+                total = totals[(period, start, dimension, value)]
+                total[0] += 1
+                total[1] += killed or 0
+                total[2] += crew or 0
+    StrikeRollup.objects.bulk_create([
+        StrikeRollup(
+            period=period, period_start=start, dimension=dimension, value=value,
+            strikes=strikes, killed=killed, crew=crew,
+        )
+        for (period, start, dimension, value), (strikes, killed, crew) in totals.items()
+    ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('dashboard', '0014_strike_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StrikeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('dimension', models.CharField(choices=[('all', 'All strikes'), ('striker', 'Striker'), ('target_origin', 'Target origin')], max_length=13)),
+                ('value', models.CharField(blank=True, max_length=255)),
+                ('strikes', models.IntegerField(default=0)),
+                ('killed', models.IntegerField(default=0)),
+                ('crew', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['period', 'dimension', '-period_start', 'value'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'dimension', 'period_start', 'value'), name='strike_rollup_key')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
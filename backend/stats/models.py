@@ -0,0 +1,41 @@
+from django.db import models
+
+
+class StrikeRollup(models.Model):
+    """
+    Running totals of strikes for one period, optionally narrowed to one
+    striker or target origin.
+
+    Maintained incrementally by stats.signals, ``rebuild_rollups``
+    recomputes the whole table from Strike.
+    """
+
+    class Period(models.TextChoices):
+        WEEK = 'week', 'Week'
+        MONTH = 'month', 'Month'
+
+    class Dimension(models.TextChoices):
+        ALL = 'all', 'All strikes'
+        STRIKER = 'striker', 'Striker'
+        TARGET_ORIGIN = 'target_origin', 'Target origin'
+
+    period = models.CharField(max_length=5, choices=Period.choices)
+    period_start = models.DateField()
+    dimension = models.CharField(max_length=13, choices=Dimension.choices)
+    # Striker or origin, blank for ALL and for strikes with no origin
+    value = models.CharField(max_length=255, blank=True)
+    strikes = models.IntegerField(default=0)
+    killed = models.IntegerField(default=0)
+    crew = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} {self.dimension}={self.value}"
+
+    class Meta:
+        ordering = ['period', 'dimension', '-period_start', 'value']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'dimension', 'period_start', 'value'],
+                name='strike_rollup_key',
+            ),
+        ]
@@ -0,0 +1,157 @@
+"""
+Incrementally maintained strike totals.
+
+Every strike counts towards one StrikeRollup row per period and dimension:
+its week and its month, each for all strikes, for its striker and for its
+target origin. A save or delete becomes a set of deltas on those rows
+(minus the old values, plus the new ones) applied in one upsert, so the
+rollups never need a GROUP BY over Strike outside ``rebuild``.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+
+from dashboard.models import Strike
+
+from .models import StrikeRollup
+
+Period = StrikeRollup.Period
+Dimension = StrikeRollup.Dimension
+
+# Strike columns the rollups depend on, changing anything else is free
+ROLLUP_FIELDS = ('date', 'striker', 'target_origin', 'number_killed', 'crew_number')
+
+# Column each dimension groups by, None for the all strikes total
+DIMENSION_COLUMNS = {
+    Dimension.ALL: None,
+    Dimension.STRIKER: 'striker',
+    Dimension.TARGET_ORIGIN: 'target_origin',
+}
+
+UPSERT = """
+INSERT INTO {table} (period, period_start, dimension, value, strikes, killed, crew)
+VALUES {rows}
+ON CONFLICT (period, dimension, period_start, value) DO UPDATE SET
+    strikes = {table}.strikes + EXCLUDED.strikes,
+    killed = {table}.killed + EXCLUDED.killed,
+    crew = {table}.crew + EXCLUDED.crew
+RETURNING id, strikes
+"""
+
+
+def period_start(period, day):
+    """First day of the week (Monday) or month that ``day`` falls in."""
+    if period == Period.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def strike_values(strike):
+    """The rollup columns of a Strike instance as a dict."""
+    return {field: getattr(strike, field) for field in ROLLUP_FIELDS}
+
+
+def rollup_keys(values):
+    """(period, period_start, dimension, value) of every row a strike counts towards."""
+    for period in Period:
+        start = period_start(period, values['date'])
+        for dimension, column in DIMENSION_COLUMNS.items():
+            value = (values[column] or '') if column else ''
+            yield period.value, start, dimension.value, value
+
+
+def strike_deltas(old=None, new=None):
+    """
+    Changes to the rollups when a strike goes from ``old`` to ``new``.
+
+    Either side is a dict of ROLLUP_FIELDS, or None for a created or deleted
+    strike. Returns ``{key: [strikes, killed, crew]}`` without the keys that
+    cancel out, so an edit that leaves the rollup columns alone is empty.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for values, sign in ((old, -1), (new, 1)):
+        if values is None:
+            continue
+        totals = (1, values['number_killed'] or 0, values['crew_number'] or 0)
+        for key in rollup_keys(values):
+            delta = deltas[key]
+            for i, total in enumerate(totals):
+                delta[i] += sign * total
+    return {key: delta for key, delta in deltas.items() if any(delta)}
+
+
+def merge_deltas(many):
+    """Sum several ``strike_deltas`` results so they go in one upsert."""
+    merged = defaultdict(lambda: [0, 0, 0])
+    for deltas in many:
+        for key, delta in deltas.items():
+            total = merged[key]
+            for i, value in enumerate(delta):
+                total[i] += value
+    return {key: total for key, total in merged.items() if any(total)}
+
+
+def apply_deltas(deltas):
+    """Add ``deltas`` to the rollups in one upsert and drop rows left empty."""
+    if not deltas:
+        return
+    # Same key order in every transaction so concurrent writers can't
+    # deadlock on each other's row locks
+    keys = sorted(deltas)
+    params = []
+    for key in keys:
+        params.extend(key)
+        params.extend(deltas[key])
+    sql = UPSERT.format(
+        table=connection.ops.quote_name(StrikeRollup._meta.db_table),
+        rows=', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(keys)),
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            empty = [pk for pk, strikes in cursor.fetchall() if strikes == 0]
+        if empty:
+            StrikeRollup.objects.filter(pk__in=empty).delete()
+
+
+def _grouped(period, dimension):
+    trunc = TruncWeek if period == Period.WEEK else TruncMonth
+    column = DIMENSION_COLUMNS[dimension]
+    rows = Strike.objects.annotate(
+        start=trunc('date'),
+        group=Coalesce(F(column), Value('')) if column else Value(''),
+    )
+    return rows.values('start', 'group').annotate(
+        strikes=Count('pk'),
+        killed=Coalesce(Sum('number_killed'), 0),
+        crew=Coalesce(Sum('crew_number'), 0),
+    ).order_by()
+
+
+def rebuild():
+    """Throw the rollups away and recompute them from Strike. Returns the row count."""
+    with transaction.atomic():
+        rollups = [
+            StrikeRollup(
+                period=period, period_start=row['start'], dimension=dimension,
+                value=row['group'], strikes=row['strikes'], killed=row['killed'],
+                crew=row['crew'],
+            )
+            for period in Period
+            for dimension in Dimension
+            for row in _grouped(period, dimension)
+        ]
+        StrikeRollup.objects.all().delete()
+        StrikeRollup.objects.bulk_create(rollups, batch_size=2000)
+    return len(rollups)
+
+
+def snapshot():
+    """Every rollup as ``{key: (strikes, killed, crew)}``, for comparing tables."""
+    return {
+        (r.period, r.period_start, r.dimension, r.value): (r.strikes, r.killed, r.crew)
+        for r in StrikeRollup.objects.all()
+    }
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dashboard.models import Strike
+from dashboard.signals import strikes_bulk_saved
+
+from .rollups import apply_deltas, merge_deltas, strike_deltas, strike_values
+
+
+@receiver(post_save, sender=Strike)
+def strike_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        # loaddata, run rebuild_rollups once the fixtures are in
+        return
+    # dashboard.signals stashes the row as it was before the save
+    previous = None if created else getattr(instance, '_previous', None)
+    apply_deltas(strike_deltas(previous, strike_values(instance)))
+
+
+@receiver(post_delete, sender=Strike)
+def strike_deleted(sender, instance, **kwargs):
+    apply_deltas(strike_deltas(strike_values(instance), None))
+
+
+@receiver(strikes_bulk_saved)
+def strikes_bulk_changed(sender, strikes, previous, **kwargs):
+    apply_deltas(merge_deltas(
+        strike_deltas(previous.get(strike.pk), strike_values(strike)) for strike in strikes
+    ))
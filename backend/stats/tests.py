@@ -0,0 +1,146 @@
+from datetime import date, timedelta
+from io import StringIO
+from random import Random
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+
+from dashboard.models import Strike
+from stats.models import StrikeRollup
+from stats.rollups import period_start, rebuild, snapshot, strike_deltas
+
+
+def make_strike(**fields):
+    values = {
+        'date': date(2025, 9, 3), 'location_label': "Rollup", 'target': "Vessel",
+        'striker': "US Navy", 'target_origin': "Venezuela", 'number_killed': 3,
+        'crew_number': 4,
+    }
+    values.update(fields)
+    return Strike.objects.create(**values)
+
+
+class RollupDeltaTests(TestCase):
+    """Test how strike changes turn into rollup deltas."""
+
+    def test_week_starts_monday(self):
+        """Weeks start on Monday, months on the first."""
+        self.assertEqual(period_start('week', date(2025, 9, 7)), date(2025, 9, 1))
+        self.assertEqual(period_start('month', date(2025, 9, 7)), date(2025, 9, 1))
+
+    def test_unrelated_edit_is_empty(self):
+        """Old and new values that agree cancel out completely."""
+        values = {'date': date(2025, 9, 3), 'striker': "A", 'target_origin': None,
+                  'number_killed': 1, 'crew_number': None}
+        self.assertEqual(strike_deltas(values, dict(values)), {})
+
+    def test_killed_change_only_touches_totals(self):
+        """Changing number_killed moves killed, not strike counts."""
+        old = {'date': date(2025, 9, 3), 'striker': "A", 'target_origin': "B",
+               'number_killed': 1, 'crew_number': 2}
+        deltas = strike_deltas(old, dict(old, number_killed=5))
+        self.assertEqual(len(deltas), 6)
+        self.assertTrue(all(delta == [0, 4, 0] for delta in deltas.values()))
+
+
+class RollupMaintenanceTests(TestCase):
+    """Test that signal-maintained rollups match a full recompute."""
+
+    def assertMatchesRecompute(self):
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(incremental, snapshot())
+
+    def test_create_edit_delete(self):
+        """Create, edit and delete keep the rollups exact."""
+        strike = make_strike()
+        row = StrikeRollup.objects.get(period='month', dimension='striker', value="US Navy")
+        self.assertEqual((row.strikes, row.killed, row.crew), (1, 3, 4))
+
+        strike.striker = "US Coast Guard"
+        strike.date = date(2025, 10, 20)
+        strike.save()
+        self.assertFalse(StrikeRollup.objects.filter(value="US Navy").exists())
+        self.assertMatchesRecompute()
+
+        strike.delete()
+        self.assertFalse(StrikeRollup.objects.exists())
+
+    def test_random_edits_match_recompute(self):
+        """Rollups equal a from-scratch GROUP BY after random writes."""
+        rng = Random(9)
+        strikers = ["US Navy", "US Coast Guard", "SOUTHCOM"]
+        origins = [None, "", "Venezuela", "Colombia"]
+        counts = [None, 0, 1, 2, 5]
+        start = date(2025, 8, 25)
+        strikes = [
+            make_strike(
+                date=start + timedelta(days=rng.randrange(60)), striker=rng.choice(strikers),
+                target_origin=rng.choice(origins), number_killed=rng.choice(counts),
+                crew_number=rng.choice(counts),
+            )
+            for _ in range(20)
+        ]
+        for _ in range(100):
+            strike = rng.choice(strikes)
+            action = rng.random()
+            if action < 0.1:
+                strikes.remove(strike)
+                strike.delete()
+                strikes.append(make_strike(date=start + timedelta(days=rng.randrange(60))))
+                continue
+            if action < 0.3:
+                strike.date = start + timedelta(days=rng.randrange(60))
+            if rng.random() < 0.4:
+                strike.striker = rng.choice(strikers)
+            if rng.random() < 0.4:
+                strike.target_origin = rng.choice(origins)
+            if rng.random() < 0.4:
+                strike.number_killed = rng.choice(counts)
+            if rng.random() < 0.4:
+                strike.crew_number = rng.choice(counts)
+            if rng.random() < 0.2:
+                strike.summary = "Unrelated edit"
+            strike.save()
+        self.assertMatchesRecompute()
+        total = StrikeRollup.objects.filter(period='week', dimension='all')
+        self.assertEqual(sum(r.strikes for r in total), Strike.objects.count())
+
+    def test_rebuild_command(self):
+        """rebuild_rollups repairs rollups after writes that skip signals."""
+        make_strike()
+        Strike.objects.update(number_killed=10)
+        call_command('rebuild_rollups', stdout=StringIO())
+        row = StrikeRollup.objects.get(period='week', dimension='all')
+        self.assertEqual(row.killed, 10)
+
+
+class StatsViewTests(TestCase):
+    """Test the statistics page and JSON endpoint."""
+
+    def setUp(self):
+        self.client = Client()
+        make_strike()
+        make_strike(date=date(2025, 10, 1), striker="US Coast Guard", number_killed=None)
+
+    def test_page_reads_only_rollups(self):
+        """The page renders from the rollup table without touching Strike."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/stats/', {'dimension': 'striker'})
+        self.assertContains(response, "US Coast Guard")
+        self.assertContains(response, "September 2025")
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any('dashboard_strike' in q['sql'] for q in queries))
+
+    def test_json(self):
+        """The JSON endpoint returns period rows and all time totals."""
+        data = self.client.get('/stats/rollups.json', {'period': 'week', 'dimension': 'striker'}).json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual({t['value']: t['killed'] for t in data['totals']}, {"US Navy": 3, "US Coast Guard": 0})
+
+    def test_bad_parameters_are_400(self):
+        """Unknown periods and dimensions are rejected."""
+        self.assertEqual(self.client.get('/stats/', {'period': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get('/stats/rollups.json', {'dimension': 'x'}).status_code, 400)
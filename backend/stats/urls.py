@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'stats'
+
+urlpatterns = [
+    path('', views.index, name='index'),
+    path('rollups.json', views.rollups_json, name='rollups_json'),
+]
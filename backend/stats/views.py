@@ -0,0 +1,69 @@
+from django.db.models import Sum
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.template import loader
+
+from .models import StrikeRollup
+
+# Periods shown per page and returned per API call, newest first
+MAX_PERIODS = 104
+
+
+def _rollups(request):
+    """Rollups picked with ``?period=`` and ``?dimension=``, ValueError if unknown."""
+    period = request.GET.get('period', StrikeRollup.Period.MONTH)
+    dimension = request.GET.get('dimension', StrikeRollup.Dimension.ALL)
+    if period not in StrikeRollup.Period.values or dimension not in StrikeRollup.Dimension.values:
+        raise ValueError
+    rollups = StrikeRollup.objects.filter(period=period, dimension=dimension)
+    starts = (
+        rollups.values_list('period_start', flat=True)
+        .order_by('-period_start').distinct()[:MAX_PERIODS]
+    )
+    rollups = rollups.filter(period_start__in=starts).order_by('-period_start', '-strikes', 'value')
+    return period, dimension, rollups
+
+
+def _totals(dimension):
+    """All time totals per value, summed from the monthly rollups."""
+    return (
+        StrikeRollup.objects
+        .filter(period=StrikeRollup.Period.MONTH, dimension=dimension)
+        .values('value')
+        .annotate(strikes=Sum('strikes'), killed=Sum('killed'), crew=Sum('crew'))
+        .order_by('-strikes', 'value')
+    )
+
+
+def index(request):
+    """Strike, killed and crew totals read from the rollup table only."""
+    try:
+        period, dimension, rollups = _rollups(request)
+    except ValueError:
+        return HttpResponseBadRequest('Unknown period or dimension')
+
+    template = loader.get_template('stats/index.html')
+    context = {
+        'period': period,
+        'dimension': dimension,
+        'dimension_label': StrikeRollup.Dimension(dimension).label,
+        'periods': StrikeRollup.Period.choices,
+        'dimensions': StrikeRollup.Dimension.choices,
+        'rollups': rollups,
+        'totals': _totals(dimension),
+    }
+    return HttpResponse(template.render(context, request))
+
+
+def rollups_json(request):
+    """The same rollups as the stats page, as JSON."""
+    try:
+        period, dimension, rollups = _rollups(request)
+    except ValueError:
+        return JsonResponse({'error': 'Unknown period or dimension'}, status=400)
+
+    return JsonResponse({
+        'period': period,
+        'dimension': dimension,
+        'results': list(rollups.values('period_start', 'value', 'strikes', 'killed', 'crew')),
+        'totals': list(_totals(dimension)),
+    })
@@ -1,5 +1,85 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from .models import Submission
+from dashboard.changelist import LargeTableAdmin
+from dashboard.importer import unhashed_sources
+from dashboard.search import search_query, search_terms
+from sources.canonical import url_hash
 
-admin.site.register(Submission)
\ No newline at end of file
+from .approval import approve
+from .models import DESCRIPTION_VECTOR, Submission
+
+
+class ReviewFilter(admin.SimpleListFilter):
+    """Lets moderators hide repeat submissions of a url."""
+    title = 'review'
+    parameter_name = 'review'
+
+    def lookups(self, request, model_admin):
+        return [
+            ('distinct', 'One per source url'),
+            ('duplicates', 'Duplicates only'),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() == 'distinct':
+            return queryset.filter(duplicate_of=None)
+        if self.value() == 'duplicates':
+            return queryset.exclude(duplicate_of=None)
+        return queryset
+
+
+@admin.register(Submission)
+class SubmissionAdmin(LargeTableAdmin):
+    list_display = ['description', 'source_url', 'submitted_at', 'approved', 'existing_strike', 'source', 'duplicate_count']
+    list_filter = [ReviewFilter, 'approved', 'new_strike']
+    list_select_related = ['existing_strike', 'source']
+    date_hierarchy = 'submitted_at'
+    # Only turns the search box on, get_search_results goes through the
+    # description's full-text index and url_hash instead
+    search_fields = ['description']
+    search_help_text = "Words from the description, or a full source url."
+    autocomplete_fields = ['existing_strike', 'source']
+    raw_id_fields = ['duplicate_of']
+    readonly_fields = ['url_hash']
+    actions = ['approve_selected']
+
+    def get_queryset(self, request):
+        # A subquery rather than Count('duplicates'), so only the rows on
+        # the page get counted
+        duplicates = (
+            Submission.objects.filter(duplicate_of=OuterRef('pk'))
+            .order_by().values('duplicate_of').annotate(count=Count('*')).values('count')
+        )
+        return super().get_queryset(request).annotate(duplicate_count=Coalesce(Subquery(duplicates), 0))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if term.startswith(('http://', 'https://')):
+            return queryset.filter(url_hash=url_hash(term)), False
+        terms = search_terms(term)
+        if not terms:
+            return queryset, False
+        return queryset.alias(description_vector=DESCRIPTION_VECTOR).filter(
+            description_vector=search_query(terms, prefix=True),
+        ), False
+
+    @admin.action(description="Approve selected submissions and their duplicates", permissions=['change'])
+    def approve_selected(self, request, queryset):
+        if unhashed_sources():
+            self.message_user(
+                request, "Some sources have no url hash yet, run `manage.py canonicalize_urls` first.",
+                messages.ERROR,
+            )
+            return
+        totals = approve(queryset)
+        self.message_user(
+            request,
+            f"Approved {totals['submissions']} submissions, created {totals['strikes']} strikes "
+            f"and added {totals['links']} source links.",
+        )
+
+    @admin.display(description='duplicates', ordering='duplicate_count')
+    def duplicate_count(self, obj):
+        return obj.duplicate_count
@@ -0,0 +1,166 @@
+"""
+Batched approval of submissions, used by the admin action and
+``approve_submissions``.
+
+Approving a submission promotes it into the site's data: its source_url
+becomes (or reuses) a Source linked to the strike it is about, and a
+new-strike submission becomes a Strike dated ``new_strike_date``.
+Approving an original approves its duplicates along with it, they are
+the same source.
+
+Work is done in chunks, one transaction each. A chunk is one strike
+insert, one source upsert, one through table insert and one UPDATE
+stamping the submissions approved, however many submissions it holds.
+Strikes made from a submission are keyed by ``external_id``, so a chunk
+that is retried, or a submission approved twice, never makes a second
+strike.
+"""
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from dashboard.importer import upsert_sources
+from dashboard.models import Strike
+from dashboard.signals import strikes_bulk_saved
+from sources.canonical import url_hash
+from sources.models import Source
+
+from .duplicates import link_duplicates
+from .models import Submission
+
+BATCH_SIZE = 500
+
+# What a submission doesn't tell us about a new strike, for moderators
+# to fill in afterwards
+NEW_STRIKE_DEFAULTS = {
+    'location_label': 'Unconfirmed location',
+    'target': 'Unknown',
+    'striker': 'Unknown',
+}
+
+
+def strike_key(submission):
+    """external_id of the strike a new-strike submission becomes."""
+    # Duplicates report the same strike as their original
+    return f'submission-{submission.duplicate_of_id or submission.pk}'
+
+
+def _new_strikes(submissions):
+    """Create the strikes new-strike submissions describe. Returns ``({key: pk}, created)``."""
+    wanted = {}
+    for submission in submissions:
+        if submission.new_strike:
+            # setdefault, the original comes first in pk order
+            wanted.setdefault(strike_key(submission), submission)
+    if not wanted:
+        return {}, []
+    stored = set(Strike.objects.filter(external_id__in=wanted).values_list('external_id', flat=True))
+    Strike.objects.bulk_create([
+        Strike(
+            external_id=key,
+            date=submission.new_strike_date or timezone.localdate(submission.submitted_at),
+            summary=submission.description[:1500],
+            **NEW_STRIKE_DEFAULTS,
+        )
+        for key, submission in wanted.items() if key not in stored
+    ], ignore_conflicts=True)
+    # ignore_conflicts leaves pks unset, read them back along with any
+    # strike a concurrent run got in first
+    strikes = list(Strike.objects.filter(external_id__in=wanted))
+    created = [strike for strike in strikes if strike.external_id not in stored]
+    return {strike.external_id: strike.pk for strike in strikes}, created
+
+
+def _sources(submissions):
+    sources = []
+    for submission in submissions:
+        source = Source(
+            url=submission.source_url,
+            url_hash=submission.url_hash or url_hash(submission.source_url),
+            name=urlsplit(submission.source_url).netloc or submission.source_url,
+            type=Source.Type.PRIMARY,
+        )
+        # Never rename a stored source after a submitted link
+        source.named = False
+        sources.append(source)
+    return upsert_sources(sources)
+
+
+def approve_batch(submissions, now):
+    """
+    Approve one chunk of unapproved submissions in a single transaction.
+
+    Returns ``(strikes created, links added)``.
+    """
+    Link = Strike.sources.through
+    with transaction.atomic():
+        strike_pks, created = _new_strikes(submissions)
+        source_pks = _sources(submissions)
+
+        links = set()
+        for submission in submissions:
+            if submission.new_strike:
+                strike_pk = strike_pks[strike_key(submission)]
+            else:
+                # None when the strike was deleted, the source still counts
+                strike_pk = submission.existing_strike_id
+            if strike_pk is not None:
+                links.add((strike_pk, source_pks[submission.url_hash or url_hash(submission.source_url)]))
+        linked = set(
+            Link.objects
+            .filter(strike_id__in={strike_pk for strike_pk, _ in links})
+            .values_list('strike_id', 'source_id')
+        )
+        links -= linked
+        Link.objects.bulk_create(
+            [Link(strike_id=strike_pk, source_id=source_pk) for strike_pk, source_pk in links],
+            ignore_conflicts=True,
+        )
+
+        Submission.objects.filter(pk__in=[s.pk for s in submissions]).update(approved=True, reviewed_at=now)
+        link_duplicates({s.url_hash for s in submissions if s.url_hash})
+
+        # Existing strikes that gained a source changed too, as far as
+        # their pages go, see import_batch
+        created_pks = {strike.pk for strike in created}
+        relinked = {strike_pk for strike_pk, _ in links} - created_pks
+        previous = {}
+        if relinked:
+            previous = {row['id']: row for row in Strike.objects.filter(pk__in=relinked).values()}
+            Strike.objects.filter(pk__in=relinked).update(updated_at=now)
+        saved = created + list(Strike.objects.filter(pk__in=relinked))
+        if saved:
+            strikes_bulk_saved.send(sender=Strike, strikes=saved, previous=previous)
+    return len(created), len(links)
+
+
+def approve(queryset, batch_size=BATCH_SIZE):
+    """
+    Approve every unapproved submission in ``queryset`` and their
+    duplicates. Safe to re-run, approved submissions are skipped.
+
+    Returns a dict of counts: submissions approved, strikes created and
+    strike/source links added.
+    """
+    pending = Submission.objects.filter(
+        Q(pk__in=queryset.values('pk')) | Q(duplicate_of__in=queryset.values('pk')),
+        approved=False,
+    )
+    totals = {'submissions': 0, 'strikes': 0, 'links': 0}
+    last = 0
+    while True:
+        with transaction.atomic():
+            # Locked so two runs can't approve the same chunk at once
+            chunk = list(
+                pending.filter(pk__gt=last).order_by('pk')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not chunk:
+                return totals
+            strikes, links = approve_batch(chunk, timezone.now())
+        totals['submissions'] += len(chunk)
+        totals['strikes'] += strikes
+        totals['links'] += links
+        last = chunk[-1].pk
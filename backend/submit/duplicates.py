@@ -0,0 +1,77 @@
+"""
+Duplicate detection for submissions.
+
+Every submission stores the hash of its canonical source url (see
+sources.canonical). Submissions sharing a hash are one source submitted
+several times: the earliest is the original and the rest point at it
+through ``duplicate_of``, so moderators review each distinct source once.
+A submission of a url that is already a Source links to it through
+``source``.
+"""
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from sources.canonical import url_hash
+from sources.models import Source
+
+from .models import Submission
+
+
+def existing(source_url):
+    """
+    What the site already has for ``source_url``, checked at submit time.
+
+    Returns ``('source', pk)`` for a stored Source, ``('submission', pk)``
+    for one already waiting for review, or ``(None, None)``. Both lookups
+    are on an indexed hash.
+    """
+    digest = url_hash(source_url)
+    source_pk = Source.objects.filter(url_hash=digest).values_list('pk', flat=True).first()
+    if source_pk is not None:
+        return 'source', source_pk
+    submission_pk = (
+        Submission.objects.filter(url_hash=digest)
+        .order_by('submitted_at', 'pk')
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if submission_pk is not None:
+        return 'submission', submission_pk
+    return None, None
+
+
+def link_duplicates(hashes):
+    """
+    Resolve ``source`` and ``duplicate_of`` for every submission with one
+    of ``hashes``. Three UPDATEs however many hashes there are.
+    """
+    hashes = list(hashes)
+    if not hashes:
+        return
+    group = Submission.objects.filter(url_hash__in=hashes)
+    earliest = Subquery(
+        Submission.objects.filter(url_hash=OuterRef('url_hash'))
+        .order_by('submitted_at', 'pk')
+        .values('pk')[:1]
+    )
+    # A submission queued before the original but flushed after it takes
+    # over, so update the whole group rather than just the new rows
+    group.filter(pk=earliest).exclude(duplicate_of=None).update(duplicate_of=None)
+    group.exclude(pk=earliest).update(duplicate_of=earliest)
+    group.filter(source=None).update(
+        source=Subquery(Source.objects.filter(url_hash=OuterRef('url_hash')).values('pk')[:1])
+    )
+
+
+def review_queue():
+    """
+    Unapproved submissions, one per distinct source url.
+
+    Each carries ``duplicate_count``, the number of later submissions of
+    the same url it stands in for.
+    """
+    return (
+        Submission.objects
+        .filter(approved=False, duplicate_of=None)
+        .annotate(duplicate_count=Count('duplicates', filter=Q(duplicates__approved=False)))
+        .select_related('source', 'existing_strike')
+    )
@@ -4,6 +4,7 @@ from django.utils import timezone
 # IMPORTANT: adjust this import to your actual Strike model location
 from .models import Strike  # <-- if Strike is in the same app/models.py
 # If Strike is in a different app, do: from strikes.models import Strike (or whatever app name)
+from dashboard.models import StrikeListEntry
 
 
 class SubmitForm(forms.Form):
@@ -25,9 +26,11 @@ class SubmitForm(forms.Form):
         required=True,
     )
 
-    # Safe: no DB query at import time
+    # Choices are StrikeListEntry rows, their pk is the Strike pk. The
+    # picker never renders the queryset (strikes come from the typeahead),
+    # and validation only fetches the submitted pks with one pk__in query
     strike_list = forms.ModelMultipleChoiceField(
-        queryset=Strike.objects.none(),
+        queryset=StrikeListEntry.objects.all(),
         label="Strike List",
         required=False,
     )
@@ -41,7 +44,11 @@ class SubmitForm(forms.Form):
         required=False,
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Safe: no assumptions about Strike fields
-        self.fields["strike_list"].queryset = Strike.objects.all()
+    def selected_strikes(self):
+        """The strikes picked so far, to show them again when the form comes back with errors."""
+        if not self.is_bound:
+            return []
+        pks = [pk for pk in self["strike_list"].value() or [] if str(pk).isdigit()]
+        if not pks:
+            return []
+        return list(StrikeListEntry.objects.filter(pk__in=pks))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.importer import unhashed_sources
+from submit.approval import BATCH_SIZE, approve
+from submit.models import Submission
+
+
+class Command(BaseCommand):
+    help = (
+        "Approve submissions in batches: make strikes of new-strike "
+        "submissions, make or reuse a Source for each url and link them. "
+        "Duplicates are approved with their original. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pks', nargs='*', type=int, help="Submissions to approve")
+        parser.add_argument('--all', action='store_true', help="Approve every unapproved submission")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if bool(options['pks']) == options['all']:
+            raise CommandError("Give submission pks or --all, not both")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if unhashed_sources():
+            raise CommandError("Some sources have no url hash yet, run `manage.py canonicalize_urls` first")
+        queryset = Submission.objects.all() if options['all'] else Submission.objects.filter(pk__in=options['pks'])
+        totals = approve(queryset, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Approved {totals['submissions']} submissions, created {totals['strikes']} strikes "
+            f"and added {totals['links']} source links"
+        ))
@@ -0,0 +1,65 @@
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+
+from dashboard.bench import seed_strikes, throwaway_database
+from dashboard.models import Strike
+from submit.queue import flush
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the submit endpoint: POST as fast as possible from several "
+        "threads, then time flushing the queue. Runs in a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strikes', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--threads', type=int, default=4)
+
+    def handle(self, *args, **options):
+        with throwaway_database(), tempfile.TemporaryDirectory() as spool, \
+                override_settings(ALLOWED_HOSTS=['testserver'], SUBMISSION_SPOOL_DIR=spool):
+            seed_strikes(options['strikes'])
+            data = {
+                'description': "Load test",
+                'source_url': "https://example.com/story",
+                'existing_strike': 'existing',
+                'strike_list': [Strike.objects.first().pk],
+            }
+            per_thread = options['requests'] // options['threads']
+            timings, statuses = [], set()
+
+            def post():
+                client = Client()
+                for _ in range(per_thread):
+                    start = time.perf_counter()
+                    statuses.add(client.post('/submit/', data).status_code)
+                    timings.append((time.perf_counter() - start) * 1000)
+                connection.close()
+
+            threads = [threading.Thread(target=post) for _ in range(options['threads'])]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            timings.sort()
+            self.stdout.write(
+                f"POST /submit/ x{len(timings)} on {options['threads']} threads: "
+                f"{len(timings) / elapsed:,.0f} req/s, p50 {statistics.median(timings):.2f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms, status {sorted(statuses)}"
+            )
+
+            start = time.perf_counter()
+            count = flush()
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"flush: {count} submissions in {elapsed * 1000:.0f} ms, {count / elapsed:,.0f}/s")
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from sources.canonical import url_hash
+from sources.models import Source
+from submit.duplicates import link_duplicates
+from submit.models import Submission
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in the canonical url hash of every Source and Submission, in "
+        "chunks, and flag repeat submissions as duplicates. Sources that turn "
+        "out to be the same url as another keep the hash they had (if any) "
+        "and are listed, for a moderator to merge or fix by hand. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would be hashed and which sources collide, without writing anything.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+        dry_run = options['dry_run']
+        hashed, collisions = self.sources(batch_size, dry_run)
+        submissions = self.submissions(batch_size, dry_run)
+        for pk, url, owner in collisions:
+            self.stdout.write(self.style.WARNING(
+                f"Source {pk} ({url}) is the same url as source {owner}, its hash is left as it is"
+            ))
+        verb = "Would hash" if dry_run else "Hashed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {hashed} sources ({len(collisions)} colliding) and {submissions} submissions"
+        ))
+
+    def chunks(self, queryset, batch_size, *fields):
+        # Keyset on pk, so each chunk is an index range scan however far in
+        last = 0
+        while True:
+            rows = list(queryset.filter(pk__gt=last).order_by('pk').values_list('pk', *fields)[:batch_size])
+            if not rows:
+                return
+            yield rows
+            last = rows[-1][0]
+
+    def sources(self, batch_size, dry_run):
+        """
+        Hash sources whose canonical url is still free. The row that already
+        has a hash keeps it, otherwise the oldest; the rest are returned as
+        ``(pk, url, owner)`` collisions, since url_hash is unique.
+        """
+        hashed, collisions = 0, []
+        # Hashes this run has handed out, so a dry run sees its own writes
+        claimed = {}
+        for rows in self.chunks(Source.objects.all(), batch_size, 'url', 'url_hash'):
+            digests = {pk: url_hash(url) for pk, url, _ in rows}
+            owners = dict(
+                Source.objects.filter(url_hash__in=set(digests.values())).values_list('url_hash', 'pk')
+            )
+            stale = []
+            for pk, url, stored in rows:
+                digest = digests[pk]
+                owner = owners.get(digest) or claimed.setdefault(digest, pk)
+                if owner != pk:
+                    collisions.append((pk, url, owner))
+                elif stored != digest:
+                    stale.append(Source(pk=pk, url_hash=digest))
+            if stale and not dry_run:
+                Source.objects.bulk_update(stale, ['url_hash'])
+            hashed += len(stale)
+        return hashed, collisions
+
+    def submissions(self, batch_size, dry_run):
+        hashed = 0
+        for rows in self.chunks(Submission.objects.all(), batch_size, 'source_url', 'url_hash'):
+            stale = []
+            for pk, source_url, stored in rows:
+                digest = url_hash(source_url)
+                if stored != digest:
+                    stale.append(Submission(pk=pk, url_hash=digest))
+            hashed += len(stale)
+            if dry_run:
+                continue
+            with transaction.atomic():
+                if stale:
+                    Submission.objects.bulk_update(stale, ['url_hash'])
+                link_duplicates({url_hash(source_url) for _, source_url, _ in rows})
+        return hashed
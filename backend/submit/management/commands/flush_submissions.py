@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from submit.queue import flush
+
+
+class Command(BaseCommand):
+    help = (
+        "Write queued source submissions to the database in batches. Run "
+        "with --loop as a long-lived worker next to the web server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep flushing until interrupted")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between flushes with --loop")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.perf_counter()
+            count = flush(options['batch_size'])
+            if count or not options['loop']:
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f"Flushed {count} submissions in {elapsed * 1000:.0f} ms")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
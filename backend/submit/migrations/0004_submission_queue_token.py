@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submit', '0003_submission_new_strike_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='token',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
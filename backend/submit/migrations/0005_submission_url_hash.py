@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0015_strike_external_id'),
+        ('sources', '0006_source_url_hash'),
+        ('submit', '0004_submission_queue_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='submit.submission'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='source',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='sources.source'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='url_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['url_hash', 'submitted_at', 'id'], name='submission_url_hash_idx'),
+        ),
+    ]
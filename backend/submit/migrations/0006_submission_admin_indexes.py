@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_strike_admin_indexes'),
+        ('sources', '0008_source_admin_indexes'),
+        ('submit', '0005_submission_url_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='submission_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['approved', '-submitted_at', '-id'], name='submission_approved_time_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:49
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0018_strikelink'),
+        ('sources', '0008_source_admin_indexes'),
+        ('submit', '0006_submission_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='english'), name='submission_description_idx'),
+        ),
+    ]
@@ -1,18 +1,57 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.utils import timezone
 from dashboard.models import Strike
+from sources.canonical import url_hash
+from sources.models import Source
+
+# Full-text search over descriptions. Queries use this exact expression so
+# Postgres matches them to the index on it.
+DESCRIPTION_VECTOR = SearchVector('description', config='english')
+
 
 class Submission(models.Model):
     description = models.TextField()
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    # When the submission was accepted, which can be a little before the
+    # queue flushes it into this table
+    submitted_at = models.DateTimeField(default=timezone.now)
+    # Set by the submission queue so a record flushed twice is stored once
+    token = models.UUIDField(unique=True, null=True, blank=True, editable=False)
     reviewed_at = models.DateTimeField(null=True, blank=True)
     source_url = models.URLField()
     new_strike = models.BooleanField(default=False)
     new_strike_date = models.DateField(null=True, blank=True)
     existing_strike = models.ForeignKey(Strike, null=True, blank=True, on_delete=models.SET_NULL)
     approved = models.BooleanField(default=False)
+    # Hash of the canonical source_url, see sources.canonical
+    url_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # The Source this url already is, if any
+    source = models.ForeignKey(Source, null=True, blank=True, on_delete=models.SET_NULL)
+    # Earliest submission of the same url, moderators only review that one
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
 
     def __str__(self):
         return f"{self.description} - {self.pk}"
+
+    def save(self, *args, **kwargs):
+        self.url_hash = url_hash(self.source_url)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'source_url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'url_hash'}
+        super().save(*args, **kwargs)
     
     class Meta:
-        ordering = ['-submitted_at']
\ No newline at end of file
+        ordering = ['-submitted_at']
+        indexes = [
+            # Lookups by url and "earliest submission of this url" are both
+            # one index probe
+            models.Index(fields=['url_hash', 'submitted_at', 'id'], name='submission_url_hash_idx'),
+            # Admin changelist order, unfiltered and filtered on approved
+            models.Index(fields=['-submitted_at', '-id'], name='submission_time_idx'),
+            models.Index(fields=['approved', '-submitted_at', '-id'], name='submission_approved_time_idx'),
+            # Admin search, see SubmissionAdmin.get_search_results
+            GinIndex(DESCRIPTION_VECTOR, name='submission_description_idx'),
+        ]
\ No newline at end of file
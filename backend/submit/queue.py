@@ -0,0 +1,163 @@
+"""
+Write-behind queue for source submissions.
+
+The submit view appends each accepted submission as one JSON line to a
+spool file and returns straight away. ``flush_submissions`` periodically
+moves the spool aside and writes everything in it to Submission with
+bulk_create, so a burst of submissions costs a burst of small appends
+rather than a burst of transactions.
+
+Appenders hold a shared flock on the spool while writing. The flusher
+renames the spool first, then takes an exclusive lock on the renamed file
+so it only reads once in-flight appends are done. An appender that opened
+the file before the rename notices the inode changed and reopens.
+"""
+import fcntl
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dashboard.models import Strike
+from sources.canonical import url_hash
+
+from .duplicates import link_duplicates
+from .models import Submission
+
+SPOOL_NAME = 'pending.ndjson'
+LOCK_NAME = 'flush.lock'
+BATCH_SIZE = 1000
+
+
+def spool_dir():
+    path = Path(settings.SUBMISSION_SPOOL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _open_spool(path):
+    """Open the live spool for appending, locked shared and not rotated away."""
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        try:
+            if os.fstat(fd).st_ino == os.stat(path).st_ino:
+                return fd
+        except FileNotFoundError:
+            pass
+        # Flushed between our open and our lock, try the new file
+        os.close(fd)
+
+
+def enqueue(description, source_url, new_strike=False, new_strike_date=None, existing_strike_id=None):
+    """Accept a submission into the spool. Returns its token."""
+    token = uuid.uuid4()
+    record = {
+        'token': str(token),
+        'submitted_at': timezone.now().isoformat(),
+        'description': description,
+        'source_url': source_url,
+        'new_strike': new_strike,
+        'new_strike_date': new_strike_date.isoformat() if new_strike_date else None,
+        'existing_strike_id': existing_strike_id,
+    }
+    line = (json.dumps(record) + '\n').encode()
+    fd = _open_spool(spool_dir() / SPOOL_NAME)
+    try:
+        # One write per record so lines never interleave
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+    return token
+
+
+def _submission(record):
+    return Submission(
+        token=record['token'],
+        submitted_at=datetime.fromisoformat(record['submitted_at']),
+        description=record['description'],
+        source_url=record['source_url'],
+        url_hash=url_hash(record['source_url']),
+        new_strike=record['new_strike'],
+        new_strike_date=date.fromisoformat(record['new_strike_date']) if record['new_strike_date'] else None,
+        existing_strike_id=record['existing_strike_id'],
+        approved=False,
+    )
+
+
+def _write(submissions):
+    # The strike may have been deleted while the submission was queued
+    strike_ids = {s.existing_strike_id for s in submissions if s.existing_strike_id}
+    known = set(Strike.objects.filter(pk__in=strike_ids).values_list('pk', flat=True))
+    for submission in submissions:
+        if submission.existing_strike_id not in known:
+            submission.existing_strike_id = None
+    # Tokens are unique, so a file that was half flushed before a crash
+    # can be flushed again without storing anything twice
+    with transaction.atomic():
+        Submission.objects.bulk_create(submissions, ignore_conflicts=True)
+        # bulk_create skips save(), so duplicates are flagged per batch
+        link_duplicates({s.url_hash for s in submissions})
+
+
+def _flush_file(path, batch_size):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # Waits for appenders that opened the file before it was renamed
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        count, batch = 0, []
+        with os.fdopen(os.dup(fd)) as fp:
+            for line in fp:
+                if not line.endswith('\n'):
+                    # Torn write from a crashed appender, nothing to save
+                    continue
+                batch.append(_submission(json.loads(line)))
+                if len(batch) == batch_size:
+                    _write(batch)
+                    count, batch = count + len(batch), []
+        if batch:
+            _write(batch)
+            count += len(batch)
+    finally:
+        os.close(fd)
+    os.remove(path)
+    return count
+
+
+def flush(batch_size=BATCH_SIZE):
+    """
+    Write every queued submission to the database. Returns how many.
+
+    Files left over from an interrupted flush go first. Only one flush
+    runs at a time, others wait for it.
+    """
+    directory = spool_dir()
+    lock = os.open(directory / LOCK_NAME, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        live = directory / SPOOL_NAME
+        if live.exists():
+            # Nanoseconds keep the flush files in arrival order
+            os.replace(live, directory / f'flushing-{time.time_ns()}.ndjson')
+
+        count = 0
+        for path in sorted(directory.glob('flushing-*.ndjson')):
+            count += _flush_file(path, batch_size)
+        return count
+    finally:
+        os.close(lock)
+
+
+def pending():
+    """Rough number of queued submissions, for monitoring."""
+    total = 0
+    for path in spool_dir().glob('*.ndjson'):
+        with open(path, 'rb') as fp:
+            total += sum(1 for _ in fp)
+    return total
@@ -1,7 +1,27 @@
-from django.test import TestCase, Client
+import os
+import tempfile
+import threading
+
+from io import StringIO
+
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from dashboard.bench import seed_strikes
+from monitoring.testing import QueryBudgetMixin
+from submit import queue
+from submit.approval import approve
+from submit.duplicates import existing, link_duplicates, review_queue
 from submit.models import Submission
+from sources.canonical import url_hash
+from sources.models import Source
 from submit.forms import SubmitForm
-from dashboard.models import Strike
+from dashboard.models import Strike, StrikeListEntry
+from dashboard.typeahead import TYPEAHEAD_LIMIT
 from datetime import date
 from decimal import Decimal
 
@@ -162,7 +182,7 @@ class SubmitFormTests(TestCase):
     def test_form_strike_list_queryset(self):
         """strike_list field contains all strikes after init."""
         form = SubmitForm()
-        self.assertIn(self.strike, form.fields['strike_list'].queryset)
+        self.assertIn(self.strike.pk, form.fields['strike_list'].queryset.values_list('pk', flat=True))
 
     def test_form_existing_strike_choices(self):
         """existing_strike has 'new' and 'existing' choices."""
@@ -177,10 +197,23 @@ class SubmitFormTests(TestCase):
         self.assertEqual(form.fields['existing_strike'].initial, 'existing')
 
 
-class SubmitViewTests(TestCase):
+class SpoolMixin:
+    """Gives each test its own submission spool directory."""
+
+    def setUp(self):
+        super().setUp()
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        settings = override_settings(SUBMISSION_SPOOL_DIR=spool.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+
+class SubmitViewTests(SpoolMixin, TestCase):
     """Test submit views."""
 
     def setUp(self):
+        super().setUp()
         self.client = Client()
         self.strike = Strike.objects.create(
             date=date(2024, 1, 15),
@@ -202,10 +235,11 @@ class SubmitViewTests(TestCase):
         response = self.client.get('/submit/')
         self.assertTemplateUsed(response, 'submit/index.html')
 
-    def test_index_get_context_contains_strike_list(self):
-        """GET request context includes strike_list."""
+    def test_index_get_renders_paged_sidebar(self):
+        """GET renders the first sidebar page, not every strike."""
         response = self.client.get('/submit/')
-        self.assertIn(self.strike, response.context['strike_list'])
+        self.assertContains(response, f'href="/sources/{self.strike.pk}/"')
+        self.assertNotIn('strike_list', response.context)
 
     def test_index_post_creates_submission_existing_strike(self):
         """Valid POST with existing strike creates Submission."""
@@ -217,6 +251,7 @@ class SubmitViewTests(TestCase):
         }
         initial_count = Submission.objects.count()
         response = self.client.post('/submit/', data)
+        queue.flush()
 
         self.assertEqual(Submission.objects.count(), initial_count + 1)
         submission = Submission.objects.first()
@@ -236,6 +271,7 @@ class SubmitViewTests(TestCase):
         }
         initial_count = Submission.objects.count()
         response = self.client.post('/submit/', data)
+        queue.flush()
 
         self.assertEqual(Submission.objects.count(), initial_count + 1)
         submission = Submission.objects.first()
@@ -243,8 +279,8 @@ class SubmitViewTests(TestCase):
         self.assertEqual(submission.new_strike_date, date(2024, 3, 20))
         self.assertIsNone(submission.existing_strike)
 
-    def test_index_post_success_shows_success_context(self):
-        """Successful POST returns success in context."""
+    def test_index_post_success_redirects_to_thanks(self):
+        """Successful POST queues the submission and redirects to the thank-you page."""
         data = {
             'description': 'Success test',
             'source_url': 'https://example.com/success',
@@ -254,7 +290,29 @@ class SubmitViewTests(TestCase):
             'new_strike_date_day': '1',
         }
         response = self.client.post('/submit/', data)
-        self.assertTrue(response.context.get('success'))
+        self.assertRedirects(response, '/submit/thanks/')
+        # Queued, not written yet
+        self.assertEqual(Submission.objects.count(), 0)
+        self.assertEqual(queue.pending(), 1)
+
+    def test_index_post_known_source_says_so(self):
+        """Submitting a url we already list, in another form, tells the submitter."""
+        Source.objects.create(name="Known", url="https://example.com/known")
+        response = self.client.post('/submit/', {
+            'description': 'Known source',
+            'source_url': 'http://www.example.com/known/?utm_source=feed',
+            'existing_strike': 'existing',
+            'strike_list': [self.strike.pk],
+        })
+        self.assertRedirects(response, '/submit/thanks/?known=source')
+        self.assertContains(self.client.get('/submit/thanks/?known=source'), 'We already list this source')
+
+    def test_thanks_page_makes_no_queries(self):
+        """The thank-you page doesn't touch the database."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/submit/thanks/')
+        self.assertContains(response, 'Thank you for contributing')
+        self.assertEqual(len(queries), 0)
 
     def test_index_post_invalid_shows_errors(self):
         """Invalid POST re-renders form with errors."""
@@ -267,6 +325,100 @@ class SubmitViewTests(TestCase):
         self.assertFalse(response.context['form'].is_valid())
 
 
+class StrikePickerTests(TestCase):
+    """Test the typeahead strike picker and the validation behind it."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        for n in range(30):
+            Strike.objects.create(date=date(2024, 1, 1 + n % 28), location_label=f"Caribbean Sea {n}", target="T", striker="S")
+        self.strike = Strike.objects.create(date=date(2025, 9, 2), location_label="Eastern Pacific", target="T", striker="S")
+
+    def test_search_returns_matches(self):
+        """Matching strikes come back as checkboxes for strike_list."""
+        response = self.client.get('/submit/strike-search/', {'q': 'east'})
+        self.assertContains(response, f'name="strike_list" value="{self.strike.pk}"')
+        self.assertNotContains(response, 'Caribbean')
+
+    def test_search_result_limit_is_strict(self):
+        """However many strikes match, only the first few are sent."""
+        response = self.client.get('/submit/strike-search/', {'q': 'carib'})
+        self.assertEqual(len(response.context['strikes']), TYPEAHEAD_LIMIT)
+        self.assertEqual(response.content.decode().count('name="strike_list"'), TYPEAHEAD_LIMIT)
+
+    def test_search_makes_no_queries_once_loaded(self):
+        """The index lives in memory, warm lookups don't touch the database."""
+        self.client.get('/submit/strike-search/', {'q': 'carib'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/submit/strike-search/', {'q': '2025-09'})
+        self.assertEqual(len(queries), 0)
+
+    def test_strike_fields_renders_no_strikes(self):
+        """The picker partial no longer lists the strikes."""
+        response = self.client.get('/submit/strike-fields/', {'strike_type': 'existing'})
+        self.assertNotContains(response, 'Caribbean')
+
+    def test_validation_fetches_submitted_pks_only(self):
+        """Validating strike_list is one pk__in query for the submitted pks."""
+        form = SubmitForm(data={
+            'description': 'Test',
+            'source_url': 'https://example.com/source',
+            'existing_strike': 'existing',
+            'strike_list': [self.strike.pk],
+        })
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(list(form.cleaned_data['strike_list']), [self.strike.list_entry])
+
+    def test_invalid_post_keeps_picked_strikes(self):
+        """A form sent back with errors still shows the strikes picked."""
+        response = self.client.post('/submit/', {
+            'description': '',
+            'source_url': 'https://example.com',
+            'existing_strike': 'existing',
+            'strike_list': [self.strike.pk],
+        })
+        self.assertContains(response, f'name="strike_list" value="{self.strike.pk}" class="accent-amber-500" checked')
+
+
+class SubmitQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Test that the submit pages run a fixed number of queries however many strikes there are."""
+
+    def setUp(self):
+        seed_strikes(20)
+
+    def grow(self):
+        seed_strikes(3000, seed=1)
+
+    def test_index_budget(self):
+        """One sidebar page, the picker starts empty."""
+        self.assertQueryBudget('/submit/', 1, grow=self.grow)
+
+    def test_strike_search_budget(self):
+        """A cold picker loads its index in one query, then searches it in memory."""
+        self.assertQueryBudget('/submit/strike-search/?q=carib', 1, grow=self.grow)
+
+    def test_invalid_post_budget(self):
+        """Re-rendering a rejected form reads back only the strikes that were picked."""
+        picked = list(Strike.objects.values_list('pk', flat=True)[:3])
+        cache.clear()
+        response = self.client.post('/submit/', {
+            'source_url': 'not a url', 'description': 'x',
+            'existing_strike': 'existing', 'strike_list': picked,
+        })
+        small = response.metrics.queries
+        self.grow()
+        cache.clear()
+        response = self.client.post('/submit/', {
+            'source_url': 'not a url', 'description': 'x',
+            'existing_strike': 'existing', 'strike_list': picked,
+        })
+        self.assertEqual(response.metrics.queries, small)
+        self.assertLessEqual(small, 3)
+
+
 class StrikeFieldsHTMXViewTests(TestCase):
     """Test HTMX endpoint for dynamic form fields."""
 
@@ -316,3 +468,278 @@ class StrikeFieldsHTMXViewTests(TestCase):
         """Context includes form instance."""
         response = self.client.get('/submit/strike-fields/')
         self.assertIsInstance(response.context['form'], SubmitForm)
+
+
+class SubmissionQueueTests(SpoolMixin, TestCase):
+    """Test the write-behind submission queue."""
+
+    def setUp(self):
+        super().setUp()
+        self.strike = Strike.objects.create(
+            date=date(2024, 1, 15), location_label="Queue Strike", target="T", striker="S",
+        )
+
+    def test_flush_writes_in_order(self):
+        """Queued submissions are written on flush with their accept time."""
+        for i in range(5):
+            queue.enqueue(f"Queued {i}", f"https://example.com/{i}", existing_strike_id=self.strike.pk)
+        self.assertEqual(Submission.objects.count(), 0)
+        self.assertEqual(queue.flush(batch_size=2), 5)
+        submissions = list(Submission.objects.order_by('submitted_at'))
+        self.assertEqual([s.description for s in submissions], [f"Queued {i}" for i in range(5)])
+        self.assertTrue(all(s.existing_strike == self.strike for s in submissions))
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(queue.pending(), 0)
+
+    def test_reflushing_a_file_stores_once(self):
+        """A flush file left behind by a crash doesn't duplicate submissions."""
+        queue.enqueue("Once", "https://example.com/once")
+        spool = queue.spool_dir()
+        with open(spool / queue.SPOOL_NAME) as fp:
+            line = fp.read()
+        queue.flush()
+        # Pretend the previous flush died before removing its file
+        with open(spool / 'flushing-1.ndjson', 'w') as fp:
+            fp.write(line + '{"torn": ')
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(Submission.objects.filter(description="Once").count(), 1)
+
+    def test_deleted_strike_is_stored_as_null(self):
+        """A strike deleted while its submission was queued becomes NULL."""
+        queue.enqueue("Orphan", "https://example.com/orphan", existing_strike_id=self.strike.pk)
+        self.strike.delete()
+        queue.flush()
+        self.assertIsNone(Submission.objects.get().existing_strike_id)
+
+
+class ConcurrentFlushTests(SpoolMixin, TransactionTestCase):
+    """Test flushing while an append is in flight, the flush runs in a thread."""
+
+    def test_flush_waits_for_append_in_progress(self):
+        """An append that started before the flush ends up in that flush."""
+        path = queue.spool_dir() / queue.SPOOL_NAME
+        fd = queue._open_spool(path)
+        flushed = []
+
+        def flush():
+            flushed.append(queue.flush())
+            connection.close()
+
+        flusher = threading.Thread(target=flush)
+        flusher.start()
+        flusher.join(0.2)
+        # Blocked on our shared lock
+        self.assertTrue(flusher.is_alive())
+        os.write(fd, b'{"token": "00000000-0000-0000-0000-000000000001", "submitted_at": "2024-01-01T00:00:00+00:00", '
+                     b'"description": "Late", "source_url": "https://example.com/late", "new_strike": false, '
+                     b'"new_strike_date": null, "existing_strike_id": null}\n')
+        os.close(fd)
+        flusher.join()
+        self.assertEqual(flushed, [1])
+        # The next append goes to a fresh spool
+        queue.enqueue("Next", "https://example.com/next")
+        self.assertEqual(queue.pending(), 1)
+
+
+class DuplicateSubmissionTests(SpoolMixin, TestCase):
+    """Test duplicate detection across submissions and sources."""
+
+    def test_flush_flags_duplicates_of_the_earliest(self):
+        """Repeat submissions of one url point at the first, across batches."""
+        queue.enqueue("First", "https://example.com/story")
+        queue.enqueue("Other", "https://example.com/other")
+        queue.enqueue("Second", "http://example.com/story/#top")
+        queue.flush(batch_size=1)
+        queue.enqueue("Third", "https://www.example.com/story?fbclid=1")
+        queue.flush()
+
+        first = Submission.objects.get(description="First")
+        self.assertIsNone(first.duplicate_of)
+        self.assertEqual(first.url_hash, url_hash("https://example.com/story"))
+        self.assertEqual(
+            set(first.duplicates.values_list('description', flat=True)), {"Second", "Third"}
+        )
+        self.assertIsNone(Submission.objects.get(description="Other").duplicate_of)
+
+    def test_flush_links_known_source(self):
+        """A submission of a stored source's url is linked to that source."""
+        source = Source.objects.create(name="Known", url="https://example.com/known")
+        queue.enqueue("Again", "http://example.com/known?utm_medium=social")
+        queue.flush()
+        self.assertEqual(Submission.objects.get().source, source)
+
+    def test_existing_checks_sources_then_submissions(self):
+        """The submit-time check finds stored sources and pending submissions."""
+        self.assertEqual(existing("https://example.com/new"), (None, None))
+        source = Source.objects.create(name="Known", url="https://example.com/known")
+        self.assertEqual(existing("https://example.com/known/"), ('source', source.pk))
+        submission = Submission.objects.create(description="Pending", source_url="https://example.com/pending")
+        self.assertEqual(existing("https://example.com/pending#x"), ('submission', submission.pk))
+
+    def test_review_queue_has_one_entry_per_source(self):
+        """Moderators see each distinct url once, with its duplicate count."""
+        for i in range(3):
+            queue.enqueue(f"Story {i}", "https://example.com/story")
+        queue.enqueue("Other", "https://example.com/other")
+        queue.flush()
+        entries = {s.description: s.duplicate_count for s in review_queue()}
+        self.assertEqual(entries, {"Story 0": 2, "Other": 0})
+
+    def test_canonicalize_urls_backfills_and_reports_collisions(self):
+        """The backfill hashes old rows and flags submissions, but leaves colliding sources to moderators."""
+        strike = Strike.objects.create(date=date(2024, 1, 1), location_label="Backfill", target="T", striker="S")
+        other = Strike.objects.create(date=date(2024, 1, 2), location_label="Backfill 2", target="T", striker="S")
+        # Rows from before the hash columns existed, bulk_create skips save()
+        kept, extra = Source.objects.bulk_create([
+            Source(name="Kept", url="https://example.com/story"),
+            Source(name="Extra", url="http://www.example.com/story/", type=Source.Type.SECONDARY),
+        ])
+        strike.sources.add(kept)
+        other.sources.add(extra)
+        first, second = Submission.objects.bulk_create([
+            Submission(description="First", source_url="https://example.com/story"),
+            Submission(description="Second", source_url="https://example.com/story?utm_id=1"),
+        ])
+
+        out = StringIO()
+        call_command('canonicalize_urls', '--dry-run', stdout=out)
+        self.assertIn('Would hash 1 sources (1 colliding) and 2 submissions', out.getvalue())
+        self.assertIn(f'Source {extra.pk} (http://www.example.com/story/) is the same url as source {kept.pk}', out.getvalue())
+        self.assertFalse(Source.objects.exclude(url_hash=None).exists())
+        self.assertFalse(Submission.objects.exclude(url_hash=None).exists())
+
+        out = StringIO()
+        call_command('canonicalize_urls', '--batch-size', '1', stdout=out)
+        self.assertIn('Hashed 1 sources (1 colliding) and 2 submissions', out.getvalue())
+        self.assertIn(f'Source {extra.pk} (http://www.example.com/story/)', out.getvalue())
+        # Nothing merged or deleted, the duplicate keeps its name, type and links
+        extra.refresh_from_db()
+        self.assertEqual((extra.name, extra.type, extra.url_hash), ("Extra", Source.Type.SECONDARY, None))
+        self.assertEqual(list(other.sources.all()), [extra])
+        second.refresh_from_db()
+        self.assertEqual(second.duplicate_of, first)
+        self.assertEqual(second.source, kept)
+
+        out = StringIO()
+        call_command('canonicalize_urls', stdout=out)
+        self.assertIn('Hashed 0 sources (1 colliding) and 0 submissions', out.getvalue())
+
+
+class ApprovalTests(TestCase):
+    """Test the batched approval pipeline."""
+
+    def setUp(self):
+        self.strike = Strike.objects.create(
+            date=date(2025, 9, 2), location_label="Caribbean Sea", target="Vessel", striker="US Navy",
+        )
+        self.known = Source.objects.create(name="Known Outlet", url="https://example.com/known")
+
+    def submit(self, url, **fields):
+        fields.setdefault('description', f"About {url}")
+        return Submission.objects.create(source_url=url, **fields)
+
+    def test_new_strike_submission_becomes_strike(self):
+        """A new-strike submission makes a strike on its date, with its source linked."""
+        submission = self.submit("https://example.com/new", new_strike=True, new_strike_date=date(2025, 10, 3))
+        totals = approve(Submission.objects.all())
+        self.assertEqual(totals, {'submissions': 1, 'strikes': 1, 'links': 1})
+
+        strike = Strike.objects.get(external_id=f'submission-{submission.pk}')
+        self.assertEqual(strike.date, date(2025, 10, 3))
+        self.assertEqual(strike.summary, submission.description)
+        self.assertEqual([s.url for s in strike.sources.all()], ["https://example.com/new"])
+        self.assertTrue(StrikeListEntry.objects.filter(strike=strike).exists())
+        submission.refresh_from_db()
+        self.assertTrue(submission.approved)
+        self.assertIsNotNone(submission.reviewed_at)
+        self.assertEqual(submission.source.url, "https://example.com/new")
+
+    def test_existing_strike_reuses_known_source(self):
+        """A url variant of a stored source links that source, without renaming it."""
+        self.submit("http://www.example.com/known/?utm_source=x", existing_strike=self.strike)
+        approve(Submission.objects.all())
+        self.assertEqual(list(self.strike.sources.all()), [self.known])
+        self.assertEqual(Source.objects.get(pk=self.known.pk).name, "Known Outlet")
+        self.assertEqual(Source.objects.count(), 1)
+
+    def test_duplicates_are_approved_with_their_original(self):
+        """Approving an original approves its duplicates and makes one strike."""
+        original = self.submit("https://example.com/story", new_strike=True, new_strike_date=date(2025, 11, 1))
+        self.submit("https://example.com/story#top", new_strike=True)
+        self.submit("https://example.com/story?fbclid=1", existing_strike=self.strike)
+        link_duplicates({original.url_hash})
+
+        totals = approve(Submission.objects.filter(pk=original.pk))
+        self.assertEqual(totals['submissions'], 3)
+        self.assertEqual(totals['strikes'], 1)
+        self.assertFalse(Submission.objects.filter(approved=False).exists())
+        new = Strike.objects.get(external_id=f'submission-{original.pk}')
+        story = Source.objects.get(url="https://example.com/story")
+        self.assertEqual(list(new.sources.all()), [story])
+        self.assertIn(story, self.strike.sources.all())
+
+    def test_rerun_is_safe(self):
+        """Approving again, even after approved is reset, adds nothing."""
+        self.submit("https://example.com/again", new_strike=True, new_strike_date=date(2025, 10, 3))
+        approve(Submission.objects.all())
+        self.assertEqual(approve(Submission.objects.all()), {'submissions': 0, 'strikes': 0, 'links': 0})
+        Submission.objects.update(approved=False)
+        self.assertEqual(approve(Submission.objects.all()), {'submissions': 1, 'strikes': 0, 'links': 0})
+        self.assertEqual(Strike.objects.count(), 2)
+        self.assertEqual(Source.objects.count(), 2)
+
+    def test_queries_do_not_grow_with_batch(self):
+        """A batch costs the same number of queries for 2 submissions or 20."""
+        def run(count, offset):
+            for i in range(count):
+                self.submit(f"https://example.com/batch/{offset + i}", new_strike=True, new_strike_date=date(2025, 10, 3))
+                self.submit(f"https://example.com/linked/{offset + i}", existing_strike=self.strike)
+            with CaptureQueriesContext(connection) as queries:
+                approve(Submission.objects.filter(approved=False))
+            return len(queries)
+
+        self.assertEqual(run(1, 0), run(10, 100))
+
+    def test_command_and_admin_action(self):
+        """approve_submissions and the admin action both approve."""
+        first = self.submit("https://example.com/one", existing_strike=self.strike)
+        second = self.submit("https://example.com/two", existing_strike=self.strike)
+        out = StringIO()
+        call_command('approve_submissions', str(first.pk), stdout=out)
+        self.assertIn('Approved 1 submissions, created 0 strikes and added 1 source links', out.getvalue())
+
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='admin'))
+        response = self.client.post('/admin/submit/submission/', {
+            'action': 'approve_selected', '_selected_action': [second.pk],
+        }, follow=True)
+        self.assertContains(response, 'Approved 1 submissions')
+        self.assertEqual(self.strike.sources.count(), 2)
+
+
+class SubmissionAdminTests(TestCase):
+    """Test the Submission admin's search."""
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', password='admin'))
+        self.boat = Submission.objects.create(description="Footage of the boat strike", source_url="https://example.com/boat")
+        self.other = Submission.objects.create(description="Press briefing transcript", source_url="https://example.com/brief")
+
+    def search(self, query):
+        response = self.client.get('/admin/submit/submission/', {'q': query})
+        return list(response.context['cl'].result_list)
+
+    def test_search_uses_full_text_and_url_hash(self):
+        """Words and prefixes match through the description index, full urls through url_hash."""
+        self.assertEqual(self.search('boat'), [self.boat])
+        self.assertEqual(self.search('strikes foot'), [self.boat])
+        self.assertEqual(self.search('briefing'), [self.other])
+        self.assertEqual(self.search('http://www.example.com/brief/'), [self.other])
+        self.assertEqual(len(self.search('%')), 2)
+
+    def test_search_is_an_index_lookup(self):
+        """The description search can use its GIN index instead of scanning every row."""
+        model_admin = admin.site._registry[Submission]
+        matches, _ = model_admin.get_search_results(None, Submission.objects.all(), 'boat')
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('submission_description_idx', matches.explain())
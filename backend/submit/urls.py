@@ -6,5 +6,7 @@ app_name = 'submit'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('thanks/', views.thanks, name='thanks'),
     path('strike-fields/', views.strike_fields, name='strike_fields'),
+    path('strike-search/', views.strike_search, name='strike_search'),
 ]
\ No newline at end of file
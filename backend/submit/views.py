@@ -1,19 +1,21 @@
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.template import loader
 from django.http import HttpResponse
+from django.urls import reverse
 
-from .models import Submission
-from sources.models import Source
-from dashboard.models import Strike
+from dashboard import asyncdb, typeahead
+from dashboard.models import StrikeListEntry
+from dashboard.sidebar import render_strike_list, sidebar_context
+from .duplicates import existing
 from .forms import SubmitForm
+from .queue import enqueue
 
 # TODO:
-# Create thank you page after submission.
 # Add strike date to front end
 # clean up UI
 
 
-def strike_fields(request):
+async def strike_fields(request):
     """HTMX endpoint to return appropriate form fields based on strike type selection."""
     strike_type = request.GET.get('strike_type', 'existing')
     form = SubmitForm()
@@ -26,38 +28,83 @@ def strike_fields(request):
     return HttpResponse(template.render(context, request))
 
 
-def index(request):
+async def strike_search(request):
+    """
+    HTMX endpoint for the strike picker, the best few matches for ``q``.
 
+    Answered from the in-memory prefix index, never more than
+    TYPEAHEAD_LIMIT rows however many strikes there are.
+    """
+    q = request.GET.get('q', '').strip()[:100]
+    # Off the event loop, the index reloads from the database when stale
+    matches = await asyncdb.run(request, typeahead.search, q)
+    strikes = [
+        StrikeListEntry(strike_id=pk, date=day, location_label=label)
+        for pk, day, label in matches
+    ]
+    template = loader.get_template('submit/partials/strike_options.html')
+    context = {
+        'strikes': strikes,
+        'q': q,
+        'truncated': len(strikes) >= typeahead.TYPEAHEAD_LIMIT,
+    }
+    return HttpResponse(template.render(context, request))
+
+
+def _enqueue(data):
+    existing_strike_id = None
+    if data['existing_strike'] == 'existing':
+        first = data['strike_list'].first()
+        existing_strike_id = first.pk if first else None
+
+    # Queued and written to the database by flush_submissions, so
+    # a burst of submissions doesn't turn into a burst of writes
+    enqueue(
+        description=data['description'],
+        source_url=data['source_url'],
+        new_strike=(data['existing_strike'] == 'new'),
+        new_strike_date=data['new_strike_date'],
+        existing_strike_id=existing_strike_id,
+    )
+
+
+async def index(request):
+    selected_strikes = []
     if request.method == 'POST':
         form = SubmitForm(request.POST)
-        if form.is_valid():
-            description = form.cleaned_data['description']
+        if await asyncdb.run(request, form.is_valid):
             source_url = form.cleaned_data['source_url']
-            existing_strike_choice = form.cleaned_data['existing_strike']
-            strike_list = form.cleaned_data['strike_list']
-            new_strike_date = form.cleaned_data['new_strike_date']
-
-            submission = Submission(
-                description=description,
-                source_url=source_url,
-                new_strike=(existing_strike_choice == 'new'),
-                new_strike_date=new_strike_date,   
-                approved=False
+            # Let people know when we already have the link, the flush
+            # flags the duplicate for moderators
+            _, (known, _) = await asyncdb.gather(
+                request,
+                lambda: _enqueue(form.cleaned_data),
+                lambda: existing(source_url),
             )
-
-            if existing_strike_choice == 'existing' and strike_list.exists():
-                submission.existing_strike = strike_list.first()
-
-            submission.save()
-
-            template = loader.get_template('submit/index.html')
-            context = {'strike_list': Strike.objects.all(), 'form': SubmitForm(), 'success': True}
-            return HttpResponse(template.render(context, request))
+            if known:
+                return redirect(f"{reverse('submit:thanks')}?known={known}")
+            return redirect('submit:thanks')
+        selected_strikes, sidebar_html = await asyncdb.gather(
+            request, form.selected_strikes, lambda: render_strike_list('sources'),
+        )
     else:
         form = SubmitForm()
+        sidebar_html = await asyncdb.run(request, render_strike_list, 'sources')
     template = loader.get_template('submit/index.html')
     context = {
-        'strike_list': Strike.objects.all(),
-        'form': form
+        'form': form,
+        # Looked up here, templates render on the event loop
+        'selected_strikes': selected_strikes,
+        # First page of the shared sidebar, the rest loads as it scrolls
+        **sidebar_context('sources', html=sidebar_html),
     }
-    return HttpResponse(template.render(context, request))
\ No newline at end of file
+    return HttpResponse(template.render(context, request))
+
+
+async def thanks(request):
+    """Where a successful submission redirects to. No strike queries here."""
+    template = loader.get_template('submit/thanks.html')
+    context = {
+        'known': request.GET.get('known'),
+    }
+    return HttpResponse(template.render(context, request))